@@ -2,6 +2,9 @@
 ASGI config for agrilink project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn agrilink.asgi:application``) so
+async views such as the market insights API can keep many Groq requests in
+flight on one worker.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -18,6 +18,69 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Groq AI Configuration
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY', 'your-groq-api-key-here')
+# Alternative API endpoint, e.g. the local stub from `manage.py groq_stub`;
+# None uses the Groq default
+GROQ_BASE_URL = os.environ.get('GROQ_BASE_URL') or None
+
+# Groq response cache (see base/llm_cache.py): a SQLite file shared by all
+# workers, LRU-evicted past GROQ_CACHE_MAX_BYTES, with per-method TTLs in seconds
+GROQ_CACHE_PATH = os.environ.get('GROQ_CACHE_PATH', os.path.join(BASE_DIR, 'llm_cache.sqlite3'))
+GROQ_CACHE_MAX_BYTES = 50 * 1024 * 1024
+GROQ_CACHE_TTLS = {
+    'price_recommendation': 6 * 60 * 60,
+    'price_recommendations_batch': 6 * 60 * 60,
+    'negotiation_strategy': 60 * 60,
+    'market_insights': 60 * 60,
+    'personalized_recommendations': 30 * 60,
+    'default': 60 * 60,
+}
+
+# Maximum concurrent Groq API calls per event loop for the async service
+GROQ_MAX_CONCURRENCY = 8
+
+# Per-call Groq timeouts in seconds; retries are off because each one would
+# multiply the worst-case latency of an AI-backed page
+GROQ_TIMEOUTS = {
+    'price_recommendation': 8,
+    'price_recommendations_batch': 20,
+    'negotiation_strategy': 8,
+    'market_insights': 12,
+    'personalized_recommendations': 10,
+    'default': 10,
+}
+GROQ_MAX_RETRIES = 0
+
+# Total seconds a web request may spend waiting on Groq (base.middleware)
+GROQ_REQUEST_BUDGET = 12
+
+# Circuit breaker: open after this many consecutive failed or slow calls,
+# then probe again after reset_timeout seconds
+GROQ_CIRCUIT_BREAKER = {
+    'failure_threshold': 5,
+    'slow_call_seconds': 6,
+    'reset_timeout': 30,
+}
+
+# Products packed into one prompt by the batched price recommendation API
+GROQ_PRICE_BATCH_SIZE = 20
+
+# Price history (base/price_history.py): days raw price points and daily
+# rollups are kept once rolled up; weekly rollups are kept indefinitely
+PRICE_HISTORY = {
+    'raw_days': 35,
+    'daily_days': 400,
+}
+
+# Price suggestion retention: history rows kept per product, and maximum age
+PRICE_SUGGESTION_HISTORY = 5
+PRICE_SUGGESTION_RETENTION_DAYS = 90
+
+# Background job queue (base.jobs): worker lease length, retry backoff
+# (base * 2 ** (attempt - 1), capped), and how long finished jobs are kept
+JOB_LEASE_SECONDS = 300
+JOB_RETRY_BACKOFF = 30
+JOB_RETRY_BACKOFF_MAX = 60 * 60
+JOB_RETENTION_DAYS = 7
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -46,12 +109,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'base.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable
+    'base.middleware.MetricsMiddleware',
+    'base.middleware.QueryInstrumentationMiddleware',
+    'base.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'base.middleware.LatencyBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'agrilink.urls'
@@ -78,11 +146,118 @@ WSGI_APPLICATION = 'agrilink.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite tuning applied to every new connection: WAL so readers never block
+# the writer, and a busy timeout so writers queue instead of failing with
+# "database is locked". Transactions start IMMEDIATE, taking the write lock
+# up front; a DEFERRED read-then-write transaction would fail outright when
+# another writer got there first. Maintenance runs as the
+# sqlite_maintenance job/command (base/db_maintenance.py).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB
+    'temp_store': 'MEMORY',
+}
+SQLITE_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 5,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+    }
+}
+
+# Read replicas (base/db_router.py): DATABASE_REPLICAS is a comma-separated
+# list of SQLite files; `manage.py sync_replicas` copies the primary into
+# them for local testing. Other engines replicate on their own and can be
+# added here as further aliases.
+for index, path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['base.db_router.PrimaryReplicaRouter']
+# How long a client reads from the primary after writing (replication lag allowance)
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+
+# Caches
+# 'default' is shared by every worker on the host (set REDIS_URL to share it
+# across hosts); it holds the catalog version used by base/page_cache.py.
+# 'pages' is per-worker memory holding rendered pages and shared contexts.
+if os.environ.get('REDIS_URL'):
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+
+CACHES = {
+    'default': DEFAULT_CACHE,
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'agrilink-pages',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Item-item recommendation model (base/recommender.py), rebuilt offline by
+# `manage.py build_recommendations`; neighbours kept per product
+RECOMMENDER_MODEL_PATH = os.environ.get('RECOMMENDER_MODEL_PATH', os.path.join(BASE_DIR, 'recommender.npz'))
+RECOMMENDER_TOP_K = 50
+
+# Write-behind buffer for SearchHistory/LoginHistory (base/write_buffer.py):
+# rows are bulk-inserted every max_delay seconds or once max_size are queued;
+# beyond max_pending (database unavailable) new rows are dropped.
+# Disable to write each row synchronously.
+WRITE_BUFFER = {
+    'enabled': os.environ.get('WRITE_BUFFER_ENABLED', '1') == '1',
+    'max_size': 200,
+    'max_delay': 2.0,
+    'max_pending': 10000,
+}
+
+# Seconds a cached page or shared context may live within one catalog version
+PAGE_CACHE_TIMEOUT = 300
+
+# Per-request SQL statistics (base.middleware.QueryInstrumentationMiddleware):
+# the fraction of requests sampled, how often one statement shape may repeat
+# before it is reported as an N+1, and the slow-query threshold
+SQL_INSTRUMENTATION = {
+    'sample_rate': float(os.environ.get('SQL_SAMPLE_RATE', 1.0 if DEBUG else 0.01)),
+    'n_plus_one_threshold': 5,
+    'slow_query_ms': 100,
+    'explain': True,
+}
+
+# Bearer token required by /metrics; empty leaves the endpoint open (keep it
+# reachable from the internal network only)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Module loggers of the app (jobs, write buffer, Groq fallbacks, ...)
+        'base': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'base.sql': {'handlers': ['console'], 'level': 'INFO' if DEBUG else 'WARNING', 'propagate': False},
+    },
 }
 
 
@@ -124,18 +299,48 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic writes content-hashed, pre-compressed (gzip/brotli) copies;
+# WhiteNoise serves the hashed names with far-future, immutable caching
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Who sends media bytes (base/media.py): 'x-accel' (nginx internal location
+# at MEDIA_ACCEL_PREFIX), 'x-sendfile' (Apache/lighttpd) or 'python'
+MEDIA_DELIVERY = os.environ.get('MEDIA_DELIVERY', 'python')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Browser cache lifetime for media without a content hash in its name
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
+
+# Product image processing (base/images.py): card variant widths in pixels
+# (cropped to aspect), encoder qualities and the largest original kept
+PRODUCT_IMAGES = {
+    'widths': (320, 640, 960),
+    'aspect': (16, 9),
+    'webp_quality': 75,
+    'jpeg_quality': 80,
+    'max_original': 2048,
+}
+
 # Authentication
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
 LOGIN_URL = 'login'
 
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
+    'base.backends.EmailOrUsernameModelBackend',
 ]
+
+# Account lockout (base/backends.py): failed attempts are counted in the
+# 'default' cache and written to SecuritySettings every few failures and on lockout
+LOGIN_MAX_FAILURES = 5
+LOGIN_LOCKOUT_MINUTES = 30
+LOGIN_FAILURE_PERSIST_EVERY = 3
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
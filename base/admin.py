@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from .models import *
+from .jobs import retry_dead_jobs
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -84,8 +85,8 @@ class ProductAdmin(admin.ModelAdmin):
 
 @admin.register(PriceSuggestion)
 class PriceSuggestionAdmin(admin.ModelAdmin):
-    list_display = ('product', 'suggested_price', 'confidence_score', 'price_label', 'created_at')
-    list_filter = ('price_label', 'created_at')
+    list_display = ('product', 'suggested_price', 'confidence_score', 'price_label', 'model_version', 'is_current', 'created_at')
+    list_filter = ('price_label', 'is_current', 'model_version', 'created_at')
     search_fields = ('product__name',)
     readonly_fields = ('created_at',)
 
@@ -112,7 +113,7 @@ class WishlistAdmin(admin.ModelAdmin):
 
 @admin.register(MarketTrend)
 class MarketTrendAdmin(admin.ModelAdmin):
-    list_display = ('category', 'average_price', 'price_trend', 'demand_level', 'created_at')
+    list_display = ('category', 'average_price', 'median_price', 'product_count', 'price_trend', 'demand_level', 'created_at')
     list_filter = ('price_trend', 'demand_level', 'created_at')
     search_fields = ('category__name',)
     readonly_fields = ('created_at',)
@@ -168,4 +169,29 @@ class FarmerPriceResponseAdmin(admin.ModelAdmin):
     list_display = ('farmer', 'price_suggestion', 'counter_price', 'available_quantity', 'status', 'created_at')
     list_filter = ('status', 'created_at')
     search_fields = ('farmer__username', 'price_suggestion__product_name')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+@admin.register(MarketplaceStats)
+class MarketplaceStatsAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'total_products', 'active_farmers', 'counties_covered', 'updated_at')
+    search_fields = ('scope',)
+    readonly_fields = ('scope', 'total_products', 'active_farmers', 'counties_covered', 'updated_at')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_until', 'last_error')
+    actions = ['retry_jobs']
+    
+    def retry_jobs(self, request, queryset):
+        count = retry_dead_jobs(queryset)
+        self.message_user(request, f'{count} dead jobs re-queued.')
+    retry_jobs.short_description = 'Re-queue selected dead jobs'
+
+@admin.register(PriceRollup)
+class PriceRollupAdmin(admin.ModelAdmin):
+    list_display = ('category', 'county', 'period', 'period_start', 'min_price', 'avg_price', 'median_price', 'max_price', 'samples')
+    list_filter = ('period', 'category')
+    search_fields = ('county', 'category__name')
@@ -1,99 +1,132 @@
-import random
+import numpy as np
 from datetime import datetime, timedelta
 from django.utils import timezone
 from .models import *
+from .recommender import recommend_for_user
+from . import market_trends
+
+# Stored with every persisted PriceSuggestion; bump it whenever the pricing
+# logic below changes so existing snapshots get recomputed
+PRICING_MODEL_VERSION = 'agriai-1'
+
+# Pricing multipliers shared by the single and batch pricing paths
+QUALITY_MULTIPLIERS = {
+    'premium': 1.4,
+    'grade1': 1.2,
+    'grade2': 1.0,
+    'standard': 0.8
+}
+
+# Location adjustment (simplified); the first matching location wins
+LOCATION_MULTIPLIERS = {
+    'nairobi': 1.1,
+    'mombasa': 1.05,
+    'nakuru': 0.95,
+    'eldoret': 0.9,
+    'kisumu': 0.95
+}
+
+TREND_MULTIPLIERS = {
+    'increasing': 1.05,
+    'decreasing': 0.95,
+}
 
 class AgriAI:
     @staticmethod
     def calculate_optimal_price(product):
         """Calculate optimal price based on market trends, quality, and other factors"""
-        
-        # Get market trends for the product category
-        try:
-            market_trend = MarketTrend.objects.filter(
-                category=product.category
-            ).order_by('-created_at').first()
-        except MarketTrend.DoesNotExist:
-            market_trend = None
-        
-        base_price = float(product.price)
-        
-        # Quality multiplier
-        quality_multipliers = {
-            'premium': 1.4,
-            'grade1': 1.2,
-            'grade2': 1.0,
-            'standard': 0.8
-        }
-        
-        # Location adjustment (simplified)
-        location_multipliers = {
-            'nairobi': 1.1,
-            'mombasa': 1.05,
-            'nakuru': 0.95,
-            'eldoret': 0.9,
-            'kisumu': 0.95
-        }
-        
-        # Seasonality factor (simplified)
-        current_month = datetime.now().month
+        return AgriAI.calculate_optimal_prices([product])[0]
+
+    @staticmethod
+    def get_season_multiplier(month=None):
+        """Seasonality factor (simplified)"""
+        current_month = month or datetime.now().month
         if current_month in [12, 1, 2]:  # Dry season
-            season_multiplier = 1.15
+            return 1.15
         elif current_month in [6, 7, 8]:  # Rainy season
-            season_multiplier = 0.9
-        else:
-            season_multiplier = 1.0
-        
-        # Calculate suggested price
-        quality_multiplier = quality_multipliers.get(product.quality_grade, 1.0)
-        location_multiplier = 1.0
-        for location, multiplier in location_multipliers.items():
-            if location in product.location.lower():
-                location_multiplier = multiplier
-                break
-        
-        suggested_price = base_price * quality_multiplier * location_multiplier * season_multiplier
-        
-        # Adjust based on market trend
-        if market_trend:
-            if market_trend.price_trend == 'increasing':
-                suggested_price *= 1.05
-            elif market_trend.price_trend == 'decreasing':
-                suggested_price *= 0.95
-        
+            return 0.9
+        return 1.0
+
+    @staticmethod
+    def get_latest_trends(category_ids):
+        """Map category id -> latest price_trend, fetched in a single query"""
+        latest_trend = MarketTrend.objects.filter(
+            category=models.OuterRef('pk')
+        ).order_by('-created_at').values('price_trend')[:1]
+
+        return dict(
+            ProductCategory.objects.filter(id__in=set(category_ids)).annotate(
+                latest_trend=models.Subquery(latest_trend)
+            ).values_list('id', 'latest_trend')
+        )
+
+    @staticmethod
+    def calculate_optimal_prices(products):
+        """
+        Price a list or queryset of products in one pass.
+
+        Fetches the latest market trend for every category involved with one
+        query and computes all multipliers as NumPy arrays. Returns a list of
+        suggestion dicts in the same order as ``products``.
+        """
+        products = list(products)
+        if not products:
+            return []
+
+        count = len(products)
+        trends = AgriAI.get_latest_trends(p.category_id for p in products)
+        product_trends = [trends.get(p.category_id) or 'stable' for p in products]
+
+        base_prices = np.array([float(p.price) for p in products], dtype=float)
+
+        quality_grades = [p.quality_grade for p in products]
+        quality = np.array([QUALITY_MULTIPLIERS.get(q, 1.0) for q in quality_grades], dtype=float)
+
+        # Apply locations in reverse so the first matching entry wins
+        locations = np.array([(p.location or '').lower() for p in products], dtype=str)
+        location = np.ones(count)
+        for name, multiplier in reversed(list(LOCATION_MULTIPLIERS.items())):
+            location = np.where(np.char.find(locations, name) >= 0, multiplier, location)
+
+        trend = np.array([TREND_MULTIPLIERS.get(t, 1.0) for t in product_trends], dtype=float)
+
+        current_month = datetime.now().month
+        season_multiplier = AgriAI.get_season_multiplier(current_month)
+
+        suggested = base_prices * quality * location * season_multiplier * trend
+
         # Add some randomness for realism
-        suggested_price *= random.uniform(0.95, 1.05)
-        
+        suggested *= np.random.uniform(0.95, 1.05, count)
+
         # Round to nearest 10
-        suggested_price = round(suggested_price / 10) * 10
-        
-        # Determine price label
-        price_diff = ((suggested_price - base_price) / base_price) * 100
-        
-        if price_diff <= -10:
-            price_label = 'best_price'
-        elif price_diff <= -5:
-            price_label = 'good_price'
-        elif price_diff <= 5:
-            price_label = 'fair_price'
-        else:
-            price_label = 'high_price'
-        
-        factors = {
-            'quality_grade': product.quality_grade,
-            'location': product.location,
-            'seasonality': current_month,
-            'market_trend': market_trend.price_trend if market_trend else 'stable',
-            'original_price': float(base_price),
-            'price_difference_percent': round(price_diff, 2)
-        }
-        
-        return {
-            'suggested_price': suggested_price,
-            'confidence_score': random.uniform(0.7, 0.95),
-            'price_label': price_label,
-            'factors_considered': factors
-        }
+        suggested = np.round(suggested / 10) * 10
+
+        # Determine price labels
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_diff = np.where(base_prices > 0, (suggested - base_prices) / base_prices * 100, 0.0)
+        labels = np.select(
+            [price_diff <= -10, price_diff <= -5, price_diff <= 5],
+            ['best_price', 'good_price', 'fair_price'],
+            default='high_price'
+        )
+        confidence = np.random.uniform(0.7, 0.95, count)
+
+        results = []
+        for i, product in enumerate(products):
+            results.append({
+                'suggested_price': float(suggested[i]),
+                'confidence_score': float(confidence[i]),
+                'price_label': str(labels[i]),
+                'factors_considered': {
+                    'quality_grade': quality_grades[i],
+                    'location': product.location,
+                    'seasonality': current_month,
+                    'market_trend': product_trends[i],
+                    'original_price': float(base_prices[i]),
+                    'price_difference_percent': round(float(price_diff[i]), 2)
+                }
+            })
+        return results
 
     @staticmethod
     def generate_market_recommendations():
@@ -129,42 +162,12 @@ class AgriAI:
         
         return recommendations
 
+    @staticmethod
+    def update_market_trends():
+        """Record a new MarketTrend per category (see base/market_trends.py)"""
+        return market_trends.update_market_trends()
+
     @staticmethod
     def recommend_products_for_user(user, limit=6):
-        """Generate personalized product recommendations for a user"""
-        
-        # Get user's wishlist and search history
-        wishlist_products = Product.objects.filter(wishlist__user=user)
-        search_history = SearchHistory.objects.filter(user=user).order_by('-created_at')[:5]
-        
-        recommended_products = []
-        
-        # Based on wishlist
-        if wishlist_products.exists():
-            similar_categories = wishlist_products.values_list('category', flat=True).distinct()
-            similar_products = Product.objects.filter(
-                category__in=similar_categories,
-                is_available=True
-            ).exclude(wishlist__user=user).order_by('?')[:limit]
-            recommended_products.extend(list(similar_products))
-        
-        # Based on search history
-        if search_history.exists():
-            recent_searches = [sh.query for sh in search_history]
-            for search_query in recent_searches:
-                searched_products = Product.objects.filter(
-                    name__icontains=search_query,
-                    is_available=True
-                ).exclude(id__in=[p.id for p in recommended_products])[:2]
-                recommended_products.extend(list(searched_products))
-        
-        # Fill with popular products if needed
-        if len(recommended_products) < limit:
-            popular_products = Product.objects.filter(
-                is_available=True
-            ).annotate(
-                review_count=models.Count('reviews')
-            ).order_by('-review_count')[:limit - len(recommended_products)]
-            recommended_products.extend(list(popular_products))
-        
-        return list(set(recommended_products))[:limit]
\ No newline at end of file
+        """Generate personalized product recommendations for a user (see base/recommender.py)"""
+        return recommend_for_user(user, limit)
\ No newline at end of file
@@ -1,64 +1,155 @@
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
-from django.db.models import Q
-from .models import SecuritySettings
+from django.core.cache import caches
+from django.db.models.functions import Lower
+from .models import LoginHistory, SecuritySettings
+from .write_buffer import write_buffer
 from django.utils import timezone
 
+# Lockout state lives in the shared cache so a burst of logins does not turn
+# into a burst of SecuritySettings writes; the database copy is updated on
+# lockout, on reset and every LOGIN_FAILURE_PERSIST_EVERY failures.
+FAILURE_COUNT_TIMEOUT = 24 * 60 * 60
+
+
+def get_client_ip(request):
+    """Get client IP address"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def log_login(user, request, success):
+    """Queue a LoginHistory row; written in the background by the write buffer"""
+    ip = get_client_ip(request)
+    if not ip:
+        # Not an HTTP request (e.g. Client.force_login); nothing to record
+        return
+    write_buffer.add(LoginHistory(
+        user=user,
+        ip_address=ip,
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        success=success
+    ))
+
+
+def _lock_cache():
+    return caches['default']
+
+
+def _failures_key(user_id):
+    return f'login-failures:{user_id}'
+
+
+def _locked_key(user_id):
+    return f'login-locked:{user_id}'
+
+
+def find_user(identifier):
+    """
+    The user whose username, or else unique email, matches case-insensitively.
+
+    Compares LOWER(column) so the expression indexes from migration 0012 are
+    used, and loads the security settings in the same query.
+    """
+    value = identifier.lower()
+    users = User.objects.select_related('security_settings')
+    user = users.alias(username_lower=Lower('username')).filter(username_lower=value).first()
+    if user is None:
+        matches = list(users.alias(email_lower=Lower('email')).filter(email_lower=value)[:2])
+        if len(matches) == 1:
+            user = matches[0]
+    return user
+
+
+def get_security_settings(user):
+    try:
+        return user.security_settings
+    except SecuritySettings.DoesNotExist:
+        return None
+
+
+def persist_security(user, failed_login_attempts, account_locked_until):
+    updated = SecuritySettings.objects.filter(user=user).update(
+        failed_login_attempts=failed_login_attempts,
+        account_locked_until=account_locked_until,
+    )
+    if not updated:
+        # Another request may create the row between the UPDATE and here
+        SecuritySettings.objects.update_or_create(user=user, defaults={
+            'failed_login_attempts': failed_login_attempts,
+            'account_locked_until': account_locked_until,
+        })
+
+
+def is_locked(user, security):
+    now = timezone.now()
+    locked_until = _lock_cache().get(_locked_key(user.id))
+    if locked_until is not None and locked_until > now:
+        return True
+    return bool(security and security.account_locked_until and security.account_locked_until > now)
+
+
+def record_failure(user, security):
+    """Count a failed attempt; lock the account after LOGIN_MAX_FAILURES"""
+    cache = _lock_cache()
+    key = _failures_key(user.id)
+    cache.add(key, security.failed_login_attempts if security else 0, FAILURE_COUNT_TIMEOUT)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        failures = 1
+        cache.set(key, failures, FAILURE_COUNT_TIMEOUT)
+
+    if failures >= settings.LOGIN_MAX_FAILURES:
+        locked_until = timezone.now() + timezone.timedelta(minutes=settings.LOGIN_LOCKOUT_MINUTES)
+        cache.set(_locked_key(user.id), locked_until, settings.LOGIN_LOCKOUT_MINUTES * 60)
+        cache.delete(key)
+        persist_security(user, failures, locked_until)
+    elif failures % settings.LOGIN_FAILURE_PERSIST_EVERY == 0:
+        persist_security(user, failures, None)
+
+
+def clear_failures(user, security):
+    """Reset the counters after a successful login; no write when they are already clear"""
+    cache = _lock_cache()
+    pending = cache.get(_failures_key(user.id))
+    if security is None:
+        # Concurrent first logins can both get here
+        SecuritySettings.objects.get_or_create(user=user)
+    elif pending or security.failed_login_attempts or security.account_locked_until:
+        persist_security(user, 0, None)
+    if pending is not None or (security and security.account_locked_until):
+        cache.delete_many([_failures_key(user.id), _locked_key(user.id)])
+
+
 class EmailOrUsernameModelBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            # Check if user exists with username or email
-            user = User.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            )
-            
-            # Check security settings
-            try:
-                security_settings = user.security_settings
-                if (security_settings.account_locked_until and 
-                    security_settings.account_locked_until > timezone.now()):
-                    return None
-            except SecuritySettings.DoesNotExist:
-                security_settings = SecuritySettings.objects.create(user=user)
-            
-            # Verify password
-            if user.check_password(password):
-                # Reset failed login attempts on successful login
-                security_settings.failed_login_attempts = 0
-                security_settings.account_locked_until = None
-                security_settings.save()
-                
-                # Log login history
-                self.log_login_history(user, request, True)
-                return user
-            else:
-                # Increment failed login attempts
-                security_settings.failed_login_attempts += 1
-                if security_settings.failed_login_attempts >= 5:
-                    security_settings.account_locked_until = timezone.now() + timezone.timedelta(minutes=30)
-                security_settings.save()
-                
-                # Log failed attempt
-                self.log_login_history(user, request, False)
-                return None
-                
-        except User.DoesNotExist:
+        if username is None or password is None:
+            return None
+
+        user = find_user(username)
+        if user is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            User().set_password(password)
+            return None
+
+        security = get_security_settings(user)
+        if is_locked(user, security):
             return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            # Successful logins are logged by the user_logged_in receiver
+            clear_failures(user, security)
+            return user
+
+        record_failure(user, security)
+        # Log failed attempt
+        self.log_login_history(user, request, False)
+        return None
     
     def log_login_history(self, user, request, success):
-        from .models import LoginHistory
-        
-        LoginHistory.objects.create(
-            user=user,
-            ip_address=self.get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            success=success
-        )
-    
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        if request is not None:
+            log_login(user, request, success)
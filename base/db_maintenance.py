@@ -0,0 +1,54 @@
+"""
+Routine SQLite upkeep for the primary database, run by the
+sqlite_maintenance job or `manage.py sqlite_maintenance`:
+
+- PRAGMA optimize, which re-analyzes only the tables whose statistics
+  have drifted (a full ANALYZE on request);
+- incremental vacuum, returning up to N free pages to the filesystem once
+  auto_vacuum=INCREMENTAL has been enabled (a one-off full VACUUM);
+- a WAL checkpoint that truncates the -wal file, which otherwise keeps the
+  size of its largest burst of writes.
+"""
+from django.db import connections, DEFAULT_DB_ALIAS
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _pragma(cursor, statement):
+    cursor.execute(f'PRAGMA {statement}')
+    row = cursor.fetchone()
+    return row[0] if row and len(row) == 1 else row
+
+
+def run_maintenance(alias=DEFAULT_DB_ALIAS, analyze=False, vacuum_pages=1000):
+    """Returns what was done as a dict; does nothing for other database engines"""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        return {}
+    report = {}
+    with connection.cursor() as cursor:
+        if analyze:
+            cursor.execute('ANALYZE')
+            report['analyzed'] = True
+        cursor.execute('PRAGMA optimize')
+
+        report['free_pages'] = _pragma(cursor, 'freelist_count')
+        if vacuum_pages and _pragma(cursor, 'auto_vacuum') == AUTO_VACUUM_INCREMENTAL:
+            # Each step of this pragma frees one page, but sqlite3's execute()
+            # steps a statement without result columns only once
+            cursor.executescript(f'PRAGMA incremental_vacuum({int(vacuum_pages)})')
+            report['free_pages_after'] = _pragma(cursor, 'freelist_count')
+
+        if _pragma(cursor, 'journal_mode') == 'wal':
+            busy, log_frames, checkpointed = _pragma(cursor, 'wal_checkpoint(TRUNCATE)')
+            report['checkpoint'] = {'busy': bool(busy), 'wal_frames': log_frames, 'checkpointed': checkpointed}
+    return report
+
+
+def enable_incremental_vacuum(alias=DEFAULT_DB_ALIAS):
+    """Switch the database to auto_vacuum=INCREMENTAL; rewrites the whole file, so run it off-peak"""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        cursor.execute('VACUUM')
+        return _pragma(cursor, 'auto_vacuum') == AUTO_VACUUM_INCREMENTAL
@@ -0,0 +1,78 @@
+"""
+Primary/replica routing (DATABASE_ROUTERS).
+
+Writes always go to 'default'. Reads go to a random replica, but only for
+web requests that ReplicaPinningMiddleware has marked as replica-safe:
+
+- GET/HEAD requests of clients that have not written in the last
+  DATABASE_REPLICA_PIN_SECONDS (tracked with a cookie set on the response
+  of any request that wrote, so a user reads their own writes);
+- outside any transaction on the primary;
+- never for sessions, users and SecuritySettings (PRIMARY_ONLY): a session
+  missing on a lagging replica would log the user out, and login lockout
+  state must be current.
+
+A request sticks to one randomly chosen replica. Everything else (POSTs,
+management commands, job workers, the shell) reads from the primary, so
+code that reads and then writes never acts on replica lag.
+"""
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# Per-request routing state, set by ReplicaPinningMiddleware: {'replica_reads', 'wrote', 'replica'}
+_request_state = ContextVar('db_request_state', default=None)
+
+PIN_COOKIE = 'db_pin'
+
+# Read from the primary whatever the request: whole apps, or 'app_label.model'
+PRIMARY_ONLY = {'sessions', 'auth', 'base.securitysettings'}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def begin_request(replica_reads):
+    return _request_state.set({'replica_reads': replica_reads, 'wrote': False})
+
+
+def end_request(token):
+    """Forget the request's routing state; returns True if the request wrote to the primary"""
+    state = _request_state.get()
+    _request_state.reset(token)
+    return bool(state and state['wrote'])
+
+
+class PrimaryReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        opts = model._meta
+        if opts.app_label in PRIMARY_ONLY or opts.label_lower in PRIMARY_ONLY:
+            return DEFAULT_DB_ALIAS
+        state = _request_state.get()
+        if not self.replicas or not state or not state['replica_reads'] or state['wrote']:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        # One replica per request, so its reads see a single point in time
+        if 'replica' not in state:
+            state['replica'] = random.choice(self.replicas)
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication (or sync_replicas locally)
+        return db == DEFAULT_DB_ALIAS
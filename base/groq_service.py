@@ -1,70 +1,214 @@
 import os
 import json
+import logging
+import math
 import random
+import asyncio
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from groq import Groq
+from asgiref.sync import sync_to_async
+from groq import Groq, AsyncGroq, APITimeoutError
 from django.conf import settings
+from django.db import DatabaseError
 from .models import Product, MarketTrend, ProductCategory
+from .llm_cache import LLMResponseCache, make_key, require_text
+from .resilience import CircuitBreaker, CircuitOpen, DeadlineExceeded, call_timeout
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PRICE_LABELS = ('best_price', 'good_price', 'fair_price', 'high_price')
+
+MARKET_INSIGHTS_UNAVAILABLE = "Market insights currently unavailable. Please check back later."
+RECOMMENDATIONS_UNAVAILABLE = "Personalized recommendations currently unavailable."
+
+# System prompt and completion options for every GroqAIService call
+CHAT_METHODS = {
+    'price_recommendation': (
+        """You are an agricultural market expert specializing in price optimization for fresh produce in Kenya. 
+                        Analyze market data and provide intelligent price recommendations considering quality, location, seasonality, and demand.""",
+        {'temperature': 0.3, 'max_tokens': 500},
+    ),
+    'price_recommendations_batch': (
+        """You are an agricultural market expert specializing in price optimization for fresh produce in Kenya. 
+                        Analyze market data and provide intelligent price recommendations considering quality, location, seasonality, and demand.
+                        You price several products at once and answer with JSON only.""",
+        {'temperature': 0.3, 'response_format': {"type": "json_object"}},
+    ),
+    'negotiation_strategy': (
+        "You are an expert agricultural negotiator helping farmers get fair prices while maintaining good buyer relationships.",
+        {'temperature': 0.4, 'response_format': {"type": "json_object"}},
+    ),
+    'market_insights': (
+        "You are an agricultural market analyst providing insights for Kenyan farmers and buyers.",
+        {'temperature': 0.3, 'max_tokens': 800},
+    ),
+    'personalized_recommendations': (
+        "You are a personalized agricultural shopping assistant for Kenyan farmers and buyers.",
+        {'temperature': 0.4, 'max_tokens': 600},
+    ),
+}
+
+@contextmanager
+def observe_call(method):
+    """Record latency and errors of one Groq call in the metrics"""
+    started = time.perf_counter()
+    try:
+        yield
+    except CircuitOpen:
+        metrics.GROQ_ERRORS.labels(method, 'circuit_open').inc()
+        raise
+    except DeadlineExceeded:
+        metrics.GROQ_ERRORS.labels(method, 'deadline').inc()
+        raise
+    except (APITimeoutError, TimeoutError):
+        metrics.GROQ_ERRORS.labels(method, 'timeout').inc()
+        metrics.GROQ_LATENCY.labels(method).observe(time.perf_counter() - started)
+        raise
+    except Exception:
+        metrics.GROQ_ERRORS.labels(method, 'error').inc()
+        metrics.GROQ_LATENCY.labels(method).observe(time.perf_counter() - started)
+        raise
+    metrics.GROQ_LATENCY.labels(method).observe(time.perf_counter() - started)
+
+# Shared by the sync and async services: both talk to the same upstream
+groq_breaker = CircuitBreaker('groq', **settings.GROQ_CIRCUIT_BREAKER)
 
 class GroqAIService:
-    def __init__(self):
+    def __init__(self, breaker=None):
         # Initialize Groq client - you'll need to set GROQ_API_KEY in your environment
-        self.client = Groq(api_key=os.environ.get('GROQ_API_KEY', 'your-groq-api-key-here'))
+        self.client = Groq(
+            api_key=os.environ.get('GROQ_API_KEY', 'your-groq-api-key-here'),
+            base_url=settings.GROQ_BASE_URL,
+            max_retries=settings.GROQ_MAX_RETRIES
+        )
         self.model = "llama3-8b-8192"  # You can use other models like "mixtral-8x7b-32768"
+        self.cache = LLMResponseCache()
+        self.breaker = breaker or groq_breaker
+
+    def _chat_request(self, method, user_prompt):
+        """Cache key and create() arguments for a chat completion"""
+        system_prompt, options = CHAT_METHODS[method]
+        key = make_key(self.model, system_prompt, user_prompt, **options)
+        kwargs = dict(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            model=self.model,
+            **options
+        )
+        return key, kwargs
+
+    def _timeout(self, method):
+        """The method's timeout, capped by the request's remaining latency budget"""
+        timeouts = settings.GROQ_TIMEOUTS
+        return call_timeout(timeouts.get(method, timeouts['default']))
+
+    def _chat(self, method, user_prompt, parse=require_text):
+        """
+        Run a chat completion through the persistent response cache and
+        return ``parse(content)``.
+
+        Identical (model, prompts, temperature, options) calls are answered
+        from the cache until the method's TTL expires; only completions that
+        ``parse`` accepts are stored. Cache misses go out through the circuit
+        breaker with a bounded timeout; CircuitOpen, DeadlineExceeded and
+        parse errors send the caller straight to its fallback.
+        """
+        key, kwargs = self._chat_request(method, user_prompt)
+
+        def call():
+            with observe_call(method):
+                timeout = self._timeout(method)
+                with self.breaker.guard():
+                    response = self.client.chat.completions.create(timeout=timeout, **kwargs)
+            return response.choices[0].message.content
+
+        return self.cache.get_or_call(method, key, call, parse)
+
+    def _fallback(self, method, label, error):
+        logger.warning("%s: %s", label, error)
+        metrics.GROQ_FALLBACKS.labels(method).inc()
 
     def get_price_recommendation(self, product, market_context=None):
         """
         Get AI-powered price recommendation using Groq
         """
         try:
-            # Prepare product context
-            product_context = {
-                'name': product.name,
-                'category': product.category.name,
-                'current_price': float(product.price),
-                'quality_grade': product.quality_grade,
-                'location': product.location,
-                'harvest_date': product.harvest_date.isoformat(),
-                'quantity': float(product.quantity),
-                'unit': product.unit
-            }
-            
-            # Get market trends if available
-            if not market_context:
-                market_context = self.get_market_context(product.category)
-            
-            prompt = self._create_price_recommendation_prompt(product_context, market_context)
-            
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an agricultural market expert specializing in price optimization for fresh produce in Kenya. 
-                        Analyze market data and provide intelligent price recommendations considering quality, location, seasonality, and demand."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.3,
-                max_tokens=500
+            product_context, prompt = self._price_recommendation_prompt(product, market_context)
+            return self._chat(
+                'price_recommendation', prompt,
+                lambda content: self._parse_price_recommendation(content, product_context)
             )
             
-            return self._parse_price_recommendation(response.choices[0].message.content, product_context)
-            
         except Exception as e:
             # Fallback to basic algorithm if Groq fails
-            print(f"Groq API error: {e}")
+            self._fallback('price_recommendation', "Groq API error", e)
             return self._fallback_price_calculation(product)
 
+    def _price_recommendation_prompt(self, product, market_context=None):
+        product_context = self._product_context(product)
+        
+        # Get market trends if available
+        if not market_context:
+            market_context = self.get_market_context(product.category)
+        
+        return product_context, self._create_price_recommendation_prompt(product_context, market_context)
+
+    def get_price_recommendations(self, products, batch_size=None):
+        """
+        Price recommendations for many products in a handful of calls.
+
+        Products sharing a category (and so a market context) are priced
+        together, ``batch_size`` per prompt. Returns one result per product,
+        in input order; items the model skips or garbles fall back to the
+        basic calculation.
+        """
+        products = list(products)
+        results = {}
+        for batch, product_contexts, prompt in self._price_recommendation_batches(products, batch_size):
+            try:
+                recommendations = self._chat(
+                    'price_recommendations_batch', prompt,
+                    lambda content: self._parse_price_recommendations(content, product_contexts)
+                )
+            except Exception as e:
+                logger.warning("Groq batch pricing error: %s", e)
+                recommendations = {}
+            results.update(self._with_fallbacks(recommendations, batch))
+        return [results[product.id] for product in products]
+
+    def _price_recommendation_batches(self, products, batch_size=None):
+        """Yield (products, product contexts, prompt) per batch of same-category products"""
+        batch_size = batch_size or settings.GROQ_PRICE_BATCH_SIZE
+        by_category = {}
+        for product in products:
+            by_category.setdefault(product.category_id, []).append(product)
+
+        for category_products in by_category.values():
+            market_context = self.get_market_context(category_products[0].category)
+            for start in range(0, len(category_products), batch_size):
+                batch = category_products[start:start + batch_size]
+                product_contexts = [self._product_context(product) for product in batch]
+                yield batch, product_contexts, self._create_batch_price_prompt(product_contexts, market_context)
+
     def get_negotiation_strategy(self, product, buyer_profile, initial_offer):
         """
         Get AI-powered negotiation strategy
         """
         try:
-            prompt = f"""
+            prompt = self._negotiation_prompt(product, buyer_profile, initial_offer)
+            return self._chat('negotiation_strategy', prompt, self._parse_json_object)
+            
+        except Exception as e:
+            self._fallback('negotiation_strategy', "Groq negotiation error", e)
+            return self._fallback_negotiation_strategy(product, initial_offer)
+
+    def _negotiation_prompt(self, product, buyer_profile, initial_offer):
+        return f"""
             Product: {product.name}
             Category: {product.category.name}
             Current Price: KES {product.price}
@@ -82,37 +226,22 @@ class GroqAIService:
             
             Respond in JSON format with: counter_offer, strategy_points, value_propositions, compromise_points
             """
-            
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert agricultural negotiator helping farmers get fair prices while maintaining good buyer relationships."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.4,
-                response_format={"type": "json_object"}
-            )
-            
-            return json.loads(response.choices[0].message.content)
-            
-        except Exception as e:
-            print(f"Groq negotiation error: {e}")
-            return self._fallback_negotiation_strategy(product, initial_offer)
 
     def get_market_insights(self, category=None):
         """
         Get AI-powered market insights and recommendations
         """
         try:
-            market_data = self.get_market_context(category)
+            return self._chat('market_insights', self._market_insights_prompt(category))
             
-            prompt = f"""
+        except Exception as e:
+            self._fallback('market_insights', "Groq market insights error", e)
+            return MARKET_INSIGHTS_UNAVAILABLE
+
+    def _market_insights_prompt(self, category=None):
+        market_data = self.get_market_context(category)
+        
+        return f"""
             Current Market Data:
             {json.dumps(market_data, indent=2)}
             
@@ -124,42 +253,28 @@ class GroqAIService:
             
             Respond in a structured format suitable for farmers and buyers.
             """
-            
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an agricultural market analyst providing insights for Kenyan farmers and buyers."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.3,
-                max_tokens=800
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            print(f"Groq market insights error: {e}")
-            return "Market insights currently unavailable. Please check back later."
 
     def get_personalized_recommendations(self, user, search_history, wishlist):
         """
         Get personalized product recommendations
         """
         try:
-            user_context = {
-                'user_type': user.profile.user_type if hasattr(user, 'profile') else 'buyer',
-                'location': user.profile.location if hasattr(user, 'profile') else 'Nairobi',
-                'recent_searches': [sh.query for sh in search_history],
-                'wishlist_items': [item.product.name for item in wishlist]
-            }
+            prompt = self._personalized_recommendations_prompt(user, search_history, wishlist)
+            return self._chat('personalized_recommendations', prompt)
             
-            prompt = f"""
+        except Exception as e:
+            self._fallback('personalized_recommendations', "Groq recommendations error", e)
+            return RECOMMENDATIONS_UNAVAILABLE
+
+    def _personalized_recommendations_prompt(self, user, search_history, wishlist):
+        user_context = {
+            'user_type': user.profile.user_type if hasattr(user, 'profile') else 'buyer',
+            'location': user.profile.location if hasattr(user, 'profile') else 'Nairobi',
+            'recent_searches': [sh.query for sh in search_history],
+            'wishlist_items': [item.product.name for item in wishlist]
+        }
+        
+        return f"""
             User Profile:
             {json.dumps(user_context, indent=2)}
             
@@ -171,28 +286,19 @@ class GroqAIService:
             
             Provide specific, actionable recommendations.
             """
-            
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a personalized agricultural shopping assistant for Kenyan farmers and buyers."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.4,
-                max_tokens=600
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            print(f"Groq recommendations error: {e}")
-            return "Personalized recommendations currently unavailable."
+
+    def _product_context(self, product):
+        return {
+            'id': product.id,
+            'name': product.name,
+            'category': product.category.name,
+            'current_price': float(product.price),
+            'quality_grade': product.quality_grade,
+            'location': product.location,
+            'harvest_date': product.harvest_date.isoformat(),
+            'quantity': float(product.quantity),
+            'unit': product.unit
+        }
 
     def _create_price_recommendation_prompt(self, product_context, market_context):
         return f"""
@@ -223,20 +329,110 @@ class GroqAIService:
         Respond in JSON format with: suggested_price, confidence_score, price_label, factors, explanation
         """
 
-    def _parse_price_recommendation(self, response_text, product_context):
+    def _create_batch_price_prompt(self, product_contexts, market_context):
+        products = [
+            {key: context[key] for key in (
+                'id', 'name', 'current_price', 'quality_grade', 'location', 'harvest_date', 'quantity', 'unit'
+            )}
+            for context in product_contexts
+        ]
+        return f"""
+        Analyze these {len(products)} agricultural products and provide price optimization advice for each.
+
+        CATEGORY: {product_contexts[0]['category']}
+
+        MARKET CONTEXT:
+        - Average Market Price: KES {market_context.get('average_price', 'N/A')}
+        - Price Trend: {market_context.get('price_trend', 'stable')}
+        - Demand Level: {market_context.get('demand_level', 'medium')}
+        - Season: {self._get_current_season()}
+
+        PRODUCTS (JSON):
+        {json.dumps(products)}
+
+        For every product provide:
+        1. Recommended optimal price (KES)
+        2. Price confidence score (0-1)
+        3. Price label (best_price, good_price, fair_price, high_price)
+        4. Key factors influencing this recommendation
+        5. Brief explanation
+
+        Respond with a JSON object {{"recommendations": [...]}} holding one entry per product, each with:
+        id (the product id given above), suggested_price, confidence_score, price_label, factors, explanation
+        """
+
+    def _parse_price_recommendations(self, response_text, product_contexts):
+        """
+        {product_id: recommendation} for the valid entries of a batch response.
+
+        Raises ValueError when the response is not JSON or holds no usable
+        entry at all; products the model skipped or garbled are left out.
+        """
+        data = json.loads(response_text)
+        if isinstance(data, dict):
+            data = data.get('recommendations', [])
+        if not isinstance(data, list):
+            raise ValueError('Batch response holds no recommendations list')
+        entries = {str(entry['id']): entry for entry in data if isinstance(entry, dict) and 'id' in entry}
+
+        recommendations = {}
+        for product_context in product_contexts:
+            recommendation = self._validate_price_entry(entries.get(str(product_context['id'])), product_context)
+            if recommendation is not None:
+                recommendations[product_context['id']] = recommendation
+        if not recommendations:
+            raise ValueError('Batch response holds no valid recommendation')
+        return recommendations
+
+    def _with_fallbacks(self, recommendations, products):
+        """Fill in the basic calculation for products without a recommendation"""
+        results = {}
+        for product in products:
+            recommendation = recommendations.get(product.id)
+            if recommendation is None:
+                metrics.GROQ_FALLBACKS.labels('price_recommendations_batch').inc()
+                recommendation = self._fallback_price_calculation(product)
+            results[product.id] = recommendation
+        return results
+
+    def _validate_price_entry(self, entry, product_context):
+        """A well-formed recommendation dict from one batch entry, or None"""
+        if not entry:
+            return None
         try:
-            # Try to parse JSON response
-            data = json.loads(response_text)
-            return {
-                'suggested_price': float(data.get('suggested_price', product_context['current_price'])),
-                'confidence_score': float(data.get('confidence_score', 0.7)),
-                'price_label': data.get('price_label', 'fair_price'),
-                'factors_considered': data.get('factors', {}),
-                'explanation': data.get('explanation', 'AI price recommendation')
-            }
-        except:
-            # Fallback if JSON parsing fails
-            return self._fallback_price_calculation_from_context(product_context)
+            suggested_price = float(entry['suggested_price'])
+            confidence_score = float(entry.get('confidence_score', 0.7))
+        except (KeyError, TypeError, ValueError):
+            return None
+        # Reject non-positive prices and wild answers (over 10x either way)
+        current_price = product_context['current_price']
+        if not math.isfinite(suggested_price) or suggested_price <= 0:
+            return None
+        if current_price and not 0.1 <= suggested_price / current_price <= 10:
+            return None
+        price_label = entry.get('price_label')
+        factors = entry.get('factors', {})
+        return {
+            'suggested_price': round(suggested_price, 2),
+            'confidence_score': min(max(confidence_score, 0.0), 1.0),
+            'price_label': price_label if price_label in PRICE_LABELS else 'fair_price',
+            'factors_considered': factors if isinstance(factors, (dict, list)) else {},
+            'explanation': str(entry.get('explanation') or 'AI price recommendation')
+        }
+
+    def _parse_price_recommendation(self, response_text, product_context):
+        """A validated recommendation from a single-product response; raises ValueError if unusable"""
+        data = json.loads(response_text)
+        recommendation = self._validate_price_entry(data if isinstance(data, dict) else None, product_context)
+        if recommendation is None:
+            raise ValueError('Unusable price recommendation')
+        return recommendation
+
+    def _parse_json_object(self, response_text):
+        data = json.loads(response_text)
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        return data
 
     def get_market_context(self, category):
         """Get current market context for a category"""
@@ -251,14 +447,16 @@ class GroqAIService:
                         'recommendation': trend.recommendation
                     }
             
-            # Default market context
+            # Default market context; kept fixed so identical prompts can be
+            # answered from the response cache
             return {
-                'average_price': random.uniform(50, 500),
-                'price_trend': random.choice(['increasing', 'decreasing', 'stable']),
-                'demand_level': random.choice(['high', 'medium', 'low']),
+                'average_price': 150,
+                'price_trend': 'stable',
+                'demand_level': 'medium',
                 'recommendation': 'Monitor market trends for optimal pricing'
             }
-        except:
+        except DatabaseError as e:
+            logger.warning("Market context unavailable: %s", e)
             return {
                 'average_price': 150,
                 'price_trend': 'stable',
@@ -304,13 +502,6 @@ class GroqAIService:
             'explanation': 'Basic price calculation applied'
         }
 
-    def _fallback_price_calculation_from_context(self, product_context):
-        """Fallback using product context"""
-        return self._fallback_price_calculation(type('MockProduct', (), {
-            'price': product_context['current_price'],
-            'quality_grade': product_context['quality_grade']
-        })())
-
     def _fallback_negotiation_strategy(self, product, initial_offer):
         """Fallback negotiation strategy"""
         current_price = float(product.price)
@@ -340,5 +531,136 @@ class GroqAIService:
             ]
         }
 
-# Global instance
-groq_ai = GroqAIService()
\ No newline at end of file
+
+class AsyncGroqAIService(GroqAIService):
+    """
+    GroqAIService on top of AsyncGroq, for ASGI views.
+
+    Every method is a coroutine with the same fallbacks as the sync service,
+    and the gather_* methods fan out over many categories or products at
+    once. In-flight API calls are capped per event loop by
+    ``settings.GROQ_MAX_CONCURRENCY``.
+    """
+
+    def __init__(self, max_concurrency=None, breaker=None):
+        super().__init__(breaker)
+        self.max_concurrency = max_concurrency or settings.GROQ_MAX_CONCURRENCY
+        # AsyncGroq clients and semaphores are bound to the loop they run on
+        self._loop_state = weakref.WeakKeyDictionary()
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = (
+                AsyncGroq(
+                    api_key=os.environ.get('GROQ_API_KEY', 'your-groq-api-key-here'),
+                    base_url=settings.GROQ_BASE_URL,
+                    max_retries=settings.GROQ_MAX_RETRIES
+                ),
+                asyncio.Semaphore(self.max_concurrency),
+            )
+            self._loop_state[loop] = state
+        return state
+
+    async def _achat(self, method, user_prompt, parse=require_text):
+        """Async _chat: cache lookups run in a thread, API calls on the loop"""
+        key, kwargs = self._chat_request(method, user_prompt)
+        cached = await sync_to_async(self.cache.get, thread_sensitive=False)(method, key)
+        if cached is not None:
+            try:
+                return parse(cached)
+            except (ValueError, KeyError, TypeError):
+                pass
+
+        client, semaphore = self._async_state()
+        async with semaphore:
+            with observe_call(method):
+                # Waiting for a slot counts against the budget too
+                timeout = self._timeout(method)
+                with self.breaker.guard():
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(timeout=timeout, **kwargs), timeout
+                    )
+        content = response.choices[0].message.content
+        result = parse(content)
+        await sync_to_async(self.cache.set, thread_sensitive=False)(method, key, content)
+        return result
+
+    async def aget_price_recommendation(self, product, market_context=None):
+        try:
+            product_context, prompt = await sync_to_async(self._price_recommendation_prompt)(product, market_context)
+            return await self._achat(
+                'price_recommendation', prompt,
+                lambda content: self._parse_price_recommendation(content, product_context)
+            )
+
+        except Exception as e:
+            self._fallback('price_recommendation', "Groq API error", e)
+            return self._fallback_price_calculation(product)
+
+    async def aget_negotiation_strategy(self, product, buyer_profile, initial_offer):
+        try:
+            prompt = await sync_to_async(self._negotiation_prompt)(product, buyer_profile, initial_offer)
+            return await self._achat('negotiation_strategy', prompt, self._parse_json_object)
+
+        except Exception as e:
+            self._fallback('negotiation_strategy', "Groq negotiation error", e)
+            return self._fallback_negotiation_strategy(product, initial_offer)
+
+    async def aget_market_insights(self, category=None):
+        try:
+            prompt = await sync_to_async(self._market_insights_prompt)(category)
+            return await self._achat('market_insights', prompt)
+
+        except Exception as e:
+            self._fallback('market_insights', "Groq market insights error", e)
+            return MARKET_INSIGHTS_UNAVAILABLE
+
+    async def aget_personalized_recommendations(self, user, search_history, wishlist):
+        try:
+            prompt = await sync_to_async(self._personalized_recommendations_prompt)(user, search_history, wishlist)
+            return await self._achat('personalized_recommendations', prompt)
+
+        except Exception as e:
+            self._fallback('personalized_recommendations', "Groq recommendations error", e)
+            return RECOMMENDATIONS_UNAVAILABLE
+
+    async def gather_market_insights(self, categories=None):
+        """
+        Market insights for several categories concurrently, keyed by
+        category name. Defaults to every ProductCategory.
+        """
+        if categories is None:
+            categories = await sync_to_async(list)(ProductCategory.objects.order_by('name'))
+        categories = list(categories)
+        results = await asyncio.gather(*(self.aget_market_insights(c) for c in categories))
+        return {category.name: insight for category, insight in zip(categories, results)}
+
+    async def gather_price_recommendations(self, products, batch_size=None):
+        """
+        Batched price recommendations (see get_price_recommendations) with
+        the batches sent concurrently. Results are in input order.
+        """
+        products = await sync_to_async(list)(products)
+        batches = await sync_to_async(list)(self._price_recommendation_batches(products, batch_size))
+
+        async def price_batch(batch, product_contexts, prompt):
+            try:
+                recommendations = await self._achat(
+                    'price_recommendations_batch', prompt,
+                    lambda content: self._parse_price_recommendations(content, product_contexts)
+                )
+            except Exception as e:
+                logger.warning("Groq batch pricing error: %s", e)
+                recommendations = {}
+            return self._with_fallbacks(recommendations, batch)
+
+        results = {}
+        for batch_results in await asyncio.gather(*(price_batch(*batch) for batch in batches)):
+            results.update(batch_results)
+        return [results[product.id] for product in products]
+
+# Global instances
+groq_ai = GroqAIService()
+async_groq_ai = AsyncGroqAIService()
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+A local stand-in for the Groq chat-completions API, for offline benchmarks.
+
+It speaks enough of the OpenAI-style protocol for the ``groq`` client
+(POST /openai/v1/chat/completions), recognises each GroqAIService method by
+its system prompt and answers with deterministic content. Latency, error
+responses and malformed output are injected according to a StubConfig.
+Start it with ``manage.py groq_stub`` and set GROQ_BASE_URL to its address.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .groq_service import CHAT_METHODS
+
+COMPLETIONS_PATH = '/openai/v1/chat/completions'
+
+# System prompt -> GroqAIService method name
+METHODS_BY_PROMPT = {system_prompt: method for method, (system_prompt, _) in CHAT_METHODS.items()}
+
+
+@dataclass
+class StubConfig:
+    # 'fixed:S', 'uniform:LOW,HIGH' or 'lognormal:MEDIAN,SIGMA', in seconds
+    latency: str = 'fixed:0'
+    error_rate: float = 0.0
+    error_status: int = 503
+    malformed_rate: float = 0.0
+    seed: int = 0
+
+
+def parse_latency(spec):
+    """Turn a latency spec into a function of a Random instance returning seconds"""
+    kind, _, args = spec.partition(':')
+    try:
+        values = [float(v) for v in args.split(',')] if args else []
+        if kind == 'fixed' and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == 'uniform' and len(values) == 2:
+            return lambda rng: rng.uniform(*values)
+        if kind == 'lognormal' and len(values) == 2:
+            median, sigma = values
+            return lambda rng: median * rng.lognormvariate(0, sigma)
+    except ValueError:
+        pass
+    raise ValueError(f'Invalid latency spec {spec!r}; use fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA')
+
+
+def _number_after(label, text, default):
+    match = re.search(re.escape(label) + r'\s*([0-9]+(?:\.[0-9]+)?)', text)
+    return float(match.group(1)) if match else default
+
+
+def _price_entry(rng, current_price):
+    factor = rng.uniform(0.9, 1.2)
+    return {
+        'suggested_price': round(current_price * factor, 2),
+        'confidence_score': round(rng.uniform(0.6, 0.95), 2),
+        'price_label': rng.choice(['best_price', 'good_price', 'fair_price', 'high_price']),
+        'factors': {'market_demand': rng.choice(['low', 'medium', 'high']), 'stub': True},
+        'explanation': 'Stub recommendation based on current price and market context',
+    }
+
+
+def _batch_products(prompt):
+    match = re.search(r'PRODUCTS \(JSON\):\s*(\[.*?\])\s*\n', prompt, re.S)
+    try:
+        return json.loads(match.group(1)) if match else []
+    except ValueError:
+        return []
+
+
+def build_content(method, prompt, rng):
+    """Deterministic reply for one GroqAIService method"""
+    if method == 'price_recommendation':
+        return json.dumps(_price_entry(rng, _number_after('Current Price: KES', prompt, 100.0)))
+
+    if method == 'price_recommendations_batch':
+        return json.dumps({'recommendations': [
+            dict(_price_entry(rng, float(product.get('current_price') or 100.0)), id=product.get('id'))
+            for product in _batch_products(prompt)
+        ]})
+
+    if method == 'negotiation_strategy':
+        price = _number_after('Current Price: KES', prompt, 100.0)
+        offer = _number_after('Buyer Offer: KES', prompt, price * 0.8)
+        return json.dumps({
+            'counter_offer': round((price + offer) / 2, 2),
+            'strategy_points': ['Emphasize freshness', 'Offer delivery flexibility'],
+            'value_propositions': ['Direct from farm', 'Graded quality'],
+            'compromise_points': ['Bulk discount', 'Split transport cost'],
+        })
+
+    if method == 'market_insights':
+        trend = rng.choice(['rising', 'stable', 'softening'])
+        return (
+            f"1. Market analysis: prices are {trend} across local markets.\n"
+            "2. Next week: expect movement within 5% of current averages.\n"
+            "3. Recommendation: sell graded produce early in the week; buyers should compare counties.\n"
+            "4. Key factors: rainfall, transport costs and school-term demand."
+        )
+
+    if method == 'personalized_recommendations':
+        return (
+            "1. Products: seasonal vegetables near your location.\n"
+            "2. Timing: buy mid-week when supply peaks.\n"
+            "3. Price alerts: set alerts 10% below current averages.\n"
+            "4. Opportunity: bulk orders with neighbouring buyers."
+        )
+
+    return 'Stub response.'
+
+
+def malformed(content, rng):
+    """A broken version of ``content``: truncated JSON, prose around it, or empty"""
+    return rng.choice([
+        content[:max(1, len(content) // 2)],
+        f'Sure! Here is the analysis you asked for:\n{content}\nLet me know if you need more.',
+        '',
+    ])
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.latency = parse_latency(config.latency)
+        self.seen = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def rng_for(self, body):
+        """
+        Random source for one request: a function of the seed, the request
+        body and how often that body was seen, so runs are reproducible
+        regardless of how concurrent requests interleave.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            occurrence = self.seen.get(digest, 0)
+            self.seen[digest] = occurrence + 1
+            self.requests += 1
+        return random.Random(f'{self.config.seed}:{digest}:{occurrence}')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'GroqStub/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.split('?')[0] != COMPLETIONS_PATH:
+            self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            request = json.loads(body)
+            messages = request['messages']
+        except (ValueError, KeyError):
+            self._send_json(400, {'error': {'message': 'Invalid request body', 'type': 'invalid_request_error'}})
+            return
+
+        server = self.server
+        rng = server.rng_for(body)
+        time.sleep(max(0.0, server.latency(rng)))
+
+        if rng.random() < server.config.error_rate:
+            self._send_json(server.config.error_status, {
+                'error': {'message': 'Injected upstream failure', 'type': 'internal_server_error'}
+            })
+            return
+
+        system_prompt = next((m['content'] for m in messages if m.get('role') == 'system'), '')
+        user_prompt = next((m['content'] for m in messages if m.get('role') == 'user'), '')
+        content = build_content(METHODS_BY_PROMPT.get(system_prompt), user_prompt, rng)
+        if rng.random() < server.config.malformed_rate:
+            content = malformed(content, rng)
+
+        prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        self._send_json(200, {
+            'id': f'chatcmpl-stub-{server.requests}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+
+def run_stub(host='127.0.0.1', port=8765, config=None):
+    """Create a StubServer bound to host:port (port 0 picks a free one); call serve_forever() on it"""
+    return StubServer((host, port), config or StubConfig())
@@ -0,0 +1,130 @@
+"""
+Product image processing, run by the process_product_image job after upload.
+
+The original is rotated upright and re-saved without EXIF (farm photos tend
+to carry GPS coordinates), capped at PRODUCT_IMAGES['max_original'] pixels.
+Card-sized crops are written next to it in WebP and progressive JPEG at
+every width in PRODUCT_IMAGES['widths']. Product.image_variants records them
+together with the original they were made from, so a replaced image never
+shows another image's variants. Every file written here carries a hash of
+its content in its name, so base/media.py can serve it as immutable.
+"""
+import hashlib
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from .models import Product
+from .page_cache import bump_catalog_version
+
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+
+def _encode(image, format):
+    config = settings.PRODUCT_IMAGES
+    buffer = BytesIO()
+    if format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=config['webp_quality'], method=4)
+    elif format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=config['jpeg_quality'], optimize=True, progressive=True)
+    else:
+        image.save(buffer, format, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def _flatten(image):
+    """RGB, with any transparency composited onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def hashed_name(name, content):
+    """``name`` with a hash of ``content`` before the extension, e.g. farm.3f2a9c81d0b4.jpg"""
+    stem, extension = os.path.splitext(name)
+    digest = hashlib.md5(content.read()).hexdigest()[:12]
+    content.seek(0)
+    return f'{stem}.{digest}{extension}'
+
+
+def _save_original(field, image, format):
+    """Save the upright, metadata-free original under a content-hashed name; returns (name, size)"""
+    limit = settings.PRODUCT_IMAGES['max_original']
+    image = image.copy()
+    image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+    if format not in ('JPEG', 'PNG', 'WEBP'):
+        format = 'JPEG'
+    if format == 'JPEG':
+        image = _flatten(image)
+    content = _encode(image, format)
+    stem = os.path.splitext(field.name)[0]
+    extension = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}[format]
+    return field.storage.save(hashed_name(stem + extension, content), content), image.size
+
+
+def variant_name(source, width, extension, content):
+    directory, filename = os.path.split(source)
+    # Drop the original's own hash; the variant gets one of its content
+    stem = os.path.splitext(filename)[0].rsplit('.', 1)[0]
+    return hashed_name(os.path.join(directory, 'variants', f'{stem}_{width}.{extension}'), content)
+
+
+def delete_variants(storage, variants):
+    for format in FORMATS:
+        for name in (variants or {}).get(format, {}).values():
+            storage.delete(name)
+
+
+def process_product_image(product_id):
+    """Strip, resize and create the card variants of a product's image; False if there was nothing to do"""
+    product = Product.objects.filter(pk=product_id).only('id', 'image', 'image_variants').first()
+    if product is None or not product.image:
+        return False
+    config = settings.PRODUCT_IMAGES
+    storage = product.image.storage
+    uploaded_name = product.image.name
+    if (product.image_variants or {}).get('source') == uploaded_name:
+        return False
+
+    with product.image.open('rb') as f:
+        image = Image.open(f)
+        image.load()
+        format = image.format
+    image = ImageOps.exif_transpose(image)
+    source, (width, height) = _save_original(product.image, image, format)
+
+    aspect_w, aspect_h = config['aspect']
+    card = _flatten(image)
+    variants = {'source': source, 'width': width, 'height': height}
+    for key, (format, extension) in FORMATS.items():
+        variants[key] = {}
+        for index, variant_width in enumerate(config['widths']):
+            # Never upscale, but always keep the smallest size
+            if index and variant_width > width:
+                break
+            size = (variant_width, round(variant_width * aspect_h / aspect_w))
+            thumbnail = ImageOps.fit(card, size, Image.Resampling.LANCZOS)
+            content = _encode(thumbnail, format)
+            name = storage.save(variant_name(source, variant_width, extension, content), content)
+            variants[key][str(variant_width)] = name
+
+    updated = Product.objects.filter(pk=product.pk, image=uploaded_name).update(
+        image=source, image_width=width, image_height=height, image_variants=variants,
+    )
+    if not updated:
+        # Replaced while we were working; its own job will process the new image
+        delete_variants(storage, variants)
+        storage.delete(source)
+        return False
+    delete_variants(storage, product.image_variants)
+    if source != uploaded_name:
+        storage.delete(uploaded_name)
+    bump_catalog_version()
+    return True
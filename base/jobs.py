@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# task name -> callable, filled by the @task decorator (see base/tasks.py)
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a background task; it receives the job payload as keyword arguments"""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def _dedupe_key(name, payload):
+    key = f"{name}:{json.dumps(payload, sort_keys=True, separators=(',', ':'))}"
+    if len(key) > 200:
+        # Truncating would make different long payloads collide
+        key = f"{name}:sha256:{hashlib.sha256(key.encode()).hexdigest()}"
+    return key
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=5, dedupe=True):
+    """
+    Queue ``name`` to run with ``payload`` (a JSON-serializable dict).
+
+    With ``dedupe`` an identical job that is still pending is reused instead
+    of queueing another one. Returns the Job.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Unknown task: {name}')
+    payload = payload or {}
+    key = _dedupe_key(name, payload) if dedupe else ''
+    if key:
+        existing = Job.objects.filter(dedupe_key=key, status='pending').first()
+        if existing:
+            return existing
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        dedupe_key=key,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_on_commit(name, payload=None, **kwargs):
+    """Queue a job once the surrounding transaction commits, so it never sees uncommitted rows"""
+    transaction.on_commit(lambda: enqueue(name, payload, **kwargs))
+
+
+def _claimable(now):
+    # Due pending jobs, plus running jobs whose worker let the lease expire
+    # and that have attempts left
+    return Job.objects.filter(
+        Q(status='pending', run_at__lte=now)
+        | Q(status='running', locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+
+
+def _bury_expired(now):
+    """
+    Mark jobs dead whose last allowed attempt lost its lease. A task that
+    keeps killing its worker never reaches run_job's failure handling, so
+    it would otherwise be re-leased forever.
+    """
+    buried = Job.objects.filter(
+        status='running', locked_until__lt=now, attempts__gte=F('max_attempts')
+    ).update(status='dead', last_error='Lease expired on the last attempt', locked_until=None, finished_at=now)
+    if buried:
+        logger.error("%d job(s) lost their lease on the last attempt and are dead", buried)
+    return buried
+
+
+def claim(worker, limit=1, lease_seconds=None):
+    """
+    Lease up to ``limit`` due jobs to ``worker``.
+
+    Candidates are locked with SKIP LOCKED where the database supports it;
+    each one is then taken with a conditional UPDATE, so two workers can
+    never hold the same job even without row locks (SQLite).
+    """
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        _bury_expired(now)
+        candidates = _claimable(now).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        for job in candidates[:limit]:
+            taken = Job.objects.filter(
+                id=job.id, status=job.status, locked_until=job.locked_until
+            ).update(
+                status='running',
+                locked_by=worker,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                attempts=job.attempts + 1,
+            )
+            if taken:
+                job.status = 'running'
+                job.locked_by = worker
+                job.attempts += 1
+                claimed.append(job)
+    return claimed
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given attempt number"""
+    delay = min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome.
+
+    Failures are retried with backoff until ``max_attempts`` is reached, after
+    which the job is parked as dead (the dead-letter state) for inspection.
+    Returns True on success.
+    """
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise KeyError(f'Unknown task: {job.task}')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        mine = Job.objects.filter(id=job.id, locked_by=job.locked_by)
+        if job.attempts >= job.max_attempts:
+            mine.update(status='dead', last_error=error, locked_until=None, finished_at=now)
+        else:
+            mine.update(
+                status='pending',
+                last_error=error,
+                locked_until=None,
+                run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+            )
+        logger.exception("Job %s failed (attempt %s of %s)", job, job.attempts, job.max_attempts)
+        return False
+
+    Job.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status='succeeded', locked_until=None, finished_at=timezone.now()
+    )
+    return True
+
+
+def retry_dead_jobs(queryset=None):
+    """Put dead jobs back on the queue with a fresh set of attempts"""
+    queryset = Job.objects.filter(status='dead') if queryset is None else queryset.filter(status='dead')
+    return queryset.update(status='pending', attempts=0, run_at=timezone.now(), finished_at=None)
+
+
+def prune_jobs(days=None):
+    """Delete succeeded jobs older than the retention period; dead jobs are kept"""
+    days = settings.JOB_RETENTION_DAYS if days is None else days
+    deleted, _ = Job.objects.filter(
+        status='succeeded', finished_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from django.conf import settings
+from . import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed_idx ON llm_cache (accessed_at);
+CREATE INDEX IF NOT EXISTS llm_cache_expires_idx ON llm_cache (expires_at);
+"""
+
+# Hits only refresh the LRU timestamp when it is older than this, so a hot
+# entry doesn't turn every read into a write
+TOUCH_INTERVAL = 60
+
+# After an eviction pass the cache is trimmed to this fraction of max_bytes
+EVICT_TARGET = 0.9
+
+
+def require_text(value):
+    """Default parser for get_or_call: any non-blank completion"""
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('Empty completion')
+    return value
+
+
+def make_key(model, system_prompt, user_prompt, temperature, **options):
+    """Content address of an LLM call"""
+    payload = json.dumps(
+        [model, system_prompt, user_prompt, temperature, options],
+        sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent LRU cache of LLM completions, stored in its own SQLite file.
+
+    The file is shared by every gunicorn worker on the host and survives
+    restarts. Entries expire after a per-method TTL, and the least recently
+    used ones are evicted once the stored bytes exceed ``max_bytes``.
+    """
+
+    def __init__(self, path=None, max_bytes=None, ttls=None):
+        self.path = str(path or settings.GROQ_CACHE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.GROQ_CACHE_MAX_BYTES
+        self.ttls = ttls if ttls is not None else settings.GROQ_CACHE_TTLS
+        self._local = threading.local()
+        self._pid = None
+
+    def _connection(self):
+        # One connection per thread, and never reuse one across a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._pid = os.getpid()
+        return conn
+
+    def ttl_for(self, method):
+        return self.ttls.get(method, self.ttls.get('default', 3600))
+
+    def get(self, method, key):
+        now = time.time()
+        try:
+            row = self._connection().execute(
+                'SELECT value, accessed_at FROM llm_cache WHERE key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        metrics.cache_lookup('llm', row is not None)
+        if row is None:
+            return None
+
+        value, accessed_at = row
+        if now - accessed_at > TOUCH_INTERVAL:
+            try:
+                self._connection().execute(
+                    'UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key)
+                )
+            except sqlite3.Error:
+                pass
+        return value
+
+    def set(self, method, key, value):
+        ttl = self.ttl_for(method)
+        if ttl <= 0:
+            return
+        now = time.time()
+        size = len(value.encode())
+        if size > self.max_bytes:
+            return
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache '
+                '(key, method, value, size, created_at, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, method, value, size, now, now + ttl, now)
+            )
+            self._evict(conn, now)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk entries from least recently used, until enough bytes are freed
+        excess = total - int(self.max_bytes * EVICT_TARGET)
+        freed = 0
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM llm_cache ORDER BY accessed_at'):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM llm_cache WHERE key = ?', victims)
+
+    def get_or_call(self, method, key, call, parse=require_text):
+        """
+        Return ``parse(value)`` for the cached value of ``key``, or for ``call()``.
+
+        ``parse`` raises (ValueError etc.) for unusable output. A completion is
+        only stored once it has parsed, so a malformed answer is asked again
+        next time instead of forcing fallbacks for the whole TTL.
+        """
+        value = self.get(method, key)
+        if value is not None:
+            try:
+                return parse(value)
+            except (ValueError, KeyError, TypeError):
+                pass
+        value = call()
+        result = parse(value)
+        self.set(method, key, value)
+        return result
+
+    def clear(self):
+        self._connection().execute('DELETE FROM llm_cache')
+
+    def stats(self):
+        """Size of the shared store, per method. Hit ratios are exported as metrics (agrilink_cache_requests_total)"""
+        conn = self._connection()
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+        methods = conn.execute(
+            'SELECT method, COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache GROUP BY method ORDER BY method'
+        ).fetchall()
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'methods': {method: {'entries': count, 'bytes': total} for method, count, total in methods},
+        }
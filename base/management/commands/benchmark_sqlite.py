@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from base.models import Product
+
+# Django's stock SQLite setup (rollback journal, DEFERRED transactions) vs SQLITE_OPTIONS
+PROFILES = {
+    'default': {},
+    'tuned': settings.SQLITE_OPTIONS,
+}
+
+
+def _use_database(path, options):
+    """Point this (forked) process's default connection at the benchmark copy"""
+    connection = connections['default']
+    connection.close()
+    connection.settings_dict = {**connection.settings_dict, 'NAME': path, 'OPTIONS': options}
+
+
+def _reader(product_ids, categories, deadline):
+    done = locked = 0
+    while time.perf_counter() < deadline:
+        try:
+            list(Product.objects.filter(category_id=random.choice(categories), is_available=True)
+                 .order_by('price').values('id', 'name', 'price')[:20])
+            Product.objects.filter(pk=random.choice(product_ids)).values('quantity').first()
+            done += 1
+        except OperationalError:
+            locked += 1
+    return done, locked, []
+
+
+def _writer(product_ids, categories, deadline):
+    done = locked = 0
+    latencies = []
+    while time.perf_counter() < deadline:
+        product_id = random.choice(product_ids)
+        started = time.perf_counter()
+        try:
+            # Read-then-write, as the order and stock paths do
+            with transaction.atomic():
+                row = Product.objects.filter(pk=product_id).values('quantity').first()
+                if row is not None:
+                    Product.objects.filter(pk=product_id).update(quantity=F('quantity') + 1)
+            latencies.append(time.perf_counter() - started)
+            done += 1
+        except OperationalError:
+            locked += 1
+    return done, locked, latencies
+
+
+def _worker(role, path, options, product_ids, categories, start, duration):
+    _use_database(path, options)
+    # Start all workers together so they actually contend
+    time.sleep(max(start - time.time(), 0))
+    deadline = time.perf_counter() + duration
+    try:
+        return (_reader if role == 'reader' else _writer)(product_ids, categories, deadline)
+    finally:
+        connections['default'].close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent read/write throughput and "database is locked" errors on copies of the '
+        'SQLite database, with Django\'s default settings and with SQLITE_OPTIONS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reader processes')
+        parser.add_argument('--writers', type=int, default=4, help='Writer processes')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per profile')
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('benchmark_sqlite only runs against SQLite')
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        categories = list(Product.objects.values_list('category_id', flat=True).distinct())
+        if not product_ids:
+            raise CommandError('No products to benchmark with; run seed_data first')
+
+        workdir = tempfile.mkdtemp(prefix='agrilink-sqlite-bench-')
+        try:
+            results = {}
+            for name, profile_options in PROFILES.items():
+                path = os.path.join(workdir, f'{name}.sqlite3')
+                self.copy_database(str(primary['NAME']), path, wal=bool(profile_options))
+                self.stdout.write(f'Benchmarking {name} profile...')
+                results[name] = self.run_profile(path, profile_options, product_ids, categories, options)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.print_report(results, options)
+
+    def copy_database(self, source_path, path, wal):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+            # The journal mode is stored in the file; start each profile from its own
+            target.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        finally:
+            target.close()
+            source.close()
+
+    def run_profile(self, path, profile_options, product_ids, categories, options):
+        roles = ['reader'] * options['readers'] + ['writer'] * options['writers']
+        start = time.time() + 1
+        # Forked children must not share the parent's open SQLite handles
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(len(roles)) as pool:
+            outcomes = pool.starmap(_worker, [
+                (role, path, profile_options, product_ids, categories, start, options['duration'])
+                for role in roles
+            ])
+
+        reads = sum(done for role, (done, _, _) in zip(roles, outcomes) if role == 'reader')
+        writes = sum(done for role, (done, _, _) in zip(roles, outcomes) if role == 'writer')
+        latencies = sorted(latency for _, _, worker_latencies in outcomes for latency in worker_latencies)
+        return {
+            'reads_per_s': round(reads / options['duration'], 1),
+            'writes_per_s': round(writes / options['duration'], 1),
+            'locked_errors': sum(locked for _, locked, _ in outcomes),
+            'write_p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            'write_p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+        }
+
+    def print_report(self, results, options):
+        self.stdout.write(
+            f"\n{options['readers']} readers, {options['writers']} writers, {options['duration']}s per profile"
+        )
+        self.stdout.write(f"{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'locked':>8}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<10}{row['reads_per_s']:>10}{row['writes_per_s']:>10}{row['locked_errors']:>8}"
+                f"{str(row['write_p50_ms']):>10}{str(row['write_p95_ms']):>10}"
+            )
@@ -0,0 +1,227 @@
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from base.ai_service import AgriAI
+from base.models import Product
+from base.management.commands.seed_data import SEED_PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main views (query count, SQL time, wall time, peak memory) '
+        'at one or more catalog sizes, seeding synthetic data as needed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,100000',
+                            help='Comma-separated seeded product counts to benchmark at')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per view')
+        parser.add_argument('--database', metavar='PATH',
+                            help='SQLite file to migrate, seed and benchmark (kept afterwards); '
+                                 'default: a temporary file, deleted afterwards')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Benchmark the data already in --database without seeding')
+        parser.add_argument('--warm', action='store_true', help='Keep the page cache between runs')
+        parser.add_argument('--output', help='Report path (default benchmarks/<timestamp>.json)')
+        parser.add_argument('--compare', help='Earlier report to print deltas against')
+
+    def handle(self, *args, **options):
+        if options['no_seed'] and not options['database']:
+            raise CommandError('--no-seed needs --database: the default temporary database is empty')
+        path = options['database']
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix='agrilink-bench-', suffix='.sqlite3')
+            os.close(handle)
+        try:
+            self.use_database(path)
+            self.benchmark(options)
+        finally:
+            connections.close_all()
+            if options['database'] is None:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+
+    def use_database(self, path):
+        """
+        Point every database alias (replicas included, since the views read
+        through the router) at the SQLite file ``path`` and migrate it, so
+        seeding never touches the configured database
+        """
+        connections.close_all()
+        for alias in connections:
+            connections.settings[alias].update(
+                ENGINE='django.db.backends.sqlite3', NAME=path, OPTIONS=settings.SQLITE_OPTIONS
+            )
+            # Recreated from the updated settings on next use
+            try:
+                del connections[alias]
+            except AttributeError:
+                pass  # never opened
+        self.stdout.write(f'Benchmark database: {path}')
+        call_command('migrate', interactive=False, verbosity=0)
+
+    def benchmark(self, options):
+        scales = [int(s) for s in options['scales'].split(',') if s.strip()]
+        if options['no_seed']:
+            scales = [Product.objects.count()]
+
+        setup_test_environment()
+        try:
+            results = []
+            for scale in scales:
+                if not options['no_seed']:
+                    self.stdout.write(f'Seeding to {scale} products...')
+                    call_command('seed_data', products=scale, stdout=open(os.devnull, 'w'))
+                results.append(self.run_scale(scale, options['repeat'], options['warm']))
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'git_commit': self.git_commit(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'warm_cache': options['warm'],
+            'scales': results,
+        }
+        path = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f"{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        self.print_report(report, baseline)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {path}'))
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def cases(self):
+        """(name, user or None, callable) for every benchmarked view"""
+        buyer = User.objects.filter(username__startswith=f'{SEED_PREFIX}buyer').order_by('id').first()
+        farmer = User.objects.filter(username__startswith=f'{SEED_PREFIX}farmer').order_by('id').first()
+        product = Product.objects.filter(is_available=True).order_by('-review_count', 'id').first()
+        if not (buyer and farmer and product):
+            raise CommandError('No seeded users or products found; run without --no-seed or run seed_data first')
+
+        marketplace = reverse('marketplace')
+
+        def get(url):
+            return lambda client: client.get(url)
+
+        return [
+            ('marketplace', None, get(marketplace)),
+            ('marketplace_price_low', None, get(f'{marketplace}?sort_by=price_low')),
+            ('marketplace_deep_page', None, get(f'{marketplace}?page=40')),
+            ('marketplace_search', None, get(f'{marketplace}?search={product.name.split()[0].lower()}')),
+            ('marketplace_logged_in', buyer, get(marketplace)),
+            ('product_detail', None, get(reverse('product_detail', args=[product.id]))),
+            ('buyer_dashboard', buyer, get(reverse('buyer_dashboard'))),
+            ('farmer_dashboard', farmer, get(reverse('farmer_dashboard'))),
+            ('recommend_products_for_user', buyer,
+             lambda client: list(AgriAI.recommend_products_for_user(buyer))),
+        ]
+
+    def measure(self, call, client, warm):
+        if not warm:
+            caches['pages'].clear()
+        reset_queries()
+        with ExitStack() as stack:
+            # Reads may be routed to a replica alias
+            captures = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            started = time.perf_counter()
+            response = call(client)
+            elapsed = time.perf_counter() - started
+        status = getattr(response, 'status_code', 200)
+        queries = [q for capture in captures for q in capture.captured_queries]
+        sql_time = sum(float(q.get('time') or 0) for q in queries)
+        return elapsed, len(queries), sql_time, status
+
+    def run_scale(self, scale, repeat, warm):
+        self.stdout.write(f'Benchmarking at {scale} products...')
+        views = {}
+        for name, user, call in self.cases():
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            try:
+                # One untimed run to load templates and code paths, and one
+                # traced run for peak memory
+                self.measure(call, client, warm)
+                tracemalloc.start()
+                self.measure(call, client, warm)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                runs = [self.measure(call, client, warm) for _ in range(repeat)]
+            except Exception as e:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                views[name] = {'error': f'{type(e).__name__}: {e}'}
+                self.stdout.write(self.style.WARNING(f'  {name}: {type(e).__name__}: {e}'))
+                continue
+
+            times = sorted(run[0] for run in runs)
+            views[name] = {
+                'status': runs[-1][3],
+                'queries': runs[-1][1],
+                'sql_ms': round(statistics.median(run[2] for run in runs) * 1000, 2),
+                'median_ms': round(statistics.median(times) * 1000, 2),
+                'max_ms': round(times[-1] * 1000, 2),
+                'peak_kb': round(peak / 1024, 1),
+            }
+        return {'products': Product.objects.count(), 'seeded_products': scale, 'views': views}
+
+    def print_report(self, report, baseline=None):
+        previous = {}
+        for scale in (baseline or {}).get('scales', []):
+            previous[scale['seeded_products']] = scale['views']
+
+        header = f"{'view':<30}{'status':>7}{'queries':>9}{'sql ms':>10}{'median ms':>11}{'max ms':>10}{'peak KB':>10}"
+        for scale in report['scales']:
+            self.stdout.write(f"\n{scale['products']} products")
+            self.stdout.write(header)
+            for name, row in scale['views'].items():
+                if 'error' in row:
+                    self.stdout.write(f"{name:<30}  {row['error']}")
+                    continue
+                line = (
+                    f"{name:<30}{row['status']:>7}{row['queries']:>9}{row['sql_ms']:>10}"
+                    f"{row['median_ms']:>11}{row['max_ms']:>10}{row['peak_kb']:>10}"
+                )
+                old = previous.get(scale['seeded_products'], {}).get(name)
+                if old and 'error' not in old:
+                    line += (
+                        f"   (queries {row['queries'] - old['queries']:+d}, "
+                        f"median {row['median_ms'] - old['median_ms']:+.1f} ms)"
+                    )
+                self.stdout.write(line)
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from base.recommender import rebuild_model
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item-item recommendation model from orders, wishlists and searches (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help='Neighbours kept per product')
+        parser.add_argument('--max-queries', type=int, default=2000, help='Distinct search terms resolved to products')
+        parser.add_argument('--output', default=None, help='Model path (default RECOMMENDER_MODEL_PATH)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path = options['output'] or settings.RECOMMENDER_MODEL_PATH
+        model = rebuild_model(path, top_k=options['top_k'], max_queries=options['max_queries'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Built model for {len(model.item_ids)} products ({model.similarity.nnz} neighbour links, '
+            f'{len(model.query_index)} search terms) in {time.perf_counter() - started:.1f}s; saved to {path}'
+        ))
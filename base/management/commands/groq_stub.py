@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.groq_stub import StubConfig, parse_latency, run_stub
+
+
+class Command(BaseCommand):
+    help = 'Serve a local Groq-compatible stub API with latency and fault injection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', default='fixed:0',
+                            help='fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA (seconds)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with an error')
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument('--malformed-rate', type=float, default=0.0,
+                            help='Fraction of successful replies with broken content')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            parse_latency(options['latency'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        config = StubConfig(
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            error_status=options['error_status'],
+            malformed_rate=options['malformed_rate'],
+            seed=options['seed'],
+        )
+        server = run_stub(options['host'], options['port'], config)
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f'Groq stub listening on http://{host}:{port}'))
+        self.stdout.write(f'Point the app at it with GROQ_BASE_URL=http://{host}:{port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Served {server.requests} requests.')
@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from base.llm_cache import LLMResponseCache
+
+
+class Command(BaseCommand):
+    help = 'Show statistics for, or clear, the persistent Groq response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Delete every cached response')
+
+    def handle(self, *args, **options):
+        cache = LLMResponseCache()
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS('Groq response cache cleared.'))
+            return
+        self.stdout.write(json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from base.images import process_product_image
+from base.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Create thumbnails and WebP/JPEG variants for product images that have not been processed yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', help='Only this product id (repeatable)')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').exclude(image__isnull=True)
+        if options['product']:
+            products = products.filter(id__in=options['product'])
+        processed = failed = 0
+        for product_id in products.values_list('id', flat=True).iterator():
+            try:
+                processed += process_product_image(product_id)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Product {product_id}: {type(e).__name__}: {e}'))
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} product images ({failed} failed)'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from base.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized rating aggregates on Product from ProductReview'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_rating_aggregates(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated rating aggregates for {updated} products.'))
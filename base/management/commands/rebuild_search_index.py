@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from base import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the marketplace full-text search index from the Product table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if search.search_backend() is None:
+            self.stdout.write(self.style.WARNING('Full-text search is not supported on this database.'))
+            return
+        total = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} products.'))
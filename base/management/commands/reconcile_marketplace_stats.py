@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from base.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized marketplace counters from the Product table (run periodically)'
+
+    def handle(self, *args, **options):
+        stats = reconcile_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled: {stats.total_products} products, {stats.active_farmers} farmers, '
+            f'{stats.counties_covered} counties.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from base.pricing import refresh_stale_suggestions, prune_price_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recompute stale or missing AI price suggestions and apply the retention policy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-price every available product')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--no-prune', action='store_true', help='Skip pruning old suggestions')
+
+    def handle(self, *args, **options):
+        total = refresh_stale_suggestions(batch_size=options['batch_size'], refresh_all=options['all'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {total} price suggestions.'))
+
+        if not options['no_prune']:
+            deleted = prune_price_suggestions()
+            self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} old price suggestions.'))
@@ -0,0 +1,26 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.price_history import rollup_prices
+
+
+class Command(BaseCommand):
+    help = 'Roll raw price history up into daily/weekly PriceRollup rows and compact old rows (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Recompute from this date (YYYY-MM-DD) instead of the last rolled-up day')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a YYYY-MM-DD date')
+        started = time.perf_counter()
+        written = rollup_prices(since)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} price rollups in {time.perf_counter() - started:.2f}s'
+        ))
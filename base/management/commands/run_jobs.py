@@ -0,0 +1,62 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from base.jobs import TASKS, claim, enqueue, prune_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run the background job worker (pricing, market trends, AI insights)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of polling')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--lease', type=int, default=None, help='Lease length in seconds (default JOB_LEASE_SECONDS)')
+        parser.add_argument('--enqueue', metavar='TASK', help='Queue TASK and exit, e.g. from cron')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            if options['enqueue'] not in TASKS:
+                raise CommandError(f"Unknown task {options['enqueue']!r}; choose from {', '.join(sorted(TASKS))}")
+            job = enqueue(options['enqueue'])
+            self.stdout.write(self.style.SUCCESS(f'Queued {job}.'))
+            return
+
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        self.stdout.write(f'Worker {worker} started.')
+
+        done = failed = 0
+        last_prune = 0
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - last_prune > 3600:
+                prune_jobs()
+                last_prune = time.monotonic()
+
+            jobs = claim(worker, options['batch_size'], options['lease'])
+            if not jobs:
+                if options['burst']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            # Finish the claimed batch even when asked to stop; the leases
+            # would otherwise have to expire before another worker retries
+            for job in jobs:
+                if run_job(job):
+                    done += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} stopped: {done} succeeded, {failed} failed.'))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
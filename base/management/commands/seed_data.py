@@ -0,0 +1,275 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from base import search
+from base.models import (
+    UserProfile, SecuritySettings, ProductCategory, Product, ProductReview, Wishlist, Order,
+    SearchHistory, MarketTrend, PriceSuggestionRequest, FarmerPriceResponse, PriceHistory,
+)
+from base.page_cache import bump_catalog_version
+from base.price_history import history_entry, rollup_prices
+from base.pricing import refresh_price_suggestions
+from base.ratings import rebuild_rating_aggregates
+from base.stats import reconcile_stats
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'seedpass123'
+
+CATALOG = {
+    'Vegetables': ['Tomatoes', 'Kale', 'Cabbage', 'Spinach', 'Onions', 'Carrots', 'Capsicum', 'Cowpea Leaves'],
+    'Fruits': ['Mangoes', 'Avocados', 'Bananas', 'Passion Fruit', 'Pineapples', 'Oranges', 'Watermelon'],
+    'Cereals': ['Maize', 'Sorghum', 'Millet', 'Rice', 'Wheat'],
+    'Legumes': ['Beans', 'Green Grams', 'Peas', 'Groundnuts', 'Soybeans'],
+    'Tubers': ['Irish Potatoes', 'Sweet Potatoes', 'Cassava', 'Arrowroots'],
+    'Dairy': ['Fresh Milk', 'Yoghurt', 'Ghee'],
+    'Poultry': ['Eggs', 'Kienyeji Chicken', 'Broilers'],
+    'Herbs': ['Coriander', 'Rosemary', 'Mint'],
+}
+
+COUNTIES = [
+    'Nairobi', 'Kiambu', 'Nakuru', 'Meru', 'Nyeri', 'Murang\'a', 'Kisii', 'Kakamega', 'Bungoma', 'Uasin Gishu',
+    'Trans Nzoia', 'Machakos', 'Makueni', 'Kirinyaga', 'Embu', 'Nyandarua', 'Kericho', 'Bomet', 'Kisumu',
+    'Mombasa', 'Kilifi', 'Narok', 'Laikipia', 'Nandi', 'Siaya', 'Homa Bay', 'Migori', 'Vihiga',
+]
+
+UNITS = ['kg', 'bag', 'crate', 'piece', 'bunch', 'ton']
+QUALITY_GRADES = ['premium', 'grade1', 'grade2', 'standard']
+
+# Weeks of synthetic price history per seeded product
+HISTORY_WEEKS = 8
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic marketplace data at a configurable scale (tops up to the requested size)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Seeded products to have in total')
+        parser.add_argument('--farmers', type=int, default=None, help='Seeded farmers (default products / 25)')
+        parser.add_argument('--buyers', type=int, default=None, help='Seeded buyers (default products / 10)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--clear', action='store_true', help='Delete all seeded users and their data, then exit')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+            return
+
+        target = options['products']
+        farmers_target = options['farmers'] or max(10, target // 25)
+        buyers_target = options['buyers'] or max(20, target // 10)
+        self.batch_size = options['batch_size']
+
+        existing = Product.objects.filter(farmer__username__startswith=f'{SEED_PREFIX}farmer').count()
+        # Seeded per starting point, so topping up is as reproducible as a fresh run
+        self.rng = random.Random(f"{options['seed']}:{existing}")
+
+        categories = self.ensure_categories()
+        farmers = self.ensure_users('farmer', farmers_target)
+        buyers = self.ensure_users('buyer', buyers_target)
+
+        created = 0
+        while existing + created < target:
+            count = min(self.batch_size, target - existing - created)
+            with transaction.atomic():
+                products = self.create_products(count, categories, farmers)
+                self.create_activity(products, buyers)
+            created += count
+            self.stdout.write(f'  {existing + created}/{target} products')
+
+        if not MarketTrend.objects.exists():
+            self.create_trends(categories)
+        self.create_price_requests(created // 20, categories, buyers, farmers)
+
+        # Bulk inserts skip the signals; rebuild what they would have maintained
+        rebuild_rating_aggregates()
+        reconcile_stats()
+        bump_catalog_version()
+        if created:
+            rollup_prices(since=timezone.localdate() - timedelta(weeks=HISTORY_WEEKS))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {created} new products ({existing + created} total), '
+            f'{len(farmers)} farmers and {len(buyers)} buyers. Password for seeded users: {SEED_PASSWORD}'
+        ))
+
+    def clear(self):
+        users = User.objects.filter(username__startswith=SEED_PREFIX)
+        product_ids = list(Product.objects.filter(farmer__in=users).values_list('id', flat=True))
+        search.remove_products(product_ids)
+        count, _ = users.delete()
+        reconcile_stats()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} seeded rows.'))
+
+    def ensure_categories(self):
+        categories = []
+        for name in CATALOG:
+            category, _ = ProductCategory.objects.get_or_create(name=name)
+            categories.append(category)
+        return categories
+
+    def ensure_users(self, kind, target):
+        prefix = f'{SEED_PREFIX}{kind}'
+        existing = User.objects.filter(username__startswith=prefix).count()
+        if existing < target:
+            password = make_password(SEED_PASSWORD)
+            users = User.objects.bulk_create([
+                User(
+                    username=f'{prefix}{i}',
+                    email=f'{prefix}{i}@example.com',
+                    first_name=kind.title(),
+                    last_name=str(i),
+                    password=password,
+                )
+                for i in range(existing, target)
+            ], batch_size=self.batch_size)
+            UserProfile.objects.bulk_create([
+                UserProfile(
+                    user=user,
+                    user_type=kind,
+                    phone_number=f'07{self.rng.randint(10000000, 99999999)}',
+                    location=self.rng.choice(COUNTIES),
+                )
+                for user in users
+            ], batch_size=self.batch_size)
+            SecuritySettings.objects.bulk_create(
+                [SecuritySettings(user=user) for user in users], batch_size=self.batch_size
+            )
+        return list(User.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+
+    def create_products(self, count, categories, farmer_ids):
+        rng = self.rng
+        today = timezone.now().date()
+        farmer_counties = dict(
+            UserProfile.objects.filter(user_id__in=farmer_ids).values_list('user_id', 'location')
+        )
+        products = []
+        for _ in range(count):
+            category = rng.choice(categories)
+            name = rng.choice(CATALOG.get(category.name, ['Produce']))
+            farmer_id = rng.choice(farmer_ids)
+            products.append(Product(
+                farmer_id=farmer_id,
+                category=category,
+                name=name,
+                description=f'Fresh {name.lower()} from a family farm in {farmer_counties[farmer_id]} county.',
+                price=Decimal(str(round(rng.lognormvariate(4.5, 0.6), 2))),
+                quantity=Decimal(rng.randint(1, 500)),
+                unit=rng.choice(UNITS),
+                quality_grade=rng.choice(QUALITY_GRADES),
+                location=farmer_counties[farmer_id],
+                harvest_date=today + timedelta(days=rng.randint(-30, 14)),
+                is_available=rng.random() < 0.9,
+            ))
+        products = Product.objects.bulk_create(products, batch_size=self.batch_size)
+        search.index_products(products)
+        refresh_price_suggestions([p for p in products if p.is_available])
+        self.create_price_history(products)
+        return products
+
+    def create_price_history(self, products):
+        """A few earlier prices per product over the last HISTORY_WEEKS weeks, ending at the current one"""
+        rng = self.rng
+        now = timezone.now()
+        entries = []
+        for product in products:
+            price = product.price
+            for days_ago in sorted(rng.sample(range(1, HISTORY_WEEKS * 7), rng.randint(0, 4)), reverse=True):
+                entry = history_entry(product, now - timedelta(days=days_ago, minutes=rng.randint(0, 1439)))
+                entry.price = (price * Decimal(str(rng.uniform(0.85, 1.15)))).quantize(Decimal('0.01'))
+                entries.append(entry)
+            entries.append(history_entry(product, now))
+        PriceHistory.objects.bulk_create(entries, batch_size=self.batch_size)
+
+    def create_activity(self, products, buyer_ids):
+        """Reviews, wishlists, orders and searches touching the new products"""
+        rng = self.rng
+        reviews, wishlists, orders, searches = [], [], [], []
+        for product in products:
+            for user_id in rng.sample(buyer_ids, min(len(buyer_ids), rng.choice([0, 0, 1, 2, 3, 5]))):
+                reviews.append(ProductReview(
+                    product=product,
+                    user_id=user_id,
+                    rating=rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 3, 5, 5])[0],
+                    comment=rng.choice(['', 'Fresh and well packed.', 'Good value.', 'Delivery was late.']),
+                ))
+            if rng.random() < 0.3:
+                for user_id in rng.sample(buyer_ids, min(len(buyer_ids), rng.randint(1, 3))):
+                    wishlists.append(Wishlist(product=product, user_id=user_id))
+            if rng.random() < 0.4:
+                quantity = Decimal(rng.randint(1, 20))
+                orders.append(Order(
+                    buyer_id=rng.choice(buyer_ids),
+                    product=product,
+                    quantity=quantity,
+                    total_price=quantity * product.price,
+                    status=rng.choice([status for status, _ in Order.ORDER_STATUS]),
+                ))
+            searches.append(SearchHistory(
+                user_id=rng.choice(buyer_ids + [None]),
+                query=product.name.lower() if rng.random() < 0.8 else product.location.lower(),
+                results_count=rng.randint(0, 200),
+            ))
+
+        ProductReview.objects.bulk_create(reviews, batch_size=self.batch_size)
+        Wishlist.objects.bulk_create(wishlists, batch_size=self.batch_size)
+        Order.objects.bulk_create(orders, batch_size=self.batch_size)
+        SearchHistory.objects.bulk_create(searches, batch_size=self.batch_size)
+
+    def create_trends(self, categories):
+        """Twelve weeks of market trends per category"""
+        rng = self.rng
+        now = timezone.now()
+        for category in categories:
+            price = rng.uniform(50, 300)
+            for week in range(12, 0, -1):
+                change = rng.uniform(-0.08, 0.08)
+                price *= 1 + change
+                trend = MarketTrend.objects.create(
+                    category=category,
+                    average_price=round(price, 2),
+                    price_trend='increasing' if change > 0.05 else 'decreasing' if change < -0.05 else 'stable',
+                    demand_level=rng.choice(['high', 'medium', 'low']),
+                    recommendation=f'Market for {category.name} is stable. Good time for trading.',
+                )
+                MarketTrend.objects.filter(id=trend.id).update(created_at=now - timedelta(weeks=week))
+
+    def create_price_requests(self, count, categories, buyer_ids, farmer_ids):
+        rng = self.rng
+        now = timezone.now()
+        requests = []
+        for _ in range(count):
+            category = rng.choice(categories)
+            requests.append(PriceSuggestionRequest(
+                buyer_id=rng.choice(buyer_ids),
+                category=category,
+                product_name=rng.choice(CATALOG.get(category.name, ['Produce'])),
+                suggested_price=Decimal(str(round(rng.uniform(30, 400), 2))),
+                quantity_needed=Decimal(rng.randint(10, 1000)),
+                unit=rng.choice(UNITS),
+                location=rng.choice(COUNTIES + ['all']),
+                urgency=rng.choice(['low', 'medium', 'high']),
+                status=rng.choices(['active', 'fulfilled', 'expired'], weights=[6, 2, 2])[0],
+                expires_at=now + timedelta(days=rng.randint(-5, 30)),
+            ))
+        requests = PriceSuggestionRequest.objects.bulk_create(requests, batch_size=self.batch_size)
+
+        responses = []
+        for request in requests:
+            for farmer_id in rng.sample(farmer_ids, min(len(farmer_ids), rng.randint(0, 2))):
+                responses.append(FarmerPriceResponse(
+                    farmer_id=farmer_id,
+                    price_suggestion=request,
+                    counter_price=request.suggested_price * Decimal('1.1'),
+                    available_quantity=Decimal(rng.randint(5, 500)),
+                    status=rng.choice(['pending', 'accepted', 'rejected', 'countered']),
+                ))
+        FarmerPriceResponse.objects.bulk_create(responses, batch_size=self.batch_size)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from base.db_maintenance import enable_incremental_vacuum, run_maintenance
+
+
+class Command(BaseCommand):
+    help = 'Optimize, incrementally vacuum and checkpoint the SQLite database (run periodically, e.g. hourly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='Run a full ANALYZE first (e.g. nightly)')
+        parser.add_argument('--vacuum-pages', type=int, default=1000, help='Free pages to release per run')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='One-off: switch to auto_vacuum=INCREMENTAL (runs a full VACUUM)')
+
+    def handle(self, *args, **options):
+        if options['enable_incremental_vacuum']:
+            enabled = enable_incremental_vacuum()
+            self.stdout.write(f'Incremental vacuum {"enabled" if enabled else "could not be enabled"}')
+        report = run_maintenance(analyze=options['analyze'], vacuum_pages=options['vacuum_pages'])
+        if not report:
+            self.stdout.write('Not an SQLite database; nothing to do')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{key}: {value}' for key, value in report.items())
+        ))
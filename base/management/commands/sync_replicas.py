@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from base.db_router import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the SQLite replicas from DATABASE_REPLICAS '
+        '(local stand-in for replication; --interval repeats it to simulate lag)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep syncing every N seconds instead of once')
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        replicas = [connections[alias].settings_dict for alias in replica_aliases()]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sync_replicas only copies SQLite databases')
+        replicas = [replica for replica in replicas if replica['ENGINE'] == 'django.db.backends.sqlite3']
+        if not replicas:
+            raise CommandError('No SQLite replicas configured; set DATABASE_REPLICAS')
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(str(primary['NAME']))
+            try:
+                for replica in replicas:
+                    target = sqlite3.connect(str(replica['NAME']))
+                    try:
+                        # Online backup: consistent even while the primary is being written
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(f'Synced {len(replicas)} replicas in {time.perf_counter() - started:.2f}s')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.market_trends import update_market_trends
+
+
+class Command(BaseCommand):
+    help = 'Record a new MarketTrend snapshot for every category (run periodically, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = update_market_trends()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recorded {created} market trends in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,113 @@
+"""
+Market trend snapshots, one MarketTrend row per category with available products.
+
+Everything is computed in a fixed number of queries regardless of catalog
+size: one GROUP BY for counts and averages (with each category's previous
+snapshot attached through a subquery), one ordered scan over
+(category, price) for the medians that keeps a single running value per
+category, and one bulk insert.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Avg, Count, OuterRef, Q, Subquery
+from .jobs import enqueue_on_commit
+from .models import MarketTrend, Product, ProductCategory
+from .page_cache import bump_catalog_version_on_commit
+
+# Price change against the previous snapshot that counts as a trend
+TREND_THRESHOLD = 0.05
+
+# Minimum available products for medium and high demand
+DEMAND_LEVELS = (('high', 21), ('medium', 11))
+
+
+def price_trend(average_price, previous_price):
+    if previous_price is None:
+        return 'stable'
+    if average_price > float(previous_price) * (1 + TREND_THRESHOLD):
+        return 'increasing'
+    if average_price < float(previous_price) * (1 - TREND_THRESHOLD):
+        return 'decreasing'
+    return 'stable'
+
+
+def demand_level(product_count):
+    for level, minimum in DEMAND_LEVELS:
+        if product_count >= minimum:
+            return level
+    return 'low'
+
+
+def recommendation(name, trend, demand):
+    if trend == 'increasing' and demand == 'high':
+        return f"High demand for {name}. Prices rising. Good time to sell."
+    if trend == 'decreasing' and demand == 'low':
+        return f"Low demand for {name}. Prices falling. Good time to buy."
+    return f"Market for {name} is stable. Good time for trading."
+
+
+def category_aggregates():
+    """Categories with available products, annotated with count, average and previous average price"""
+    available = Q(product__is_available=True)
+    previous = MarketTrend.objects.filter(category=OuterRef('pk')).order_by('-created_at', '-id')
+    return ProductCategory.objects.annotate(
+        product_count=Count('product', filter=available),
+        average_price=Avg('product__price', filter=available),
+        previous_price=Subquery(previous.values('average_price')[:1]),
+    ).filter(product_count__gt=0).order_by('id')
+
+
+def median_prices(counts, chunk_size=5000):
+    """
+    {category id: median price} from one scan ordered by (category, price).
+
+    With the per-category counts known up front the median is just the
+    value at a fixed position, so nothing but the current category is held.
+    """
+    medians = {}
+    # Served in order by the covering (category, price, is_available) index
+    rows = Product.objects.filter(is_available=True).order_by('category_id', 'price').values_list('category_id', 'price')
+    current, position, lower = None, 0, None
+    for category_id, price in rows.iterator(chunk_size=chunk_size):
+        if category_id != current:
+            current, position = category_id, 0
+        count = counts.get(category_id, 0)
+        if count % 2:
+            if position == count // 2:
+                medians[category_id] = price
+        elif position == count // 2 - 1:
+            lower = price
+        elif position == count // 2:
+            medians[category_id] = (lower + price) / 2
+        position += 1
+    return medians
+
+
+def update_market_trends():
+    """Record a new MarketTrend per category; returns the number of rows written"""
+    categories = list(category_aggregates())
+    medians = median_prices({category.id: category.product_count for category in categories})
+
+    trends = []
+    for category in categories:
+        average_price = float(category.average_price)
+        trend = price_trend(average_price, category.previous_price)
+        demand = demand_level(category.product_count)
+        trends.append(MarketTrend(
+            category=category,
+            average_price=Decimal(str(round(average_price, 2))),
+            median_price=medians.get(category.id),
+            product_count=category.product_count,
+            price_trend=trend,
+            demand_level=demand,
+            recommendation=recommendation(category.name, trend, demand),
+        ))
+
+    with transaction.atomic():
+        MarketTrend.objects.bulk_create(trends)
+        # bulk_create skips post_save, so do what the MarketTrend receivers would
+        for trend in trends:
+            enqueue_on_commit('reprice_category', {'category_id': trend.category_id})
+        if trends:
+            bump_catalog_version_on_commit()
+    return len(trends)
@@ -0,0 +1,148 @@
+"""
+Delivery of uploaded media (MEDIA_ROOT) with caching headers.
+
+MEDIA_DELIVERY picks who sends the bytes:
+
+- 'x-accel': nginx, via X-Accel-Redirect to an internal location; nginx
+  does sendfile, Range and conditional requests:
+
+      location /protected-media/ {
+          internal;
+          alias /path/to/agrilink/media/;
+      }
+
+- 'x-sendfile': Apache mod_xsendfile / lighttpd, via X-Sendfile.
+- 'python': Django itself, for development and single-box deployments.
+  Whole files still go out through the WSGI file wrapper (sendfile under
+  gunicorn); single byte ranges are streamed with 206.
+
+Processed images have a content hash in their name (base/images.py) and are
+cached for a year as immutable; everything else is cached for
+MEDIA_CACHE_MAX_AGE and revalidated with ETag/Last-Modified.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def cache_control(path):
+    if HASHED_NAME.search(path):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        # Weak comparison: caches and proxies may send back W/"..."
+        tags = parse_etags(if_none_match)
+        return tags == ['*'] or etag in [tag.removeprefix('W/') for tag in tags]
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single satisfiable 'bytes=' range, None to send everything, False if unsatisfiable"""
+    match = RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """
+    A file that ends ``length`` bytes after its current position, streamed
+    by FileResponse. Has no fileno(), so WSGI servers read it rather than
+    sendfile the rest of the file.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        info = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404('Media file not found')
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('Media file not found')
+
+    etag = quote_etag(f'{int(info.st_mtime):x}-{info.st_size:x}')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(info.st_mtime),
+        'Cache-Control': cache_control(path),
+    }
+    if _not_modified(request, etag, info.st_mtime):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    delivery = settings.MEDIA_DELIVERY
+    if delivery in ('x-accel', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if delivery == 'x-accel':
+            # A URI, which nginx unescapes; the path was already unquoted by Django
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    headers['Accept-Ranges'] = 'bytes'
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and request.META.get('HTTP_IF_RANGE', etag) == etag:
+        byte_range = _byte_range(request.META['HTTP_RANGE'], info.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{info.st_size}'
+        return response
+
+    f = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type, headers=headers)
+        response['Content-Length'] = info.st_size
+        return response
+    start, end = byte_range
+    f.seek(start)
+    length = end - start + 1
+    response = FileResponse(RangeFile(f, length), status=206, content_type=content_type, headers=headers)
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{end}/{info.st_size}'
+    return response
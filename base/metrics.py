@@ -0,0 +1,50 @@
+"""
+Prometheus metrics, exported at /metrics.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory before the
+workers start (gunicorn.conf.py does this); each process then writes its
+samples to memory-mapped files there and /metrics sums them over all
+workers. Without it the endpoint reports the current process only.
+"""
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    'agrilink_request_duration_seconds', 'Request latency by URL name',
+    ['view', 'method', 'status'],
+)
+DB_QUERIES = Counter(
+    'agrilink_db_queries_total', 'SQL statements executed, by URL name', ['view'],
+)
+DB_TIME = Counter(
+    'agrilink_db_query_seconds_total', 'Time spent in SQL statements, by URL name', ['view'],
+)
+GROQ_LATENCY = Histogram(
+    'agrilink_groq_request_duration_seconds', 'Groq API call latency by GroqAIService method',
+    ['method'], buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30),
+)
+GROQ_ERRORS = Counter(
+    'agrilink_groq_errors_total', 'Failed or refused Groq calls by method and reason', ['method', 'reason'],
+)
+GROQ_FALLBACKS = Counter(
+    'agrilink_groq_fallbacks_total', 'GroqAIService results served by a fallback', ['method'],
+)
+CACHE_REQUESTS = Counter(
+    'agrilink_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ['cache', 'result'],
+)
+
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def render():
+    """(body, content type) of the current metrics, aggregated across processes when configured"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,224 @@
+import logging
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from . import db_router, metrics
+from .query_stats import QueryCounter, QueryRecorder
+from .resilience import latency_budget
+
+sql_logger = logging.getLogger('base.sql')
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, able to sit in an async middleware chain as well, so ASGI
+    requests for async views aren't handed to a thread at this layer
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class LatencyBudgetMiddleware:
+    """
+    Give every request a GROQ_REQUEST_BUDGET-second budget for upstream AI
+    calls, so a degraded provider can't hold the response beyond it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with latency_budget(settings.GROQ_REQUEST_BUDGET):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with latency_budget(settings.GROQ_REQUEST_BUDGET):
+            return await self.get_response(request)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record SQL statistics for a sample of requests (SQL_INSTRUMENTATION).
+
+    Adds X-DB-Queries, X-DB-Time-Ms and X-DB-Repeated headers, logs a
+    summary per request (at DEBUG unless the request has N+1 shapes or
+    slow statements), warns about statement shapes run more than
+    n_plus_one_threshold times (the N+1 signature), and logs statements
+    slower than slow_query_ms with their EXPLAIN plan. Async views are
+    covered too: their ORM calls run through sync_to_async on the
+    request's own connections, which carry the execute wrapper.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        config = settings.SQL_INSTRUMENTATION
+        self.sample_rate = config.get('sample_rate', 0)
+        self.threshold = config.get('n_plus_one_threshold', 5)
+        self.slow_query_ms = config.get('slow_query_ms', 100)
+        self.explain = config.get('explain', True)
+
+    def _sampled(self):
+        return self.sample_rate and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        recorder = QueryRecorder(self.slow_query_ms)
+        with recorder.record():
+            response = self.get_response(request)
+        self.report(request, response, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        recorder = QueryRecorder(self.slow_query_ms)
+        with recorder.record():
+            response = await self.get_response(request)
+        if recorder.slow and self.explain:
+            # EXPLAIN runs queries, which need a sync context
+            await sync_to_async(self.report)(request, response, recorder)
+        else:
+            self.report(request, response, recorder)
+        return response
+
+    def report(self, request, response, recorder):
+        repeated = recorder.repeated(self.threshold)
+        response['X-DB-Queries'] = str(recorder.count)
+        response['X-DB-Time-Ms'] = f'{recorder.total_time * 1000:.1f}'
+        response['X-DB-Repeated'] = str(len(repeated))
+
+        # Every sampled request at DEBUG; only those with something to fix above it
+        sql_logger.log(
+            logging.INFO if repeated or recorder.slow else logging.DEBUG,
+            '%s %s: %d queries in %.1f ms, %d repeated shapes',
+            request.method, request.path, recorder.count, recorder.total_time * 1000, len(repeated)
+        )
+        for shape, count in repeated:
+            sql_logger.warning('Possible N+1 on %s %s: %d x %s', request.method, request.path, count, shape)
+        for alias, sql, params, many, duration in recorder.slow:
+            plan = self.explain and not many and recorder.explain(alias, sql, params)
+            sql_logger.warning(
+                'Slow query on %s %s (%.1f ms): %s%s',
+                request.method, request.path, duration * 1000, sql,
+                f'\nPlan:\n{plan}' if plan else ''
+            )
+
+
+class MetricsMiddleware:
+    """
+    Feed request latency and DB query totals to the /metrics endpoint,
+    labelled by URL name (unmatched URLs share one label).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        queries = QueryCounter()
+        with queries.record():
+            response = self.get_response(request)
+        self.observe(request, response, queries, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        queries = QueryCounter()
+        with queries.record():
+            response = await self.get_response(request)
+        self.observe(request, response, queries, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, queries, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else '<unmatched>'
+        if view != 'metrics':
+            metrics.REQUEST_LATENCY.labels(view, request.method, f'{response.status_code // 100}xx').observe(elapsed)
+            metrics.DB_QUERIES.labels(view).inc(queries.count)
+            metrics.DB_TIME.labels(view).inc(queries.total_time)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Let safe requests read from the database replicas (base/db_router.py),
+    except for DATABASE_REPLICA_PIN_SECONDS after the client last wrote.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = db_router.begin_request(self.replica_reads(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = db_router.end_request(token)
+        return self.pin(response, wrote)
+
+    async def __acall__(self, request):
+        # ORM calls in sync_to_async threads inherit this context's routing state
+        token = db_router.begin_request(self.replica_reads(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = db_router.end_request(token)
+        return self.pin(response, wrote)
+
+    def replica_reads(self, request):
+        return request.method in ('GET', 'HEAD') and db_router.PIN_COOKIE not in request.COOKIES
+
+    def pin(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                db_router.PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# Frozen copy of the index layout from base/search.py at the time of this
+# migration; migrations must not depend on the live module
+SQLITE_TABLE = 'base_product_fts'
+POSTGRES_TABLE = 'base_product_search'
+SQLITE_BM25_WEIGHTS = '10.0, 2.0, 5.0'  # name, description, category
+POSTGRES_CONFIG = 'simple'
+
+
+def _index_rows(schema_editor, rows):
+    if not rows:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_TABLE}(rowid, name, description, category) VALUES (%s, %s, %s, %s)",
+                rows
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {POSTGRES_TABLE}(product_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'C') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'B')) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows
+            )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+            "name, description, category, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rank) VALUES ('rank', 'bm25({SQLITE_BM25_WEIGHTS})')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+            "product_id bigint PRIMARY KEY REFERENCES base_product(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx "
+            f"ON {POSTGRES_TABLE} USING GIN (document)"
+        )
+    else:
+        return
+
+    # Backfill existing products using the historical models
+    Product = apps.get_model('base', 'Product')
+    products = Product.objects.using(schema_editor.connection.alias).select_related('category').order_by('id')
+    batch = []
+    for p in products.iterator(chunk_size=1000):
+        batch.append((p.id, p.name or '', p.description or '', p.category.name if p.category_id else ''))
+        if len(batch) >= 1000:
+            _index_rows(schema_editor, batch)
+            batch = []
+    _index_rows(schema_editor, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_pricesuggestionrequest_farmerpriceresponse'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:40
+
+from django.db import migrations, models
+
+
+def mark_latest_current(apps, schema_editor):
+    # The newest existing suggestion of each product becomes its current one
+    PriceSuggestion = apps.get_model('base', 'PriceSuggestion')
+    latest_ids = (
+        PriceSuggestion.objects.values('product_id')
+        .annotate(latest_id=models.Max('id'))
+        .values_list('latest_id', flat=True)
+    )
+    PriceSuggestion.objects.filter(id__in=list(latest_ids)).update(is_current=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricesuggestion',
+            name='is_current',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='pricesuggestion',
+            name='model_version',
+            field=models.CharField(default='legacy', max_length=20),
+        ),
+        migrations.RunPython(mark_latest_current, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pricesuggestion',
+            index=models.Index(fields=['is_current', 'created_at'], name='base_prices_is_curr_91932f_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricesuggestion',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('product',), name='unique_current_price_suggestion'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('base', 'Product')
+    ProductReview = apps.get_model('base', 'ProductReview')
+    rows = ProductReview.objects.values('product_id').annotate(
+        total=models.Count('id'),
+        average=models.Avg('rating'),
+        **{f'rating_{stars}_count': models.Count('id', filter=models.Q(rating=stars)) for stars in range(1, 6)}
+    ).order_by()
+    for row in rows:
+        Product.objects.filter(pk=row['product_id']).update(
+            review_count=row['total'],
+            avg_rating=row['average'] or 0,
+            **{f'rating_{stars}_count': row[f'rating_{stars}_count'] for stars in range(1, 6)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_pricesuggestion_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='avg_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_available', '-avg_rating', '-review_count'], name='product_rating_idx'),
+        ),
+    ]
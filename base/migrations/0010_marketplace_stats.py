@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:44
+
+from collections import Counter, defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_stats(apps, schema_editor):
+    # Frozen copy of base.stats.reconcile_stats at the time of this migration
+    Product = apps.get_model('base', 'Product')
+    MarketplaceStats = apps.get_model('base', 'MarketplaceStats')
+    MarketplaceStatsMember = apps.get_model('base', 'MarketplaceStatsMember')
+    counters = {'farmer': 'active_farmers', 'county': 'counties_covered'}
+
+    totals = Counter()
+    members = defaultdict(Counter)
+    grouped = Product.objects.filter(is_available=True).values(
+        'category_id', 'farmer_id', 'location'
+    ).annotate(products=Count('id')).order_by()
+    for row in grouped.iterator():
+        county = (row['location'] or '').strip().lower() or None
+        for scope in ('all', f"category:{row['category_id']}"):
+            totals[scope] += row['products']
+            members[(scope, 'farmer')][str(row['farmer_id'])] += row['products']
+            if county:
+                members[(scope, 'county')][county] += row['products']
+
+    stats = {scope: MarketplaceStats(scope=scope, total_products=total) for scope, total in totals.items()}
+    member_rows = []
+    for (scope, kind), counts in members.items():
+        setattr(stats[scope], counters[kind], len(counts))
+        member_rows.extend(
+            MarketplaceStatsMember(scope=scope, kind=kind, value=value, product_count=count)
+            for value, count in counts.items()
+        )
+    stats.setdefault('all', MarketplaceStats(scope='all'))
+    MarketplaceStats.objects.bulk_create(stats.values())
+    MarketplaceStatsMember.objects.bulk_create(member_rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceStats',
+            fields=[
+                ('scope', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('total_products', models.PositiveIntegerField(default=0)),
+                ('active_farmers', models.PositiveIntegerField(default=0)),
+                ('counties_covered', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Marketplace Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='MarketplaceStatsMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('kind', models.CharField(choices=[('farmer', 'Farmer'), ('county', 'County')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('product_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('scope', 'kind', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Expression indexes for the case-insensitive lookups in base.backends.find_user"""
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('base', '0011_job_queue'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS base_user_username_lower ON auth_user (LOWER(username))',
+            'DROP INDEX IF EXISTS base_user_username_lower',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS base_user_email_lower ON auth_user (LOWER(email))',
+            'DROP INDEX IF EXISTS base_user_email_lower',
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_current_prices(apps, schema_editor):
+    """Seed the history with every product's current price, as of its last edit"""
+    Product = apps.get_model('base', 'Product')
+    PriceHistory = apps.get_model('base', 'PriceHistory')
+    batch = []
+    rows = Product.objects.values_list('id', 'category_id', 'location', 'price', 'quantity', 'updated_at')
+    for product_id, category_id, location, price, quantity, updated_at in rows.iterator(chunk_size=2000):
+        batch.append(PriceHistory(
+            product_id=product_id, category_id=category_id, county=(location or '').strip().lower(),
+            price=price, quantity=quantity, recorded_at=updated_at,
+        ))
+        if len(batch) >= 2000:
+            PriceHistory.objects.bulk_create(batch)
+            batch = []
+    PriceHistory.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_market_trend_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('county', models.CharField(blank=True, max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('recorded_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.productcategory')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_history', to='base.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Price History',
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('county', models.CharField(blank=True, max_length=100)),
+                ('period_start', models.DateField()),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('samples', models.PositiveIntegerField()),
+                ('volume', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.productcategory')),
+            ],
+            options={
+                'unique_together': {('period', 'county', 'category', 'period_start')},
+            },
+        ),
+        migrations.RunPython(backfill_current_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:47
+
+import base.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0015_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchEntry',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='base.product')),
+                ('document', base.models.FullTextField(db_column='base_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'base_product_fts',
+                'managed': False,
+            },
+        ),
+    ]
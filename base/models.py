@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinLengthValidator
+from decimal import Decimal
+import copy
 import json
 
 class UserProfile(models.Model):
@@ -76,6 +78,7 @@ class ProductCategory(models.Model):
 
 from django.db import models
 from django.core.files.storage import FileSystemStorage
+from django.db.models.fields.files import FieldFile
 import os
 
 # Optional: Custom storage for better organization
@@ -114,21 +117,211 @@ class Product(models.Model):
     # Keep image_url as backup or for external images
     image_url = models.CharField(max_length=500, blank=True, null=True)
     
+    # Filled in by base/images.py once the upload has been processed
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    
+    # Review aggregates, maintained by the ProductReview signals (see
+    # base/ratings.py) so rating sorts need no JOIN or aggregation
+    avg_rating = models.FloatField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_available', '-avg_rating', '-review_count'], name='product_rating_idx'),
+            models.Index(fields=['category', 'price', 'is_available'], name='product_category_price_idx'),
+        ]
+    
+    # Fields that feed AgriAI pricing; a change to any of them makes the
+    # stored price suggestion stale
+    PRICING_FIELDS = ('price', 'quality_grade', 'location', 'category_id')
+    # Fields behind the marketplace stats (see base/stats.py)
+    STATS_FIELDS = ('is_available', 'location', 'category_id', 'farmer_id')
+    RATING_AGGREGATE_FIELDS = (
+        'avg_rating', 'review_count',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
+    
     def __str__(self):
         return f"{self.name} by {self.farmer.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._mark_loaded()
+        instance._loaded_pricing_state = instance.pricing_state()
+        if all(field in instance.__dict__ for field in cls.STATS_FIELDS):
+            instance._loaded_stats_contribution = instance.stats_contribution()
+        instance._loaded_image_name = instance.image_name()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Only write the fields changed since the row was loaded (or last
+        # saved). The rating aggregates (base/ratings.py) and the processed
+        # image fields (base/images.py) are written behind this instance's
+        # back, and a stale instance must not put their old values back;
+        # deferred fields are left alone instead of being fetched one by one.
+        if (not self._state.adding and kwargs.get('update_fields') is None
+                and hasattr(self, '_loaded_values')):
+            kwargs['update_fields'] = self.changed_fields() + [
+                field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)
+            ]
+        self.load_stats_contribution()
+        super().save(*args, **kwargs)
+        self._mark_loaded(kwargs.get('update_fields'))
+    
+    def _mark_loaded(self, fields=None):
+        """Make the current values of ``fields`` (default all) the baseline for changed_fields"""
+        values = self.field_values()
+        if fields is not None:
+            names = set(fields)
+            values = {
+                field.attname: values[field.attname] for field in self._meta.concrete_fields
+                if (field.name in names or field.attname in names) and field.attname in values
+            }
+        self._loaded_values = {**getattr(self, '_loaded_values', {}), **values}
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Reloaded (or lazily loaded deferred) values are the new baseline
+        self._mark_loaded(fields)
+    
+    def field_values(self):
+        """{attname: value} of the loaded concrete fields, copied so in-place edits show up as changes"""
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue
+            value = self.__dict__[field.attname]
+            values[field.attname] = value.name if isinstance(value, FieldFile) else copy.deepcopy(value)
+        return values
+    
+    def changed_fields(self):
+        """Names of the fields whose value differs from the loaded one (rating aggregates excepted)"""
+        loaded = getattr(self, '_loaded_values', {})
+        missing = object()
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in self.RATING_AGGREGATE_FIELDS
+            and field.attname in self.__dict__
+            and self.__dict__[field.attname] != loaded.get(field.attname, missing)
+        ]
+    
+    def pricing_state(self):
+        # Read through __dict__ so deferred fields don't trigger extra queries
+        values = [self.__dict__.get(field) for field in self.PRICING_FIELDS]
+        if values[0] is not None:
+            values[0] = Decimal(str(values[0]))
+        return tuple(None if value is None else str(value) for value in values)
+    
+    def stats_contribution(self, values=None):
+        """(category_id, farmer_id, county) counted by the marketplace stats, or None"""
+        values = self.__dict__ if values is None else values
+        if not values.get('is_available'):
+            return None
+        location = (values.get('location') or '').strip().lower() or None
+        return (values.get('category_id'), values.get('farmer_id'), location)
+    
+    def load_stats_contribution(self):
+        """
+        Make sure the stored row's stats contribution is known before it is
+        moved or removed: an instance loaded with any STATS_FIELDS deferred
+        reads them with one query (and keeps any it was missing)
+        """
+        if self._state.adding or hasattr(self, '_loaded_stats_contribution'):
+            return
+        row = type(self)._base_manager.using(self._state.db).filter(pk=self.pk).values(*self.STATS_FIELDS).first()
+        if row is None:
+            self._loaded_stats_contribution = None
+            return
+        missing = [field for field in self.STATS_FIELDS if field not in self.__dict__]
+        self.__dict__.update({field: row[field] for field in missing})
+        self._mark_loaded(missing)
+        self._loaded_stats_contribution = self.stats_contribution(row)
+    
+    def image_name(self):
+        image = self.__dict__.get('image')
+        return getattr(image, 'name', image) or ''
+    
+    def pricing_changed(self):
+        """True if a pricing input changed since the product was loaded"""
+        loaded = getattr(self, '_loaded_pricing_state', None)
+        return loaded is None or loaded != self.pricing_state()
+    
+    @property
+    def rating_histogram(self):
+        """[(stars, count), ...] from 5 stars down to 1"""
+        return [(stars, getattr(self, f'rating_{stars}_count')) for stars in range(5, 0, -1)]
+    
+    @property
+    def image_sources(self):
+        """
+        srcset strings and the fallback URL of the processed card variants,
+        or None until base/images.py has processed the current image
+        """
+        variants = self.image_variants or {}
+        if not self.image or variants.get('source') != self.image.name:
+            return None
+        storage = self.image.storage
+        sources = {}
+        for format in ('webp', 'jpeg'):
+            sources[format] = ', '.join(
+                f'{storage.url(name)} {width}w' for width, name in variants[format].items()
+            )
+        smallest = min(variants['jpeg'], key=int)
+        sources['src'] = storage.url(variants['jpeg'][smallest])
+        return sources
+    
     # Optional: Property to get image URL with fallback
     @property
     def image_display(self):
+        sources = self.image_sources
+        if sources:
+            return sources['src']
         if self.image:
             return self.image.url
         elif self.image_url:
             return self.image_url
         return '/static/images/default-product.png'  # Add a default image
 
+class FullTextField(models.TextField):
+    """An FTS5 table's hidden column of the same name; supports only ``match``"""
+
+@FullTextField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+class ProductSearchEntry(models.Model):
+    """
+    Read-only view of the SQLite FTS5 search index (created by migration
+    0007, written by base/search.py), so searches can join it once
+    """
+    product = models.OneToOneField(
+        Product, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING, related_name='search_entry'
+    )
+    document = FullTextField(db_column='base_product_fts')
+    # BM25 with the weights set by migration 0007; lower is better
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'base_product_fts'
+
 class PriceSuggestion(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_suggestions')
     suggested_price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -140,8 +333,24 @@ class PriceSuggestion(models.Model):
         ('fair_price', 'Fair Price'),
         ('high_price', 'High Price')
     ], null=True)
+    model_version = models.CharField(max_length=20, default='legacy')
+    is_current = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            # At most one current suggestion per product; doubles as the
+            # index behind the read path
+            models.UniqueConstraint(
+                fields=['product'],
+                condition=models.Q(is_current=True),
+                name='unique_current_price_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['is_current', 'created_at']),
+        ]
+    
     def __str__(self):
         return f"Suggested {self.suggested_price} for {self.product.name}"
 
@@ -174,6 +383,19 @@ class ProductReview(models.Model):
     
     class Meta:
         unique_together = ['product', 'user']
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was counted so edits can move it between buckets
+        instance._loaded_rating = (instance.__dict__.get('product_id'), instance.__dict__.get('rating'))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # The post_save signal updates the product's rating aggregates, run
+        # both in one transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
 class Wishlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wishlist')
@@ -186,6 +408,8 @@ class Wishlist(models.Model):
 class MarketTrend(models.Model):
     category = models.ForeignKey(ProductCategory, on_delete=models.CASCADE)
     average_price = models.DecimalField(max_digits=10, decimal_places=2)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    product_count = models.IntegerField(default=0)
     price_trend = models.CharField(max_length=10, choices=[
         ('increasing', 'Increasing'),
         ('decreasing', 'Decreasing'),
@@ -284,4 +508,107 @@ class FarmerPriceResponse(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"Response to {self.price_suggestion.product_name} by {self.farmer.username}"
\ No newline at end of file
+        return f"Response to {self.price_suggestion.product_name} by {self.farmer.username}"
+
+class MarketplaceStats(models.Model):
+    """Materialized marketplace counters, one row per scope ('all' or 'category:<id>')"""
+    scope = models.CharField(max_length=50, primary_key=True)
+    total_products = models.PositiveIntegerField(default=0)
+    active_farmers = models.PositiveIntegerField(default=0)
+    counties_covered = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Marketplace Stats"
+    
+    def __str__(self):
+        return f"Marketplace stats ({self.scope})"
+
+class MarketplaceStatsMember(models.Model):
+    """Available-product count per farmer/county in a scope, backing the distinct counters"""
+    KINDS = (
+        ('farmer', 'Farmer'),
+        ('county', 'County'),
+    )
+    
+    scope = models.CharField(max_length=50)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    value = models.CharField(max_length=100)
+    product_count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['scope', 'kind', 'value']
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by the run_jobs worker"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('dead', 'Dead'),
+    )
+    
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Pending jobs with the same non-empty key are enqueued only once
+    dedupe_key = models.CharField(max_length=200, blank=True, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_claim_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
+
+class PriceHistory(models.Model):
+    """A listing price as set on a product; raw points are compacted into PriceRollup (base/price_history.py)"""
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='price_history')
+    category = models.ForeignKey(ProductCategory, on_delete=models.CASCADE)
+    # Normalized product location, '' when unknown
+    county = models.CharField(max_length=100, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    recorded_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name_plural = "Price History"
+    
+    def __str__(self):
+        return f"{self.category_id} {self.county or 'all'} {self.price} at {self.recorded_at}"
+
+class PriceRollup(models.Model):
+    """Price statistics of a category over one day or week, per county and overall (county '')"""
+    PERIOD_CHOICES = (
+        ('day', 'Day'),
+        ('week', 'Week'),
+    )
+    
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    county = models.CharField(max_length=100, blank=True)
+    category = models.ForeignKey(ProductCategory, on_delete=models.CASCADE)
+    period_start = models.DateField()
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    avg_price = models.DecimalField(max_digits=10, decimal_places=2)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Price points in the period, and the quantity they listed
+    samples = models.PositiveIntegerField()
+    volume = models.DecimalField(max_digits=14, decimal_places=2)
+    
+    class Meta:
+        # Also the index behind /api/price-trends/ reads
+        unique_together = ['period', 'county', 'category', 'period_start']
+    
+    def __str__(self):
+        return f"{self.category_id} {self.county or 'all'} {self.period} {self.period_start}"
@@ -0,0 +1,128 @@
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from . import metrics
+
+# The catalog version lives in the shared cache so a bump in one worker
+# invalidates every worker's page cache; pages themselves are kept in the
+# per-worker memory cache. Versions are timestamps that are only ever set,
+# never incremented: concurrent bumps can't lose one another (incr is a
+# read-modify-write on the file cache), and if the key is culled or the
+# cache is flushed the next version is still one no cached page carries.
+VERSION_KEY = 'catalog_version'
+
+
+def _version_cache():
+    return caches['default']
+
+
+def _page_cache():
+    return caches['pages']
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def catalog_version():
+    cache = _version_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached page and shared context"""
+    _version_cache().set(VERSION_KEY, _new_version(), None)
+
+
+def bump_catalog_version_on_commit():
+    transaction.on_commit(bump_catalog_version)
+
+
+def _request_version(request):
+    # Read the shared counter at most once per request
+    if not hasattr(request, '_catalog_version'):
+        request._catalog_version = catalog_version()
+    return request._catalog_version
+
+
+def cache_key(request, name, params=None, extra=()):
+    """
+    Key for ``name`` under the current catalog version.
+
+    Only the GET parameters listed in ``params`` take part, with empty values
+    dropped and the rest sorted, so equivalent URLs share one entry.
+    """
+    normalized = sorted(
+        (key, value.strip())
+        for key, value in request.GET.items()
+        if params and key in params and value.strip()
+    )
+    raw = repr((normalized, tuple(extra)))
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'{name}:v{_request_version(request)}:{digest}'
+
+
+def shared_context(request, name, builder, params=None, extra=()):
+    """
+    Return the user-independent part of a page's context, cached per catalog version.
+
+    ``builder`` must return a picklable dict; personal bits (wishlist state,
+    recommendations) are added by the caller on every request.
+    """
+    key = cache_key(request, f'context:{name}', params, extra)
+    context = _page_cache().get(key)
+    metrics.cache_lookup('context', context is not None)
+    if context is None:
+        context = builder()
+        _page_cache().set(key, context, settings.PAGE_CACHE_TIMEOUT)
+    return context
+
+
+def _has_pending_messages(request):
+    if 'messages' in request.COOKIES:
+        return True
+    return settings.SESSION_COOKIE_NAME in request.COOKIES and bool(request.session.get('_messages'))
+
+
+def cache_public_page(params=None):
+    """
+    Serve whole responses from the page cache for anonymous GET requests.
+
+    Entries are keyed on the view, URL arguments and normalized ``params``
+    under the current catalog version, so catalog writes invalidate them.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or _has_pending_messages(request)
+            ):
+                return view_func(request, *args, **kwargs)
+
+            key = cache_key(request, f'page:{view_func.__name__}', params, (args, sorted(kwargs.items())))
+            cached = _page_cache().get(key)
+            metrics.cache_lookup('page', cached is not None)
+            if cached is not None:
+                response = cached
+                response['X-Page-Cache'] = 'hit'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                _page_cache().set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
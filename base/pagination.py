@@ -0,0 +1,164 @@
+import base64
+import json
+import math
+from collections.abc import Sequence
+from datetime import date, datetime
+from decimal import Decimal
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    """A page of keyset-paginated results, template-compatible with Django's Page"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _encode_value(value):
+    # Full precision so equality on the tie-breaking columns is exact
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'d': direction, 'v': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction, values = payload['d'], payload['v']
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def _parse_ordering(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def _clean_values(model, fields, values):
+    """Convert decoded cursor values with their ordering fields; tampered values raise InvalidCursor"""
+    cleaned = []
+    for (name, _), value in zip(fields, values):
+        # Only JSON scalars we could have written; None can't be compared on
+        if value is None or isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise InvalidCursor(value)
+        try:
+            field = model._meta.get_field(name)
+            value = field.to_python(value)
+            field.run_validators(value)
+        except (FieldDoesNotExist, ValidationError, ValueError, TypeError, OverflowError):
+            raise InvalidCursor(value)
+        if value is None or (isinstance(value, (float, Decimal)) and not math.isfinite(value)):
+            raise InvalidCursor(value)
+        cleaned.append(value)
+    return cleaned
+
+
+def _seek_filter(fields, values, reverse=False):
+    """
+    Build the "row comes after (values)" condition for an ordering.
+
+    Expands to (a > x) OR (a = x AND b > y) OR ..., with the comparison
+    flipped for descending fields (and for every field when ``reverse``).
+    """
+    condition = Q()
+    equal = Q()
+    for (name, descending), value in zip(fields, values):
+        lookup = 'lt' if descending != reverse else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=12):
+    """
+    Return a CursorPage for ``queryset`` sorted by ``ordering``.
+
+    ``ordering`` must end with a unique column (normally ``id``) so every row
+    has a stable position. Each page is a single indexed range scan with
+    LIMIT per_page + 1, however deep the page is.
+    """
+    fields = _parse_ordering(ordering)
+    direction = 'next'
+    if cursor:
+        direction, values = decode_cursor(cursor, len(fields))
+        values = _clean_values(queryset.model, fields, values)
+        queryset = queryset.filter(_seek_filter(fields, values, reverse=direction == 'prev'))
+
+    if direction == 'prev':
+        reversed_ordering = [name if descending else f'-{name}' for name, descending in fields]
+        rows = list(queryset.order_by(*reversed_ordering)[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_previous, has_next = has_more, True
+    else:
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = cursor is not None
+
+    def key(row):
+        return [getattr(row, name) for name, _ in fields]
+
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(key(rows[-1]), 'next') if rows and has_next else None,
+        previous_cursor=encode_cursor(key(rows[0]), 'prev') if rows and has_previous else None,
+    )
+
+
+def detach_page(page):
+    """
+    Make a Django Page safe to cache: evaluate its rows and drop the
+    paginator's reference to the full queryset (which pickling would
+    otherwise evaluate in its entirety).
+    """
+    page.object_list = list(page.object_list)
+    paginator = page.paginator
+    paginator.count, paginator.num_pages  # prime the cached properties
+    paginator.object_list = []
+    return page
+
+
+def windowed_count(queryset, limit):
+    """
+    Count rows up to ``limit`` + 1 without scanning the whole result set.
+
+    Returns (count, capped); when capped is True there are more than
+    ``limit`` rows and ``count`` equals ``limit``.
+    """
+    count = queryset.order_by().values('pk')[:limit + 1].count()
+    if count > limit:
+        return limit, True
+    return count, False
@@ -0,0 +1,164 @@
+"""
+Product price history and its daily/weekly rollups.
+
+Every price a product is created with or changed to is stored as a raw
+PriceHistory point. ``rollup_prices`` turns the points into PriceRollup rows
+(min/avg/median/max, sample count and listed volume per category, per
+county and overall) and then compacts: raw points go after
+PRICE_HISTORY['raw_days'], daily rollups after ['daily_days'], and weekly
+rollups are kept. /api/price-trends/ reads only the rollups.
+"""
+import statistics
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from time import time_ns
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from .models import PriceHistory, PriceRollup
+
+# Bumped after every rollup; the ETag of /api/price-trends/ responses
+VERSION_KEY = 'price_rollup_version'
+
+CENT = Decimal('0.01')
+
+
+def normalize_county(location):
+    """The same normalization the marketplace stats use, '' for unknown"""
+    return (location or '').strip().lower()
+
+
+def history_entry(product, recorded_at=None):
+    return PriceHistory(
+        product=product,
+        category_id=product.category_id,
+        county=normalize_county(product.location),
+        price=product.price,
+        quantity=product.quantity,
+        recorded_at=recorded_at or timezone.now(),
+    )
+
+
+def record_price(product):
+    history_entry(product).save()
+
+
+def rollup_version():
+    cache = caches['default']
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time_ns()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_rollup_version():
+    # A timestamp rather than a counter (as for the catalog version in
+    # base/page_cache.py): an evicted key can't bring back an old ETag
+    caches['default'].set(VERSION_KEY, time_ns(), None)
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _summary(points):
+    prices = sorted(price for price, _ in points)
+    return {
+        'min_price': prices[0],
+        'avg_price': (sum(prices) / len(prices)).quantize(CENT),
+        'median_price': Decimal(statistics.median(prices)).quantize(CENT),
+        'max_price': prices[-1],
+        'samples': len(prices),
+        'volume': sum(quantity for _, quantity in points),
+    }
+
+
+def rollup_prices(since=None, now=None):
+    """
+    Recompute the rollups from ``since`` (a date; default the last rolled-up
+    day) through today, then compact old rows. Returns the rollups written.
+
+    The week containing ``since`` is recomputed from its Monday, so only
+    the raw points of the last run's week onwards are read. Raw points are
+    only known to be complete from the raw-retention horizon on; before it,
+    existing rollups are kept and only missing ones are added, so an early
+    ``since`` can't replace compacted history with partial data.
+    """
+    now = now or timezone.now()
+    retention = settings.PRICE_HISTORY
+    horizon = timezone.localdate(now - timedelta(days=retention['raw_days'])) + timedelta(days=1)
+    if since is None:
+        since = PriceRollup.objects.filter(period='day').aggregate(last=Max('period_start'))['last']
+    if since is None:
+        first = PriceHistory.objects.aggregate(first=Min('recorded_at'))['first']
+        if first is None:
+            return 0
+        since = timezone.localdate(first)
+    first_week = week_start(since)
+    window_start = timezone.make_aware(datetime.combine(first_week, time.min))
+
+    groups = defaultdict(list)
+    points = PriceHistory.objects.filter(recorded_at__gte=window_start).values_list(
+        'category_id', 'county', 'price', 'quantity', 'recorded_at'
+    )
+    for category_id, county, price, quantity, recorded_at in points.iterator(chunk_size=5000):
+        day = timezone.localdate(recorded_at)
+        periods = [('week', week_start(day))]
+        if day >= since:
+            periods.append(('day', day))
+        for period, start in periods:
+            groups[(period, start, category_id, '')].append((price, quantity))
+            if county:
+                groups[(period, start, category_id, county)].append((price, quantity))
+
+    kept = set()
+    if first_week < horizon:
+        kept = set(PriceRollup.objects.filter(
+            period_start__gte=first_week, period_start__lt=horizon
+        ).values_list('period', 'period_start', 'category_id', 'county'))
+    rollups = [
+        PriceRollup(period=period, period_start=start, category_id=category_id, county=county, **_summary(points))
+        for (period, start, category_id, county), points in groups.items()
+        if (period, start, category_id, county) not in kept
+    ]
+    with transaction.atomic():
+        PriceRollup.objects.filter(period='day', period_start__gte=max(since, horizon)).delete()
+        PriceRollup.objects.filter(period='week', period_start__gte=max(first_week, horizon)).delete()
+        PriceRollup.objects.bulk_create(rollups, batch_size=1000)
+
+        # Compact: raw points and daily rollups past retention are already
+        # represented by the coarser rollups
+        raw_cutoff = min(now - timedelta(days=retention['raw_days']), window_start)
+        PriceHistory.objects.filter(recorded_at__lt=raw_cutoff).delete()
+        daily_cutoff = timezone.localdate(now) - timedelta(days=retention['daily_days'])
+        PriceRollup.objects.filter(period='day', period_start__lt=daily_cutoff).delete()
+        transaction.on_commit(bump_rollup_version)
+    return len(rollups)
+
+
+def price_series(period, county='', category_id=None, since=None):
+    """
+    [(category id, category name, [[start, min, avg, median, max, samples, volume], ...]), ...]
+
+    One read over the (period, county, category, period_start) unique index.
+    """
+    rows = PriceRollup.objects.filter(period=period, county=county)
+    if category_id is not None:
+        rows = rows.filter(category_id=category_id)
+    if since is not None:
+        rows = rows.filter(period_start__gte=since)
+    rows = rows.order_by('category_id', 'period_start').values_list(
+        'category_id', 'category__name', 'period_start',
+        'min_price', 'avg_price', 'median_price', 'max_price', 'samples', 'volume',
+    )
+    series = []
+    for category_id, name, start, *values in rows:
+        if not series or series[-1][0] != category_id:
+            series.append((category_id, name, []))
+        series[-1][2].append([start.isoformat()] + [float(v) if isinstance(v, Decimal) else v for v in values])
+    return series
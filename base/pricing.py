@@ -0,0 +1,129 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from .ai_service import AgriAI, PRICING_MODEL_VERSION
+from .models import Product, PriceSuggestion
+from .page_cache import bump_catalog_version_on_commit
+
+
+def refresh_price_suggestions(products):
+    """
+    Recompute and store the current AgriAI suggestion for the given products.
+
+    The previous current row of each product is kept as history; returns the
+    new PriceSuggestion objects keyed by product id.
+    """
+    products = list(products)
+    if not products:
+        return {}
+
+    suggestions = [
+        PriceSuggestion(
+            product=product,
+            suggested_price=data['suggested_price'],
+            confidence_score=round(data['confidence_score'], 2),
+            factors_considered=data['factors_considered'],
+            price_label=data['price_label'],
+            model_version=PRICING_MODEL_VERSION,
+            is_current=True,
+        )
+        for product, data in zip(products, AgriAI.calculate_optimal_prices(products))
+    ]
+
+    with transaction.atomic():
+        PriceSuggestion.objects.filter(
+            product_id__in=[p.id for p in products],
+            is_current=True
+        ).update(is_current=False)
+        PriceSuggestion.objects.bulk_create(suggestions)
+        # Cached pages show the suggestions (bulk writes send no signals)
+        bump_catalog_version_on_commit()
+
+    for product in products:
+        product._loaded_pricing_state = product.pricing_state()
+    return {suggestion.product_id: suggestion for suggestion in suggestions}
+
+
+def _refresh_in_batches(products, batch_size):
+    batch = []
+    total = 0
+    for product in products.order_by('id').iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            refresh_price_suggestions(batch)
+            total += len(batch)
+            batch = []
+    refresh_price_suggestions(batch)
+    return total + len(batch)
+
+
+def refresh_category_suggestions(category_id, batch_size=500):
+    """Re-price every available product in a category, e.g. after a new MarketTrend"""
+    products = Product.objects.filter(category_id=category_id, is_available=True)
+    return _refresh_in_batches(products, batch_size)
+
+
+def refresh_stale_suggestions(batch_size=500, refresh_all=False):
+    """
+    Re-price available products without an up-to-date snapshot: none yet,
+    or one written by an older PRICING_MODEL_VERSION. Returns the number
+    re-priced; ``refresh_all`` re-prices every available product.
+    """
+    products = Product.objects.filter(is_available=True)
+    if not refresh_all:
+        up_to_date = PriceSuggestion.objects.filter(
+            product=OuterRef('pk'),
+            is_current=True,
+            model_version=PRICING_MODEL_VERSION
+        )
+        products = products.exclude(Exists(up_to_date))
+    return _refresh_in_batches(products, batch_size)
+
+
+def get_current_suggestions(products):
+    """
+    Return {product_id: PriceSuggestion} for the given products.
+
+    Read-only: one indexed lookup of the stored snapshots. Snapshots are
+    written by the price_products job when a product's pricing inputs
+    change; missing or outdated ones (after a PRICING_MODEL_VERSION bump)
+    are filled in by refresh_stale_suggestions, run by the
+    refresh_price_suggestions job and command.
+    """
+    return {
+        suggestion.product_id: suggestion
+        for suggestion in PriceSuggestion.objects.filter(
+            product_id__in=[p.id for p in products],
+            is_current=True
+        )
+    }
+
+
+def prune_price_suggestions(keep=None, max_age_days=None):
+    """
+    Apply the retention policy to historical (non-current) suggestions.
+
+    Keeps at most ``keep`` history rows per product and drops anything older
+    than ``max_age_days``. Current suggestions are never removed. Returns the
+    number of rows deleted.
+    """
+    keep = settings.PRICE_SUGGESTION_HISTORY if keep is None else keep
+    max_age_days = settings.PRICE_SUGGESTION_RETENTION_DAYS if max_age_days is None else max_age_days
+
+    history = PriceSuggestion.objects.filter(is_current=False)
+    deleted, _ = history.filter(
+        created_at__lt=timezone.now() - timedelta(days=max_age_days)
+    ).delete()
+
+    overflow = list(
+        history.annotate(
+            position=Window(RowNumber(), partition_by='product_id', order_by='-created_at')
+        ).filter(position__gt=keep).values_list('id', flat=True)
+    )
+    for start in range(0, len(overflow), 500):
+        count, _ = PriceSuggestion.objects.filter(id__in=overflow[start:start + 500]).delete()
+        deleted += count
+    return deleted
@@ -0,0 +1,112 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Collapse IN (%s, %s, ...) and VALUES lists so batches of any size share a shape
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Counters recording in the current context. A ContextVar rather than
+# per-connection state: async views run their ORM calls through
+# sync_to_async, in other threads with their own connections, but in a copy
+# of the request's context.
+_active = ContextVar('query_counters', default=())
+
+
+def fingerprint(sql):
+    """The shape of a statement: parameter lists collapsed, whitespace normalized"""
+    return _WHITESPACE.sub(' ', _PLACEHOLDER_LIST.sub('(...)', sql)).strip()
+
+
+def _dispatch(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection; times statements for the active counters"""
+    counters = _active.get()
+    if not counters:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for counter in counters:
+            counter.add(sql, params, many, context, duration)
+
+
+def _install(connection):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+class QueryCounter:
+    """Number of SQL statements and their total time, collected through an execute wrapper"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+
+    def add(self, sql, params, many, context, duration):
+        self.count += 1
+        self.total_time += duration
+        self.observe(sql, params, many, context, duration)
+
+    def observe(self, sql, params, many, context, duration):
+        pass
+
+    @contextmanager
+    def record(self):
+        """Record every statement run inside the block, on any connection and in sync_to_async threads"""
+        # Connections opened before this module was imported
+        for alias in connections:
+            _install(connections[alias])
+        token = _active.set(_active.get() + (self,))
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+
+class QueryRecorder(QueryCounter):
+    """
+    Cheap per-request SQL statistics: counters, statement shapes and slow
+    statements, never the full query log, so it is safe to enable on
+    sampled production traffic.
+    """
+
+    def __init__(self, slow_query_ms=100):
+        super().__init__()
+        self.slow_query_ms = slow_query_ms
+        self.shapes = Counter()
+        self.slow = []
+
+    def observe(self, sql, params, many, context, duration):
+        self.shapes[fingerprint(sql)] += 1
+        if duration * 1000 >= self.slow_query_ms:
+            self.slow.append((context['connection'].alias, sql, params, many, duration))
+
+    def repeated(self, threshold):
+        """(shape, count) pairs executed more than ``threshold`` times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def explain(self, alias, sql, params):
+        """The query plan of a SELECT as text, or None"""
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+        connection = connections[alias]
+        prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception as e:
+            return f'EXPLAIN failed: {e}'
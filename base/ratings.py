@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models import FloatField
+from .models import Product, ProductReview
+
+RATING_FIELDS = {stars: f'rating_{stars}_count' for stars in range(1, 6)}
+
+
+def _average_expression():
+    total = sum((F(field) * stars for stars, field in RATING_FIELDS.items()), Value(0))
+    return Coalesce(
+        Cast(total, FloatField()) / NullIf(F('review_count'), 0),
+        Value(0.0)
+    )
+
+
+def apply_rating_change(product_id, rating, delta):
+    """Add (delta=1) or remove (delta=-1) one rating from a product's aggregates"""
+    if product_id is None or rating not in RATING_FIELDS:
+        return
+    with transaction.atomic():
+        # Counts first; the average is then derived from the updated buckets
+        Product.objects.filter(pk=product_id).update(**{
+            'review_count': F('review_count') + delta,
+            RATING_FIELDS[rating]: F(RATING_FIELDS[rating]) + delta,
+        })
+        Product.objects.filter(pk=product_id).update(avg_rating=_average_expression())
+
+
+def move_rating(old, new):
+    """Apply an edited review, given (product_id, rating) before and after"""
+    if old == new:
+        return
+    with transaction.atomic():
+        apply_rating_change(*old, -1)
+        apply_rating_change(*new, 1)
+
+
+def rebuild_rating_aggregates(batch_size=1000):
+    """Recompute every product's aggregates from ProductReview, returns the number of products updated"""
+    stats = {
+        row['product_id']: row
+        for row in ProductReview.objects.values('product_id').annotate(
+            total=Count('id'),
+            **{field: Count('id', filter=Q(rating=stars)) for stars, field in RATING_FIELDS.items()}
+        ).order_by()
+    }
+    fields = ['avg_rating', 'review_count', *RATING_FIELDS.values()]
+
+    updated = 0
+    batch = []
+    for product in Product.objects.only('id', *fields).order_by('id').iterator(chunk_size=batch_size):
+        row = stats.get(product.id)
+        counts = {field: row[field] if row else 0 for field in RATING_FIELDS.values()}
+        total = row['total'] if row else 0
+        average = (
+            sum(stars * counts[field] for stars, field in RATING_FIELDS.items()) / total if total else 0.0
+        )
+        current = [getattr(product, field) for field in fields]
+        for field, value in counts.items():
+            setattr(product, field, value)
+        product.review_count = total
+        product.avg_rating = average
+        if current != [getattr(product, field) for field in fields]:
+            batch.append(product)
+        if len(batch) >= batch_size:
+            Product.objects.bulk_update(batch, fields)
+            updated += len(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    return updated
@@ -0,0 +1,275 @@
+"""
+Item-item collaborative filtering for product recommendations.
+
+``build_model`` turns Order, Wishlist and SearchHistory co-occurrence into a
+cosine item-item similarity matrix, keeps the top-k neighbours of every
+product and saves it as a compressed .npz file. Workers load that file once
+(and again whenever it is rebuilt), so a user's recommendations are a sum
+over the neighbour lists of the handful of products they interacted with.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+
+from .models import Order, Product, SearchHistory, Wishlist
+from .search import search_products
+
+logger = logging.getLogger(__name__)
+
+# Interaction weights before log damping
+ORDER_WEIGHT = 5.0
+WISHLIST_WEIGHT = 3.0
+SEARCH_WEIGHT = 1.0
+
+# How often a worker checks whether the model file was rebuilt
+RELOAD_INTERVAL = 60
+
+
+class ItemSimilarityModel:
+    """A loaded similarity model: product ids, neighbour matrix and search-term mapping"""
+
+    def __init__(self, item_ids, similarity, query_terms, query_items, built_at):
+        self.item_ids = item_ids
+        self.similarity = similarity.tocsr()
+        self.query_items = query_items.tocsr()
+        self.index = {int(item_id): i for i, item_id in enumerate(item_ids)}
+        self.query_index = {str(term): i for i, term in enumerate(query_terms)}
+        self.built_at = built_at
+
+    def save(self, path):
+        """Write atomically, so workers never load a half-written file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz')
+        os.close(fd)
+        np.savez_compressed(
+            tmp,
+            item_ids=self.item_ids,
+            sim_data=self.similarity.data, sim_indices=self.similarity.indices,
+            sim_indptr=self.similarity.indptr, sim_shape=self.similarity.shape,
+            query_terms=np.array(sorted(self.query_index, key=self.query_index.get), dtype=str),
+            query_data=self.query_items.data, query_indices=self.query_items.indices,
+            query_indptr=self.query_items.indptr, query_shape=self.query_items.shape,
+            built_at=self.built_at,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            similarity = sparse.csr_matrix(
+                (data['sim_data'], data['sim_indices'], data['sim_indptr']), shape=tuple(data['sim_shape'])
+            )
+            query_items = sparse.csr_matrix(
+                (data['query_data'], data['query_indices'], data['query_indptr']), shape=tuple(data['query_shape'])
+            )
+            return cls(data['item_ids'], similarity, data['query_terms'], query_items, float(data['built_at']))
+
+    def scores(self, history):
+        """
+        Candidate (item indices, scores) for a {item index: weight} history.
+
+        Only the neighbour lists of the history items are touched, so the
+        cost is O(len(history) * top_k) regardless of catalog size.
+        """
+        if not history:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows = np.fromiter(history.keys(), dtype=np.int64)
+        weights = np.fromiter(history.values(), dtype=np.float64)
+        neighbours = self.similarity[rows]
+        columns = neighbours.indices
+        values = neighbours.data * np.repeat(weights, np.diff(neighbours.indptr))
+        candidates, inverse = np.unique(columns, return_inverse=True)
+        totals = np.bincount(inverse, weights=values, minlength=len(candidates))
+        keep = ~np.isin(candidates, rows)
+        return candidates[keep], totals[keep]
+
+
+def normalize_query(query):
+    return ' '.join(query.lower().split())
+
+
+def _resolve_queries(max_queries, results_per_query):
+    """The most frequent search terms and the products each one finds"""
+    counts = Counter(
+        normalize_query(query)
+        for query in SearchHistory.objects.filter(user__isnull=False).values_list('query', flat=True).iterator()
+    )
+    counts.pop('', None)
+    available = Product.objects.filter(is_available=True).only('id')
+    resolved = {}
+    for term, _ in counts.most_common(max_queries):
+        ids = [p.id for p in search_products(available, term)[:results_per_query]]
+        if ids:
+            resolved[term] = ids
+    return resolved
+
+
+def _top_k_rows(matrix, k):
+    """Keep the k largest entries of every row of a CSR matrix"""
+    matrix = matrix.tocsr()
+    data, indices, indptr = [], [], [0]
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        row_data = matrix.data[start:end]
+        row_indices = matrix.indices[start:end]
+        if len(row_data) > k:
+            top = np.argpartition(-row_data, k)[:k]
+            row_data, row_indices = row_data[top], row_indices[top]
+        data.append(row_data)
+        indices.append(row_indices)
+        indptr.append(indptr[-1] + len(row_data))
+    return sparse.csr_matrix(
+        (np.concatenate(data) if data else [], np.concatenate(indices) if indices else [], indptr),
+        shape=matrix.shape,
+    )
+
+
+def build_model(top_k=None, max_queries=2000, results_per_query=20, chunk_size=2000):
+    """Build the item-item similarity model from the interaction tables"""
+    top_k = top_k or settings.RECOMMENDER_TOP_K
+    query_products = _resolve_queries(max_queries, results_per_query)
+
+    interactions = []  # (user id, product id, weight)
+    interactions += [
+        (user_id, product_id, ORDER_WEIGHT)
+        for user_id, product_id in Order.objects.exclude(status='cancelled').values_list('buyer_id', 'product_id')
+    ]
+    interactions += [
+        (user_id, product_id, WISHLIST_WEIGHT)
+        for user_id, product_id in Wishlist.objects.values_list('user_id', 'product_id')
+    ]
+    for user_id, query in SearchHistory.objects.filter(user__isnull=False).values_list('user_id', 'query').iterator():
+        for product_id in query_products.get(normalize_query(query), ()):
+            interactions.append((user_id, product_id, SEARCH_WEIGHT))
+
+    item_ids = np.array(sorted({product_id for _, product_id, _ in interactions}), dtype=np.int64)
+    user_ids = sorted({user_id for user_id, _, _ in interactions})
+    item_index = {int(item_id): i for i, item_id in enumerate(item_ids)}
+    user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    if interactions:
+        users, items, weights = zip(*interactions)
+        ratings = sparse.coo_matrix(
+            (np.array(weights), ([user_index[u] for u in users], [item_index[i] for i in items])),
+            shape=(len(user_ids), len(item_ids)),
+        ).tocsc()
+        ratings.sum_duplicates()
+        ratings.data = np.log1p(ratings.data)
+        # Cosine similarity: unit-length item columns, then R^T R in row chunks
+        norms = np.sqrt(np.asarray(ratings.multiply(ratings).sum(axis=0)).ravel())
+        norms[norms == 0] = 1
+        ratings = ratings @ sparse.diags(1 / norms)
+        transposed = ratings.T.tocsr()
+        blocks = []
+        for start in range(0, len(item_ids), chunk_size):
+            block = (transposed[start:start + chunk_size] @ ratings).tocoo()
+            off_diagonal = block.row + start != block.col
+            block = sparse.csr_matrix(
+                (block.data[off_diagonal], (block.row[off_diagonal], block.col[off_diagonal])), shape=block.shape
+            )
+            blocks.append(_top_k_rows(block, top_k))
+        similarity = sparse.vstack(blocks).tocsr()
+        similarity.eliminate_zeros()
+        similarity.data = similarity.data.astype(np.float32)
+    else:
+        similarity = sparse.csr_matrix((0, 0), dtype=np.float32)
+
+    terms = sorted(query_products)
+    query_rows, query_cols = [], []
+    for row, term in enumerate(terms):
+        for product_id in query_products[term]:
+            if product_id in item_index:
+                query_rows.append(row)
+                query_cols.append(item_index[product_id])
+    query_items = sparse.csr_matrix(
+        (np.ones(len(query_rows), dtype=np.float32), (query_rows, query_cols)),
+        shape=(len(terms), len(item_ids)),
+    )
+    return ItemSimilarityModel(item_ids, similarity, np.array(terms, dtype=str), query_items, time.time())
+
+
+def rebuild_model(path=None, **options):
+    model = build_model(**options)
+    model.save(path or settings.RECOMMENDER_MODEL_PATH)
+    _loaded['checked'] = 0.0
+    return model
+
+
+_loaded = {'model': None, 'mtime': None, 'checked': 0.0}
+_load_lock = threading.Lock()
+
+
+def get_model():
+    """The current model for this process, reloaded when the file changes; None if never built"""
+    now = time.monotonic()
+    if now - _loaded['checked'] < RELOAD_INTERVAL:
+        return _loaded['model']
+    with _load_lock:
+        _loaded['checked'] = now
+        path = settings.RECOMMENDER_MODEL_PATH
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return _loaded['model']
+        if mtime != _loaded['mtime']:
+            try:
+                _loaded['model'] = ItemSimilarityModel.load(path)
+                _loaded['mtime'] = mtime
+            except Exception:
+                logger.exception("Could not load recommender model %s", path)
+        return _loaded['model']
+
+
+def user_history(user, model, recent_searches=10):
+    """The user's interactions as {item index: weight}, restricted to items the model knows"""
+    history = Counter()
+    for product_id in Order.objects.filter(buyer=user).exclude(status='cancelled').values_list('product_id', flat=True):
+        if product_id in model.index:
+            history[model.index[product_id]] += ORDER_WEIGHT
+    for product_id in Wishlist.objects.filter(user=user).values_list('product_id', flat=True):
+        if product_id in model.index:
+            history[model.index[product_id]] += WISHLIST_WEIGHT
+    queries = SearchHistory.objects.filter(user=user).order_by('-created_at').values_list('query', flat=True)
+    for query in queries[:recent_searches]:
+        row = model.query_index.get(normalize_query(query))
+        if row is not None:
+            start, end = model.query_items.indptr[row], model.query_items.indptr[row + 1]
+            for item in model.query_items.indices[start:end]:
+                history[int(item)] += SEARCH_WEIGHT
+    return {item: float(np.log1p(weight)) for item, weight in history.items()}
+
+
+def recommend_for_user(user, limit=6):
+    """
+    Up to ``limit`` available products for ``user``, best first.
+
+    Neighbours of the user's ordered, wishlisted and searched products come
+    first; popular products fill the rest (and serve users with no history).
+    """
+    recommended = []
+    model = get_model()
+    if model is not None and user.is_authenticated:
+        candidates, scores = model.scores(user_history(user, model))
+        if len(candidates):
+            # Over-fetch a little: the model may predate some products going unavailable
+            top = candidates[np.argsort(-scores, kind='stable')[:limit * 3]]
+            product_ids = [int(model.item_ids[i]) for i in top]
+            products = Product.objects.filter(id__in=product_ids, is_available=True).select_related('category')
+            by_id = {product.id: product for product in products}
+            recommended = [by_id[i] for i in product_ids if i in by_id][:limit]
+
+    if len(recommended) < limit:
+        popular = Product.objects.filter(is_available=True).exclude(
+            id__in=[p.id for p in recommended]
+        ).select_related('category').order_by('-review_count', '-avg_rating', '-id')
+        recommended.extend(popular[:limit - len(recommended)])
+    return recommended
+
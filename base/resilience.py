@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Monotonic deadline of the current request (or job), or None for no budget
+_deadline = ContextVar('groq_deadline', default=None)
+
+
+class CircuitOpen(Exception):
+    """The upstream is considered down; callers should use their fallback"""
+
+
+class DeadlineExceeded(Exception):
+    """Too little of the request's latency budget is left for another upstream call"""
+
+
+@contextmanager
+def latency_budget(seconds):
+    """
+    Bound the total time upstream calls may take inside the block.
+
+    Nested budgets can only shrink the deadline, never extend it.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget():
+    """Seconds left in the current budget, or None when there is none"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_timeout(timeout, minimum=0.5):
+    """
+    Timeout for the next upstream call: ``timeout`` capped by the remaining
+    budget. Raises DeadlineExceeded when less than ``minimum`` seconds are left.
+    """
+    remaining = remaining_budget()
+    if remaining is None:
+        return timeout
+    if remaining < minimum:
+        raise DeadlineExceeded(f'{remaining:.2f}s of latency budget left')
+    return min(timeout, remaining)
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker.
+
+    Opens after ``failure_threshold`` consecutive failures (calls slower than
+    ``slow_call_seconds`` count as failures). While open every call is
+    refused; after ``reset_timeout`` seconds a single half-open probe is let
+    through, and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, slow_call_seconds=5.0, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now; may move an open circuit to half-open"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self, duration):
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit %s opened after %d consecutive failures", self.name, self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self):
+        """End a call without a verdict on the upstream; a half-open circuit lets the next call probe"""
+        with self._lock:
+            self._probing = False
+
+    @contextmanager
+    def guard(self):
+        """Run the block as one call through the breaker, raising CircuitOpen when refused"""
+        if not self.allow():
+            raise CircuitOpen(self.name)
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (e.g. asyncio.CancelledError) or interrupted
+            self.release()
+            raise
+        self.record_success(time.monotonic() - started)
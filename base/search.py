@@ -0,0 +1,167 @@
+import re
+from django.db import connections, router, transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# Side table holding the searchable text for every product. On SQLite this is
+# an FTS5 virtual table keyed by the product id (rowid); on Postgres it is a
+# plain table with a GIN-indexed tsvector column. Both are created by
+# migration 0007, which also makes the FTS5 ``rank`` column a weighted BM25:
+# name matches count most, then category, then description. The SQLite table
+# is also mapped read-only as ProductSearchEntry, so searches join it.
+SQLITE_TABLE = 'base_product_fts'
+POSTGRES_TABLE = 'base_product_search'
+POSTGRES_CONFIG = 'simple'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_backend(connection=None):
+    """Return 'sqlite', 'postgresql' or None for ``connection`` (default: the one Product writes go to)"""
+    vendor = (connection or _write_connection()).vendor
+    if vendor in ('sqlite', 'postgresql'):
+        return vendor
+    return None
+
+
+def _write_connection():
+    from .models import Product
+
+    return connections[router.db_for_write(Product)]
+
+
+def _rows(products):
+    return [
+        (p.id, p.name or '', p.description or '', p.category.name if p.category_id else '')
+        for p in products
+    ]
+
+
+def index_products(products):
+    """Insert or refresh the index entries for the given products"""
+    connection = _write_connection()
+    backend = search_backend(connection)
+    if backend is None:
+        return
+    rows = _rows(products)
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.executemany(
+                f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s",
+                [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_TABLE}(rowid, name, description, category) "
+                "VALUES (%s, %s, %s, %s)",
+                rows
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {POSTGRES_TABLE}(product_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'C') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'B')) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows
+            )
+
+
+def remove_products(product_ids):
+    """Drop the index entries for the given product ids"""
+    connection = _write_connection()
+    backend = search_backend(connection)
+    if backend is None or not product_ids:
+        return
+    table, key = (SQLITE_TABLE, 'rowid') if backend == 'sqlite' else (POSTGRES_TABLE, 'product_id')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {table} WHERE {key} = %s",
+            [(pk,) for pk in product_ids]
+        )
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Rebuild the whole index from the Product table, returns the number of rows indexed.
+
+    Runs in one transaction, so searches keep seeing the old index until the
+    new one is complete.
+    """
+    from .models import Product
+
+    connection = _write_connection()
+    backend = search_backend(connection)
+    if backend is None:
+        return 0
+
+    total = 0
+    batch = []
+    products = Product.objects.using(connection.alias).select_related('category').only(
+        'id', 'name', 'description', 'category__name'
+    ).order_by('id')
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE if backend == 'sqlite' else POSTGRES_TABLE}")
+        for product in products.iterator(chunk_size=batch_size):
+            batch.append(product)
+            if len(batch) >= batch_size:
+                index_products(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            index_products(batch)
+            total += len(batch)
+
+    if backend == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _tokens(query):
+    return TOKEN_RE.findall(query.lower())
+
+
+def search_products(products, query):
+    """
+    Filter a Product queryset to full-text matches for ``query``.
+
+    Every search term is treated as a prefix and all terms must match. The
+    returned queryset carries a ``search_rank`` annotation (higher is better)
+    and is ordered by it; callers may re-order it for other sort modes.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return products.none()
+
+    # The FTS query runs wherever the router sends this queryset (e.g. a replica)
+    backend = search_backend(connections[products.db])
+    table = products.model._meta.db_table
+    if backend == 'sqlite':
+        match = ' '.join('"%s"*' % token for token in tokens)
+        # One join on the FTS table; its rank is only defined under the MATCH
+        return products.filter(search_entry__document__match=match).annotate(
+            search_rank=-F('search_entry__rank')
+        ).order_by('-search_rank', '-id')
+
+    if backend == 'postgresql':
+        tsquery = ' & '.join('%s:*' % token for token in tokens)
+        document_matches = f"document @@ to_tsquery('{POSTGRES_CONFIG}', %s)"
+        return products.filter(
+            id__in=RawSQL(f'SELECT product_id FROM {POSTGRES_TABLE} WHERE {document_matches}', [tsquery])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank_cd(document, to_tsquery('{POSTGRES_CONFIG}', %s)) "
+                f'FROM {POSTGRES_TABLE} WHERE {POSTGRES_TABLE}.product_id = {table}.id',
+                [tsquery], output_field=FloatField()
+            )
+        ).order_by('-search_rank', '-id')
+
+    # No full-text support on this database, fall back to substring matching
+    return products.filter(
+        Q(name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(category__name__icontains=query)
+    )
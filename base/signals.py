@@ -0,0 +1,130 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Product, ProductCategory, MarketTrend, ProductReview, Testimonial
+from . import search, ratings, stats, price_history
+from .jobs import enqueue_on_commit
+from .page_cache import bump_catalog_version_on_commit
+from .backends import log_login
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    """Keep the full-text index in sync with product edits"""
+    if raw:
+        return
+    search.index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.id])
+
+
+@receiver(post_save, sender=ProductCategory)
+def reindex_category_products(sender, instance, created=False, raw=False, **kwargs):
+    """Category names are stored in the index, so refresh its products on rename"""
+    if raw or created:
+        return
+    products = Product.objects.filter(category=instance).select_related('category').only(
+        'id', 'name', 'description', 'category__name'
+    )
+    search.index_products(products)
+
+
+@receiver(post_save, sender=Product)
+def record_price_history(sender, instance, created=False, raw=False, **kwargs):
+    """Store a price point on creation and on every price change"""
+    # Connected before refresh_product_price_suggestion, which resets the loaded state
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_pricing_state', None)
+    if created or loaded is None or loaded[0] != instance.pricing_state()[0]:
+        price_history.record_price(instance)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_price_suggestion(sender, instance, created=False, raw=False, **kwargs):
+    """Queue a re-pricing only when one of the product's pricing inputs changed"""
+    if raw:
+        return
+    if created or instance.pricing_changed():
+        enqueue_on_commit('price_products', {'product_ids': [instance.id]})
+        instance._loaded_pricing_state = instance.pricing_state()
+
+
+@receiver(post_save, sender=MarketTrend)
+def refresh_trend_price_suggestions(sender, instance, created=False, raw=False, **kwargs):
+    """A new trend changes the trend multiplier for the whole category"""
+    if raw or not created:
+        return
+    enqueue_on_commit('reprice_category', {'category_id': instance.category_id})
+
+
+@receiver(post_save, sender=Product)
+def queue_image_processing(sender, instance, created=False, raw=False, **kwargs):
+    """Thumbnails and WebP variants are made by a job, off the upload request"""
+    if raw:
+        return
+    name = instance.image_name()
+    if name and name != getattr(instance, '_loaded_image_name', None):
+        enqueue_on_commit('process_product_image', {'product_id': instance.id})
+    instance._loaded_image_name = name
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_aggregates(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.product_id, instance.rating)
+    if created:
+        ratings.apply_rating_change(*current, 1)
+    else:
+        ratings.move_rating(getattr(instance, '_loaded_rating', current), current)
+    instance._loaded_rating = current
+
+
+@receiver(post_delete, sender=ProductReview)
+def remove_rating_aggregates(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_rating', (instance.product_id, instance.rating))
+    ratings.apply_rating_change(*loaded, -1)
+
+
+@receiver(post_save, sender=Product)
+def update_marketplace_stats(sender, instance, raw=False, **kwargs):
+    """Move the product's contribution when availability, farmer, county or category change"""
+    if raw:
+        return
+    current = instance.stats_contribution()
+    stats.move_contribution(getattr(instance, '_loaded_stats_contribution', None), current)
+    instance._loaded_stats_contribution = current
+
+
+@receiver(pre_delete, sender=Product)
+def load_marketplace_stats(sender, instance, **kwargs):
+    """The row's contribution has to be read while it still exists"""
+    instance.load_stats_contribution()
+
+
+@receiver(post_delete, sender=Product)
+def remove_marketplace_stats(sender, instance, **kwargs):
+    stats.apply_contribution(getattr(instance, '_loaded_stats_contribution', None), -1)
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductCategory)
+@receiver([post_save, post_delete], sender=MarketTrend)
+@receiver([post_save, post_delete], sender=ProductReview)
+@receiver([post_save, post_delete], sender=Testimonial)
+def invalidate_page_cache(sender, raw=False, **kwargs):
+    """Any catalog write invalidates the cached public pages"""
+    if raw:
+        return
+    bump_catalog_version_on_commit()
+
+
+@receiver(user_logged_in)
+def record_login(sender, request, user, **kwargs):
+    """One LoginHistory row per successful login, whichever view or backend did it"""
+    if request is not None:
+        log_login(user, request, True)
@@ -0,0 +1,128 @@
+from collections import Counter, defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import Product, MarketplaceStats, MarketplaceStatsMember
+
+GLOBAL_SCOPE = 'all'
+
+# Which counter on MarketplaceStats each member kind feeds
+DISTINCT_COUNTERS = {
+    'farmer': 'active_farmers',
+    'county': 'counties_covered',
+}
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def _scopes(category_id):
+    return [GLOBAL_SCOPE, category_scope(category_id)]
+
+
+def _members(farmer_id, county):
+    members = [('farmer', str(farmer_id))]
+    if county:
+        members.append(('county', county))
+    return members
+
+
+def _ensure_scope(scope):
+    MarketplaceStats.objects.get_or_create(scope=scope)
+
+
+def _add_member(scope, kind, value):
+    """Count one more product for a member, returns True if it is new to the scope"""
+    members = MarketplaceStatsMember.objects.filter(scope=scope, kind=kind, value=value)
+    if members.update(product_count=F('product_count') + 1):
+        return False
+    try:
+        with transaction.atomic():
+            MarketplaceStatsMember.objects.create(scope=scope, kind=kind, value=value, product_count=1)
+        return True
+    except IntegrityError:
+        # Created concurrently by another worker
+        members.update(product_count=F('product_count') + 1)
+        return False
+
+
+def _remove_member(scope, kind, value):
+    """Count one product less for a member, returns True if it left the scope"""
+    members = MarketplaceStatsMember.objects.filter(scope=scope, kind=kind, value=value)
+    members.update(product_count=F('product_count') - 1)
+    deleted, _ = members.filter(product_count__lte=0).delete()
+    return bool(deleted)
+
+
+def apply_contribution(contribution, delta):
+    """Add (delta=1) or remove (delta=-1) one available product from the counters"""
+    if contribution is None:
+        return
+    category_id, farmer_id, county = contribution
+    with transaction.atomic():
+        for scope in _scopes(category_id):
+            _ensure_scope(scope)
+            changes = {'total_products': F('total_products') + delta}
+            for kind, value in _members(farmer_id, county):
+                changed = _add_member(scope, kind, value) if delta > 0 else _remove_member(scope, kind, value)
+                if changed:
+                    counter = DISTINCT_COUNTERS[kind]
+                    changes[counter] = F(counter) + delta
+            MarketplaceStats.objects.filter(scope=scope).update(**changes)
+
+
+def move_contribution(old, new):
+    if old == new:
+        return
+    with transaction.atomic():
+        apply_contribution(old, -1)
+        apply_contribution(new, 1)
+
+
+def reconcile_stats():
+    """
+    Recompute every counter from the Product table and replace the stored ones.
+
+    Runs one grouped query; used by the reconcile_marketplace_stats job and
+    command to correct drift (e.g. from queryset.update() calls that bypass
+    signals).
+    """
+    totals = Counter()
+    members = defaultdict(Counter)
+    grouped = Product.objects.filter(is_available=True).values(
+        'category_id', 'farmer_id', 'location'
+    ).annotate(products=Count('id')).order_by()
+    for row in grouped.iterator():
+        county = (row['location'] or '').strip().lower() or None
+        for scope in _scopes(row['category_id']):
+            totals[scope] += row['products']
+            for kind, value in _members(row['farmer_id'], county):
+                members[(scope, kind)][value] += row['products']
+
+    stats = {
+        scope: MarketplaceStats(scope=scope, total_products=total)
+        for scope, total in totals.items()
+    }
+    member_rows = []
+    for (scope, kind), counts in members.items():
+        setattr(stats[scope], DISTINCT_COUNTERS[kind], len(counts))
+        member_rows.extend(
+            MarketplaceStatsMember(scope=scope, kind=kind, value=value, product_count=count)
+            for value, count in counts.items()
+        )
+    stats.setdefault(GLOBAL_SCOPE, MarketplaceStats(scope=GLOBAL_SCOPE))
+
+    with transaction.atomic():
+        MarketplaceStatsMember.objects.all().delete()
+        MarketplaceStats.objects.all().delete()
+        MarketplaceStats.objects.bulk_create(stats.values())
+        MarketplaceStatsMember.objects.bulk_create(member_rows, batch_size=1000)
+    return stats[GLOBAL_SCOPE]
+
+
+def get_stats(scope=GLOBAL_SCOPE):
+    """Counters for a scope with a single primary-key read"""
+    stats = MarketplaceStats.objects.filter(scope=scope).first()
+    if stats is None:
+        stats = MarketplaceStats(scope=scope)
+    return stats
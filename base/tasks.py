@@ -0,0 +1,66 @@
+import asyncio
+from .ai_service import AgriAI
+from .groq_service import async_groq_ai
+from .jobs import task, enqueue
+from .models import Product, ProductCategory
+from . import db_maintenance, images, price_history, pricing, recommender, stats
+
+
+@task('price_products')
+def price_products(product_ids):
+    products = Product.objects.filter(id__in=product_ids).select_related('category')
+    pricing.refresh_price_suggestions(products)
+
+
+@task('refresh_price_suggestions')
+def refresh_price_suggestions():
+    """Periodic sweep for missing or outdated snapshots, plus the retention policy"""
+    pricing.refresh_stale_suggestions()
+    pricing.prune_price_suggestions()
+
+
+@task('reprice_category')
+def reprice_category(category_id):
+    pricing.refresh_category_suggestions(category_id)
+
+
+@task('update_market_trends')
+def update_market_trends():
+    # New trends re-price their categories through the MarketTrend signal;
+    # refresh the cached AI insights as well
+    if AgriAI.update_market_trends():
+        enqueue('generate_market_insights')
+
+
+@task('generate_market_insights')
+def generate_market_insights(category_ids=None):
+    """Warm the LLM response cache with fresh insights, fetched concurrently"""
+    categories = ProductCategory.objects.order_by('name')
+    if category_ids is not None:
+        categories = categories.filter(id__in=category_ids)
+    asyncio.run(async_groq_ai.gather_market_insights(list(categories)))
+
+
+@task('reconcile_marketplace_stats')
+def reconcile_marketplace_stats():
+    stats.reconcile_stats()
+
+
+@task('build_recommendations')
+def build_recommendations():
+    recommender.rebuild_model()
+
+
+@task('rollup_price_history')
+def rollup_price_history():
+    price_history.rollup_prices()
+
+
+@task('process_product_image')
+def process_product_image(product_id):
+    images.process_product_image(product_id)
+
+
+@task('sqlite_maintenance')
+def sqlite_maintenance(analyze=False):
+    db_maintenance.run_maintenance(analyze=analyze)
@@ -0,0 +1,78 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.ai_service import AgriAI
+from base.models import MarketTrend, Product, ProductCategory
+
+from .utils import TEST_CACHES, make_product
+
+
+def no_noise(low, high, size):
+    return np.full(size, (low + high) / 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BatchPricingTests(TestCase):
+    def setUp(self):
+        farmer = User.objects.create_user('farmer', password='x')
+        self.vegetables = ProductCategory.objects.create(name='Vegetables')
+        self.fruits = ProductCategory.objects.create(name='Fruits')
+        for trend in ('decreasing', 'increasing'):  # the latest one counts
+            MarketTrend.objects.create(
+                category=self.vegetables, average_price=100, price_trend=trend, demand_level='high',
+                recommendation='',
+            )
+        self.products = [
+            make_product(farmer, self.vegetables, price=Decimal('100'), quality_grade='premium', location='Nairobi'),
+            make_product(farmer, self.fruits, price=Decimal('200'), quality_grade='standard', location='Kisumu'),
+            # 'Nairobi' is listed before 'Nakuru', so it wins
+            make_product(farmer, self.fruits, price=Decimal('50'), quality_grade='grade2', location='Nakuru/Nairobi'),
+            make_product(farmer, self.fruits, price=Decimal('0'), location=None),
+        ]
+
+    def price(self, products):
+        with mock.patch('base.ai_service.np.random.uniform', no_noise):
+            return AgriAI.calculate_optimal_prices(products)
+
+    def test_multipliers(self):
+        season = AgriAI.get_season_multiplier(datetime.now().month)
+        expected = [
+            round(100 * 1.4 * 1.1 * season * 1.05 / 10) * 10,
+            round(200 * 0.8 * 0.95 * season / 10) * 10,
+            round(50 * 1.0 * 1.1 * season / 10) * 10,
+            0,
+        ]
+        results = self.price(self.products)
+        self.assertEqual([r['suggested_price'] for r in results], expected)
+        self.assertEqual(
+            [r['factors_considered']['market_trend'] for r in results],
+            ['increasing', 'stable', 'stable', 'stable'],
+        )
+        self.assertEqual(results[3]['factors_considered']['price_difference_percent'], 0)
+        self.assertEqual(results[3]['price_label'], 'fair_price')
+
+    def test_one_query_for_any_number_of_products(self):
+        products = list(Product.objects.order_by('id'))
+        with self.assertNumQueries(1):
+            results = self.price(products)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.price([]), [])
+
+    def test_single_product_matches_the_batch(self):
+        batch = self.price(self.products)
+        with mock.patch('base.ai_service.np.random.uniform', no_noise):
+            single = [AgriAI.calculate_optimal_price(p) for p in self.products]
+        self.assertEqual(single, batch)
+
+    def test_price_labels(self):
+        product = self.products[1]
+        labels = {}
+        for factor in (0.85, 0.93, 1.0, 1.2):
+            with mock.patch('base.ai_service.AgriAI.get_season_multiplier', return_value=factor / (0.8 * 0.95)):
+                labels[factor] = self.price([product])[0]['price_label']
+        self.assertEqual(labels, {0.85: 'best_price', 0.93: 'good_price', 1.0: 'fair_price', 1.2: 'high_price'})
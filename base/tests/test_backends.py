@@ -0,0 +1,75 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from base.models import SecuritySettings
+
+from .utils import TEST_CACHES
+
+
+@override_settings(
+    CACHES=TEST_CACHES, WRITE_BUFFER={**settings.WRITE_BUFFER, 'enabled': False},
+    LOGIN_MAX_FAILURES=5, LOGIN_LOCKOUT_MINUTES=30, LOGIN_FAILURE_PERSIST_EVERY=3,
+)
+class LoginLockoutTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('Wanjiru', email='wanjiru@example.com', password='right-password')
+        self.request = RequestFactory().post('/login/')
+
+    def login(self, password, username='wanjiru'):
+        return authenticate(self.request, username=username, password=password)
+
+    def test_username_or_email_case_insensitive(self):
+        self.assertEqual(self.login('right-password'), self.user)
+        self.assertEqual(self.login('right-password', username='WANJIRU@example.com'), self.user)
+        self.assertIsNone(self.login('right-password', username='nobody'))
+
+    def test_lockout_after_max_failures(self):
+        for _ in range(4):
+            self.assertIsNone(self.login('wrong'))
+        # Persisted every LOGIN_FAILURE_PERSIST_EVERY failures, not on each one
+        self.assertEqual(SecuritySettings.objects.get(user=self.user).failed_login_attempts, 3)
+        self.assertEqual(self.login('right-password'), self.user)
+
+        for _ in range(5):
+            self.login('wrong')
+        self.assertIsNone(self.login('right-password'))
+        security = SecuritySettings.objects.get(user=self.user)
+        self.assertGreater(security.account_locked_until, timezone.now())
+
+        # The lock survives losing the cache
+        caches['default'].clear()
+        self.assertIsNone(self.login('right-password'))
+
+    def test_lock_expires(self):
+        for _ in range(5):
+            self.login('wrong')
+        caches['default'].clear()
+        SecuritySettings.objects.filter(user=self.user).update(
+            account_locked_until=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertEqual(self.login('right-password'), self.user)
+        security = SecuritySettings.objects.get(user=self.user)
+        self.assertEqual((security.failed_login_attempts, security.account_locked_until), (0, None))
+
+    def test_successful_login_does_not_write(self):
+        self.login('right-password')  # creates the SecuritySettings row
+        with self.assertNumQueries(1):
+            self.assertEqual(self.login('right-password'), self.user)
+
+    def test_concurrent_first_logins(self):
+        # Both requests loaded the user before either created the row
+        backend_user = User.objects.select_related('security_settings').get(pk=self.user.pk)
+        self.assertEqual(self.login('right-password'), self.user)
+        with mock.patch('base.backends.find_user', return_value=backend_user):
+            self.assertEqual(self.login('right-password'), self.user)
+            for _ in range(3):
+                self.login('wrong')
+        self.assertEqual(SecuritySettings.objects.get(user=self.user).failed_login_attempts, 3)
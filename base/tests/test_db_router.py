@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from base import db_router
+from base.db_router import PrimaryReplicaRouter
+from base.middleware import ReplicaPinningMiddleware
+from base.models import Product, SecuritySettings
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.router.replicas = ['replica_0', 'replica_1']
+
+    def in_request(self, replica_reads=True):
+        token = db_router.begin_request(replica_reads)
+        self.addCleanup(db_router.end_request, token)
+
+    def test_outside_requests_everything_uses_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+
+    def test_safe_requests_stick_to_one_replica(self):
+        self.in_request()
+        replica = self.router.db_for_read(Product)
+        self.assertIn(replica, self.router.replicas)
+        self.assertEqual({self.router.db_for_read(Product) for _ in range(10)}, {replica})
+
+    def test_reads_after_a_write_use_the_primary(self):
+        self.in_request()
+        self.router.db_for_write(Product)
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_unsafe_requests_use_the_primary(self):
+        self.in_request(replica_reads=False)
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_sessions_auth_and_security_settings_use_the_primary(self):
+        self.in_request()
+        for model in (Session, User, SecuritySettings):
+            with self.subTest(model=model):
+                self.assertEqual(self.router.db_for_read(model), 'default')
+
+    def test_migrations_only_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'base'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'base'))
+
+    def test_middleware_pins_clients_that_wrote(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            if request.method == 'POST':
+                self.router.db_for_write(Product)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+
+        response = middleware(factory.get('/'))
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+        response = middleware(factory.post('/'))
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+
+        pinned = factory.get('/')
+        pinned.COOKIES[db_router.PIN_COOKIE] = '1'
+        middleware(pinned)
+        self.assertIn(seen[0], self.router.replicas)
+        self.assertEqual(seen[1:], ['default', 'default'])
@@ -0,0 +1,99 @@
+import asyncio
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.groq_service import MARKET_INSIGHTS_UNAVAILABLE, AsyncGroqAIService
+from base.models import ProductCategory
+from base.resilience import CircuitBreaker
+
+from .utils import TEST_CACHES, batch_answer, completion, make_product
+
+
+class FakeCompletions:
+    """AsyncGroq chat.completions that records calls and how many overlap"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, timeout=None, **kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        self.prompts.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            return completion(self.answer(prompt))
+        finally:
+            self.active -= 1
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncGroqServiceTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(GROQ_CACHE_PATH=str(Path(directory) / 'llm_cache.sqlite3'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.farmer = User.objects.create_user('farmer', password='x')
+        self.categories = [ProductCategory.objects.create(name=f'Category {i}') for i in range(5)]
+
+    def service(self, answer, max_concurrency=2):
+        completions = FakeCompletions(answer)
+        client = mock.Mock()
+        client.chat.completions = completions
+        patcher = mock.patch('base.groq_service.AsyncGroq', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return AsyncGroqAIService(max_concurrency, breaker=CircuitBreaker('test')), completions
+
+    async def test_market_insights_fan_out_is_bounded(self):
+        service, completions = self.service(lambda prompt: 'Prices are steady')
+        insights = await service.gather_market_insights()
+        self.assertEqual(insights, {category.name: 'Prices are steady' for category in self.categories})
+        self.assertEqual(len(completions.prompts), 5)
+        self.assertEqual(completions.peak, 2)
+
+        # Answered from the response cache the second time
+        await service.gather_market_insights()
+        self.assertEqual(len(completions.prompts), 5)
+
+    async def test_failures_fall_back(self):
+        def answer(prompt):
+            raise ConnectionError('upstream down')
+
+        service, completions = self.service(answer)
+        with self.assertLogs('base.groq_service', 'WARNING'):
+            insights = await service.gather_market_insights(self.categories[:2])
+        self.assertEqual(list(insights.values()), [MARKET_INSIGHTS_UNAVAILABLE] * 2)
+
+    async def test_price_batches_are_sent_concurrently_in_input_order(self):
+        def create_products():
+            return [
+                make_product(self.farmer, self.categories[i % 2], name=f'Product {i}') for i in range(5)
+            ]
+
+        products = await sync_to_async(create_products)()
+        skipped = products[3].id
+        service, completions = self.service(lambda prompt: batch_answer(prompt, skip={skipped}))
+
+        recommendations = await service.gather_price_recommendations(products, batch_size=2)
+        # Category 0 holds products 0, 2, 4 and category 1 products 1, 3
+        self.assertEqual(len(completions.prompts), 3)
+        self.assertEqual(completions.peak, 2)
+        self.assertEqual(len(recommendations), 5)
+        for product, recommendation in zip(products, recommendations):
+            if product.id == skipped:
+                self.assertTrue(recommendation['factors_considered']['fallback_calculation'])
+            else:
+                self.assertEqual(recommendation['suggested_price'], 120)
+                self.assertEqual(recommendation['price_label'], 'good_price')
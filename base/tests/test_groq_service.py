@@ -0,0 +1,101 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.groq_service import MARKET_INSIGHTS_UNAVAILABLE, GroqAIService
+from base.models import ProductCategory
+from base.resilience import CircuitBreaker, latency_budget
+
+from .utils import TEST_CACHES, batch_answer, completion, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BatchPriceRecommendationTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(GROQ_CACHE_PATH=str(Path(directory) / 'llm_cache.sqlite3'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        farmer = User.objects.create_user('farmer', password='x')
+        vegetables = ProductCategory.objects.create(name='Vegetables')
+        fruits = ProductCategory.objects.create(name='Fruits')
+        self.products = [
+            make_product(farmer, (vegetables, fruits)[i % 2], name=f'Product {i}') for i in range(5)
+        ]
+
+    def service(self, answer):
+        self.prompts = []
+
+        def create(timeout=None, **kwargs):
+            prompt = kwargs['messages'][-1]['content']
+            self.prompts.append(prompt)
+            return completion(answer(prompt))
+
+        client = mock.Mock()
+        client.chat.completions.create.side_effect = create
+        patcher = mock.patch('base.groq_service.Groq', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return GroqAIService(breaker=CircuitBreaker('test'))
+
+    def assertFallback(self, recommendation):
+        self.assertTrue(recommendation['factors_considered']['fallback_calculation'])
+
+    def test_one_call_per_batch_in_input_order(self):
+        service = self.service(batch_answer)
+        recommendations = service.get_price_recommendations(p for p in self.products)
+        self.assertEqual(len(self.prompts), 2)  # one per category
+        self.assertEqual(len(recommendations), 5)
+        for recommendation in recommendations:
+            self.assertEqual(
+                (recommendation['suggested_price'], recommendation['price_label']), (120, 'good_price')
+            )
+
+        service.get_price_recommendations(self.products[:2], batch_size=1)
+        self.assertEqual(len(self.prompts), 4)
+
+    def test_skipped_and_garbled_entries_fall_back(self):
+        skipped, bad_price, wild_price, odd_label, good = (product.id for product in self.products)
+
+        def answer(prompt):
+            entries = json.loads(batch_answer(prompt, skip={skipped}))['recommendations']
+            for entry in entries:
+                if entry['id'] == bad_price:
+                    entry['suggested_price'] = 'cheap'
+                elif entry['id'] == wild_price:
+                    entry['suggested_price'] = 5000  # over 10x the current price
+                elif entry['id'] == odd_label:
+                    entry['price_label'] = 'bargain'
+            return json.dumps({'recommendations': entries + ['noise', {'price': 1}]})
+
+        service = self.service(answer)
+        recommendations = dict(zip(
+            (product.id for product in self.products), service.get_price_recommendations(self.products)
+        ))
+        for product_id in (skipped, bad_price, wild_price):
+            self.assertFallback(recommendations[product_id])
+        self.assertEqual(recommendations[odd_label]['price_label'], 'fair_price')
+        self.assertEqual(recommendations[good]['suggested_price'], 120)
+
+    def test_unusable_responses_fall_back_and_are_not_cached(self):
+        service = self.service(lambda prompt: 'Sorry, I cannot help with that')
+        with self.assertLogs('base.groq_service', 'WARNING'):
+            recommendations = service.get_price_recommendations(self.products[:1])
+        self.assertFallback(recommendations[0])
+
+        with self.assertLogs('base.groq_service', 'WARNING'):
+            service.get_price_recommendations(self.products[:1])
+        self.assertEqual(len(self.prompts), 2)
+
+    def test_exhausted_budget_skips_the_call(self):
+        service = self.service(lambda prompt: 'Prices are steady')
+        with latency_budget(0.1), self.assertLogs('base.groq_service', 'WARNING'):
+            self.assertEqual(service.get_market_insights(), MARKET_INSIGHTS_UNAVAILABLE)
+        self.assertEqual(self.prompts, [])
+        self.assertEqual(service.breaker.failures, 0)
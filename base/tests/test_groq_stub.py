@@ -0,0 +1,91 @@
+import json
+import random
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from base.groq_service import MARKET_INSIGHTS_UNAVAILABLE, GroqAIService
+from base.groq_stub import COMPLETIONS_PATH, StubConfig, parse_latency, run_stub
+from base.models import ProductCategory
+from base.resilience import CircuitBreaker
+
+from .utils import TEST_CACHES, make_product
+
+
+class ParseLatencyTests(SimpleTestCase):
+    def test_specs(self):
+        rng = random.Random(0)
+        self.assertEqual(parse_latency('fixed:0.25')(rng), 0.25)
+        self.assertTrue(0.1 <= parse_latency('uniform:0.1,0.2')(rng) <= 0.2)
+        self.assertGreater(parse_latency('lognormal:0.1,0.5')(rng), 0)
+        for spec in ('fixed', 'uniform:1', 'lognormal:a,b', 'gamma:1,2'):
+            with self.assertRaises(ValueError):
+                parse_latency(spec)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GroqStubTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache_path = str(Path(directory) / 'llm_cache.sqlite3')
+        farmer = User.objects.create_user('farmer', password='x')
+        category = ProductCategory.objects.create(name='Vegetables')
+        self.products = [make_product(farmer, category, name=f'Product {i}') for i in range(3)]
+
+    def start(self, **config):
+        server = run_stub('127.0.0.1', 0, StubConfig(**config))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        return server, f'http://{host}:{port}'
+
+    def service(self, base_url):
+        with self.settings(GROQ_BASE_URL=base_url, GROQ_CACHE_PATH=self.cache_path):
+            return GroqAIService(breaker=CircuitBreaker('test'))
+
+    def post(self, url, body):
+        request = urllib.request.Request(url, json.dumps(body).encode(), {'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def test_batch_pricing_through_the_groq_client(self):
+        server, base_url = self.start()
+        recommendations = self.service(base_url).get_price_recommendations(self.products)
+        self.assertEqual(server.requests, 1)
+        for recommendation in recommendations:
+            self.assertTrue(recommendation['factors_considered']['stub'])
+            self.assertTrue(90 <= recommendation['suggested_price'] <= 120)
+
+    def test_replies_depend_only_on_seed_and_body(self):
+        body = {'model': 'stub', 'messages': [{'role': 'user', 'content': 'hello'}]}
+        replies = []
+        for seed in (1, 1, 2):
+            _, base_url = self.start(seed=seed, malformed_rate=0.5)
+            replies.append([
+                self.post(base_url + COMPLETIONS_PATH, body)['choices'][0]['message']['content']
+                for _ in range(4)
+            ])
+        self.assertEqual(replies[0], replies[1])
+        self.assertNotEqual(replies[0], replies[2])
+
+    def test_injected_errors_send_callers_to_their_fallback(self):
+        server, base_url = self.start(error_rate=1.0)
+        with self.assertLogs('base.groq_service', 'WARNING'):
+            self.assertEqual(self.service(base_url).get_market_insights(), MARKET_INSIGHTS_UNAVAILABLE)
+        self.assertEqual(server.requests, 1)
+
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.post(base_url + '/v1/other', {})
+        self.assertEqual(error.exception.code, 404)
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.post(base_url + COMPLETIONS_PATH, {'model': 'stub'})
+        self.assertEqual(error.exception.code, 400)
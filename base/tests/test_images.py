@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from base import images
+from base.models import Job, Product, ProductCategory
+
+from .utils import TEST_CACHES, jpeg_upload, make_product
+
+ORIENTATION = 0x0112
+ARTIST = 0x013B
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProductImageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.farmer = User.objects.create_user('farmer')
+        self.category = ProductCategory.objects.create(name='Vegetables')
+
+    def make_product(self, upload):
+        return make_product(self.farmer, self.category, image=upload)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_upload_queues_processing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.make_product(jpeg_upload())
+        self.assertEqual(Job.objects.get(task='process_product_image').payload, {'product_id': product.id})
+
+    def test_original_is_upright_and_stripped_with_card_variants(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6  # taken with the phone on its side
+        exif[ARTIST] = 'Wanjiru'
+        product = self.make_product(jpeg_upload(exif=exif))
+        uploaded = product.image.name
+
+        self.assertTrue(images.process_product_image(product.id))
+        product.refresh_from_db()
+        self.assertNotEqual(product.image.name, uploaded)
+        self.assertFalse(product.image.storage.exists(uploaded))
+        self.assertEqual((product.image_width, product.image_height), (480, 640))
+        with product.image.open('rb') as f, Image.open(f) as original:
+            self.assertEqual(original.size, (480, 640))
+            self.assertEqual(dict(original.getexif()), {})
+
+        # No upscaling past the 480px original, but the smallest width is always there
+        variants = product.image_variants
+        self.assertEqual(list(variants['webp']), ['320'])
+        with product.image.storage.open(variants['jpeg']['320']) as f, Image.open(f) as card:
+            self.assertEqual((card.format, card.size), ('JPEG', (320, 180)))
+        sources = product.image_sources
+        self.assertRegex(sources['webp'], r'^/media/products/user_\d+/variants/farm_320\.[0-9a-f]{12}\.webp 320w$')
+        self.assertEqual(product.image_display, sources['src'])
+
+        # Already processed
+        self.assertFalse(images.process_product_image(product.id))
+
+    def test_transparent_png(self):
+        buffer = BytesIO()
+        Image.new('RGBA', (1200, 800), (0, 0, 0, 0)).save(buffer, 'PNG')
+        product = self.make_product(SimpleUploadedFile('leaf.png', buffer.getvalue(), content_type='image/png'))
+
+        self.assertTrue(images.process_product_image(product.id))
+        product.refresh_from_db()
+        self.assertTrue(product.image.name.endswith('.png'))
+        self.assertEqual(list(product.image_variants['jpeg']), ['320', '640', '960'])
+        with product.image.storage.open(product.image_variants['jpeg']['320']) as f, Image.open(f) as card:
+            self.assertEqual(card.getpixel((0, 0)), (255, 255, 255))
+
+    def test_image_replaced_while_processing(self):
+        product = self.make_product(jpeg_upload())
+        replacement = self.make_product(jpeg_upload('other.jpg')).image.name
+        save_original = images._save_original
+
+        def replaced_meanwhile(field, image, format):
+            Product.objects.filter(pk=product.pk).update(image=replacement)
+            return save_original(field, image, format)
+
+        before = self.stored_files()
+        with mock.patch('base.images._save_original', replaced_meanwhile):
+            self.assertFalse(images.process_product_image(product.id))
+        # Nothing written for the stale upload is left behind
+        self.assertEqual(self.stored_files(), before)
+        product.refresh_from_db()
+        self.assertEqual((product.image.name, product.image_variants), (replacement, {}))
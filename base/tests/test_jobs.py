@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from base.jobs import claim, enqueue, retry_dead_jobs, run_job, task
+from base.models import Job
+
+
+@task('tests.succeed')
+def succeeding_task(**payload):
+    pass
+
+
+@task('tests.fail')
+def failing_task(**payload):
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def test_enqueue_dedupes_pending_jobs(self):
+        first = enqueue('tests.succeed', {'n': 1})
+        self.assertEqual(enqueue('tests.succeed', {'n': 1}).id, first.id)
+        self.assertNotEqual(enqueue('tests.succeed', {'n': 2}).id, first.id)
+        long_a = enqueue('tests.succeed', {'ids': list(range(100))})
+        long_b = enqueue('tests.succeed', {'ids': list(range(101))})
+        self.assertNotEqual(long_a.id, long_b.id)
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
+
+    def expire_lease(self, job):
+        Job.objects.filter(id=job.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_a_lease_is_held_by_one_worker(self):
+        job = enqueue('tests.succeed')
+        stale = claim('worker-a')
+        self.assertEqual([j.id for j in stale], [job.id])
+        self.assertEqual(claim('worker-b'), [])
+
+        # An expired lease (crashed worker) can be taken over
+        self.expire_lease(job)
+        taken = claim('worker-b')
+        self.assertEqual([j.id for j in taken], [job.id])
+        job.refresh_from_db()
+        self.assertEqual((job.locked_by, job.attempts), ('worker-b', 2))
+
+        # The first worker's late result no longer counts
+        run_job(stale[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('running', 'worker-b'))
+
+        self.assertTrue(run_job(taken[0]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+
+    def test_lost_leases_count_as_attempts(self):
+        job = enqueue('tests.succeed', max_attempts=2)
+        claim('worker-a')
+        self.expire_lease(job)
+        claim('worker-b')
+        self.expire_lease(job)
+
+        with self.assertLogs('base.jobs', 'ERROR'):
+            self.assertEqual(claim('worker-c'), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), ('dead', 2, None))
+        self.assertIn('Lease expired', job.last_error)
+
+    def test_failures_back_off_and_end_dead(self):
+        job = enqueue('tests.fail', max_attempts=2)
+        with self.assertLogs('base.jobs', 'ERROR'):
+            self.assertFalse(run_job(claim('worker')[0]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertEqual(claim('worker'), [])  # not due yet
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs('base.jobs', 'ERROR'):
+            run_job(claim('worker')[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'dead')
+
+        self.assertEqual(retry_dead_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 0))
+
+    def test_success(self):
+        job = enqueue('tests.succeed')
+        self.assertTrue(run_job(claim('worker')[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_until), ('succeeded', None))
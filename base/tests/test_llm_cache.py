@@ -0,0 +1,105 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from base.llm_cache import LLMResponseCache, make_key
+
+
+class LLMResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache = LLMResponseCache(
+            path=Path(directory) / 'llm_cache.sqlite3',
+            max_bytes=100,
+            ttls={'default': 3600, 'short': 60, 'off': 0},
+        )
+        self.now = 1_000_000.0
+        clock = mock.patch('base.llm_cache.time.time', lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def call_counter(self, *answers):
+        calls = []
+
+        def call():
+            calls.append(1)
+            return answers[min(len(calls), len(answers)) - 1]
+        return call, calls
+
+    def test_keys_cover_every_input(self):
+        key = make_key('llama', 'system', 'user', 0.3, max_tokens=10)
+        self.assertEqual(key, make_key('llama', 'system', 'user', 0.3, max_tokens=10))
+        self.assertEqual(
+            len({key, make_key('llama', 'system', 'user', 0.4, max_tokens=10),
+                 make_key('llama', 'system', 'user', 0.3, max_tokens=11),
+                 make_key('llama', 'system', 'other', 0.3, max_tokens=10)}),
+            4,
+        )
+
+    def test_get_or_call_stores_and_reuses(self):
+        call, calls = self.call_counter('answer')
+        self.assertEqual(self.cache.get_or_call('default', 'k', call), 'answer')
+        self.assertEqual(self.cache.get_or_call('default', 'k', call), 'answer')
+        self.assertEqual(len(calls), 1)
+
+    def test_only_parsed_completions_are_stored(self):
+        call, calls = self.call_counter('not json', '{"price": 10}')
+        with self.assertRaises(ValueError):
+            self.cache.get_or_call('default', 'k', call, parse=json.loads)
+        self.assertIsNone(self.cache.get('default', 'k'))
+        self.assertEqual(self.cache.get_or_call('default', 'k', call, parse=json.loads), {'price': 10})
+        self.assertEqual(self.cache.get_or_call('default', 'k', call, parse=json.loads), {'price': 10})
+        self.assertEqual(len(calls), 2)
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_call('default', 'blank', lambda: '   ')
+        self.assertIsNone(self.cache.get('default', 'blank'))
+
+    def test_unparseable_cached_value_is_a_miss(self):
+        self.cache.set('default', 'k', 'stale format')
+        call, calls = self.call_counter('{"price": 10}')
+        self.assertEqual(self.cache.get_or_call('default', 'k', call, parse=json.loads), {'price': 10})
+        self.assertEqual(self.cache.get('default', 'k'), '{"price": 10}')
+
+    def test_ttl(self):
+        self.cache.set('short', 'k', 'v')
+        self.cache.set('off', 'k2', 'v')
+        self.assertIsNone(self.cache.get('off', 'k2'))
+        self.now += 59
+        self.assertEqual(self.cache.get('short', 'k'), 'v')
+        self.now += 2
+        self.assertIsNone(self.cache.get('short', 'k'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for key in 'abc':
+            self.cache.set('default', key, key * 30)
+            self.now += 10
+        # Reads only refresh an entry once it is TOUCH_INTERVAL old
+        self.now += 100
+        self.cache.get('default', 'a')
+        self.cache.set('default', 'd', 'd' * 30)
+
+        self.assertIsNone(self.cache.get('default', 'b'))
+        self.assertEqual([self.cache.get('default', key) is not None for key in 'acd'], [True, True, True])
+        self.assertLessEqual(self.cache.stats()['bytes'], 100)
+
+    def test_oversized_values_are_not_stored(self):
+        self.cache.set('default', 'k', 'x' * 101)
+        self.assertIsNone(self.cache.get('default', 'k'))
+
+    def test_stats(self):
+        self.cache.set('default', 'a', 'aaaa')
+        self.cache.set('insights', 'b', 'bb')
+        self.assertEqual(self.cache.stats(), {
+            'entries': 2,
+            'bytes': 6,
+            'max_bytes': 100,
+            'methods': {'default': {'entries': 1, 'bytes': 4}, 'insights': {'entries': 1, 'bytes': 2}},
+        })
+        self.cache.clear()
+        self.assertEqual(self.cache.stats()['entries'], 0)
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base import market_trends
+from base.models import Job, MarketTrend, ProductCategory
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MarketTrendTests(TestCase):
+    def setUp(self):
+        self.farmer = User.objects.create_user('farmer')
+        self.vegetables = ProductCategory.objects.create(name='Vegetables')
+        self.fruits = ProductCategory.objects.create(name='Fruits')
+        ProductCategory.objects.create(name='Empty')
+
+    def add(self, category, *prices, **fields):
+        for price in prices:
+            make_product(self.farmer, category, price=Decimal(price), **fields)
+
+    def latest(self, category):
+        return MarketTrend.objects.filter(category=category).latest('created_at', 'id')
+
+    def test_snapshots_in_a_fixed_number_of_queries(self):
+        self.add(self.vegetables, '10', '40', '20', '30')
+        self.add(self.vegetables, '1000', is_available=False)
+        self.add(self.fruits, '50', '70', '60')
+        Job.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(5):  # aggregates, medians, and the savepoint-wrapped insert
+                self.assertEqual(market_trends.update_market_trends(), 2)
+
+        vegetables, fruits = self.latest(self.vegetables), self.latest(self.fruits)
+        self.assertEqual(
+            (vegetables.product_count, vegetables.average_price, vegetables.median_price), (4, 25, 25)
+        )
+        self.assertEqual((fruits.product_count, fruits.average_price, fruits.median_price), (3, 60, 60))
+        self.assertEqual((vegetables.price_trend, vegetables.demand_level), ('stable', 'low'))
+        # One repricing job per category, as the MarketTrend receivers would queue
+        self.assertEqual(Job.objects.filter(task='reprice_category').count(), 2)
+
+    def test_trend_against_the_previous_snapshot(self):
+        self.add(self.vegetables, '100')
+        market_trends.update_market_trends()
+        self.add(self.vegetables, '120')  # average 110
+        market_trends.update_market_trends()
+        self.assertEqual(self.latest(self.vegetables).price_trend, 'increasing')
+        self.add(self.vegetables, '10')  # average ~77
+        market_trends.update_market_trends()
+        self.assertEqual(self.latest(self.vegetables).price_trend, 'decreasing')
+
+    def test_levels_and_recommendations(self):
+        self.assertEqual(market_trends.price_trend(104, Decimal('100')), 'stable')
+        self.assertEqual(
+            [market_trends.demand_level(n) for n in (10, 11, 20, 21)], ['low', 'medium', 'medium', 'high']
+        )
+        self.assertIn('Good time to sell', market_trends.recommendation('Kale', 'increasing', 'high'))
+        self.assertIn('Good time to buy', market_trends.recommendation('Kale', 'decreasing', 'low'))
+
+    def test_medians_of_even_and_odd_counts(self):
+        self.add(self.vegetables, '10', '20', '30', '40')
+        self.add(self.fruits, '5', '7', '100')
+        self.assertEqual(
+            market_trends.median_prices({self.vegetables.id: 4, self.fruits.id: 3}, chunk_size=2),
+            {self.vegetables.id: 25, self.fruits.id: 7},
+        )
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+
+class MediaTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_DELIVERY='python')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.content = bytes(range(256)) * 4
+        for name in ('products/farm.jpg', 'products/farm.0123456789ab.jpg', 'products/kale salad.jpg'):
+            path = os.path.join(media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.content)
+
+    def get(self, path='/media/products/farm.jpg', **headers):
+        return self.client.get(path, headers=headers)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], '1024')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=86400')
+        self.assertIn('immutable', self.get('/media/products/farm.0123456789ab.jpg')['Cache-Control'])
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.get('/media/products/none.jpg').status_code, 404)
+        self.assertEqual(self.get('/media/products').status_code, 404)
+        self.assertEqual(self.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.post('/media/products/farm.jpg').status_code, 405)
+
+    def test_byte_ranges(self):
+        for header, start, end in (('bytes=0-99', 0, 99), ('bytes=1000-', 1000, 1023), ('bytes=-10', 1014, 1023),
+                                   ('bytes=1020-5000', 1020, 1023)):
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), self.content[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/1024')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+        # Several ranges or another unit: the whole file
+        self.assertEqual(self.get(Range='bytes=0-1,5-6').status_code, 200)
+        self.assertEqual(self.get(Range='lines=1-2').status_code, 200)
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=1024-', 'bytes=500-100'):
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range=etag).status_code, 206)
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range='"stale"').status_code, 200)
+
+    def test_not_modified(self):
+        response = self.get()
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        for headers in ({'If-None-Match': etag}, {'If-None-Match': f'"other", W/{etag}'},
+                        {'If-None-Match': '*'}, {'If-Modified-Since': last_modified}):
+            with self.subTest(headers):
+                response = self.get(**headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertIn('Cache-Control', response)
+
+        # If-None-Match takes precedence over If-Modified-Since
+        self.assertEqual(self.get(**{'If-None-Match': '"other"', 'If-Modified-Since': last_modified}).status_code, 200)
+
+    def test_offloaded_delivery(self):
+        with self.settings(MEDIA_DELIVERY='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get('/media/products/kale%20salad.jpg')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/products/kale%20salad.jpg')
+        self.assertEqual(response.content, b'')
+
+        with self.settings(MEDIA_DELIVERY='x-sendfile'):
+            response = self.get('/media/products/kale%20salad.jpg')
+        self.assertTrue(response['X-Sendfile'].endswith('products/kale salad.jpg'))
@@ -0,0 +1,75 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+
+from base.groq_service import observe_call
+from base.models import ProductCategory
+from base.resilience import CircuitOpen
+
+from .utils import TEST_CACHES, make_product
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_TOKEN='')
+class MetricsTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+        farmer = User.objects.create_user('farmer', password='x')
+        make_product(farmer, ProductCategory.objects.create(name='Vegetables'))
+
+    def test_requests_are_recorded_by_url_name(self):
+        requests = sample(
+            'agrilink_request_duration_seconds_count', view='marketplace', method='GET', status='2xx'
+        )
+        queries = sample('agrilink_db_queries_total', view='marketplace')
+        misses = sample('agrilink_cache_requests_total', cache='page', result='miss')
+        hits = sample('agrilink_cache_requests_total', cache='page', result='hit')
+
+        self.client.get('/marketplace/')
+        self.client.get('/marketplace/')
+        self.assertEqual(
+            sample('agrilink_request_duration_seconds_count', view='marketplace', method='GET', status='2xx'),
+            requests + 2,
+        )
+        self.assertGreater(sample('agrilink_db_queries_total', view='marketplace'), queries)
+        self.assertEqual(sample('agrilink_cache_requests_total', cache='page', result='miss'), misses + 1)
+        self.assertEqual(sample('agrilink_cache_requests_total', cache='page', result='hit'), hits + 1)
+
+    def test_endpoint(self):
+        self.client.get('/marketplace/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'agrilink_request_duration_seconds_bucket{', response.content)
+        # Scrapes don't count themselves
+        self.assertNotIn(b'view="metrics"', response.content)
+
+    def test_token(self):
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_groq_calls_are_observed_by_outcome(self):
+        before = {
+            reason: sample('agrilink_groq_errors_total', method='tests', reason=reason)
+            for reason in ('error', 'circuit_open')
+        }
+        calls = sample('agrilink_groq_request_duration_seconds_count', method='tests')
+
+        with observe_call('tests'):
+            pass
+        with self.assertRaises(ValueError), observe_call('tests'):
+            raise ValueError
+        with self.assertRaises(CircuitOpen), observe_call('tests'):
+            raise CircuitOpen('groq')
+
+        self.assertEqual(sample('agrilink_groq_errors_total', method='tests', reason='error'), before['error'] + 1)
+        self.assertEqual(
+            sample('agrilink_groq_errors_total', method='tests', reason='circuit_open'), before['circuit_open'] + 1
+        )
+        # Refused calls never reached the API, so have no latency
+        self.assertEqual(sample('agrilink_groq_request_duration_seconds_count', method='tests'), calls + 2)
@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from base import images
+from base.models import Product, ProductCategory
+
+from .utils import TEST_CACHES, jpeg_upload, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProductSaveTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.farmer = User.objects.create_user('farmer', password='x')
+        self.product = make_product(
+            self.farmer, ProductCategory.objects.create(name='Vegetables'), image=jpeg_upload()
+        )
+
+    def test_stale_instance_keeps_processed_image(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        uploaded = stale.image.name
+        self.assertTrue(images.process_product_image(self.product.pk))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            stale.price = Decimal('150.00')
+            stale.save()
+
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(product.price, Decimal('150.00'))
+        self.assertNotEqual(product.image.name, uploaded)
+        self.assertEqual(product.image_width, 640)
+        self.assertTrue(product.image.storage.exists(product.image.name))
+        self.assertIsNotNone(product.image_sources)
+        self.assertEqual(len(callbacks), 2)  # price_products, page cache; no image job
+
+    def test_only_changed_fields_are_written(self):
+        product = Product.objects.get(pk=self.product.pk)
+        Product.objects.filter(pk=product.pk).update(name='Renamed elsewhere', quantity=3)
+        product.description = 'Updated'
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(
+            (product.name, product.quantity, product.description), ('Renamed elsewhere', 3, 'Updated')
+        )
+
+    def test_in_place_edits_are_changes(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.image_variants['note'] = 'kept'
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants['note'], 'kept')
+
+    def test_deferred_fields_are_not_fetched(self):
+        product = Product.objects.only('id', 'price').get(pk=self.product.pk)
+        product.price = Decimal('120.00')
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "base_product"')]
+        self.assertEqual(len(updates), 1)
+        self.assertRegex(updates[0], r'^UPDATE "base_product" SET "price" = [^,]+, "updated_at" = [^,]+ WHERE')
+        # Only the signal handlers' own lookups, not one query per deferred field
+        self.assertLess(len(queries), 15)
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from base import page_cache
+from base.models import ProductCategory
+from base.pricing import refresh_price_suggestions
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        caches['pages'].clear()
+        self.farmer = User.objects.create_user('farmer', password='x')
+        self.category = ProductCategory.objects.create(name='Vegetables')
+        self.product = make_product(self.farmer, self.category)
+
+    def get(self, **params):
+        response = self.client.get('/marketplace/', params)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Page-Cache']
+
+    def test_hit_until_the_catalog_changes(self):
+        self.assertEqual(self.get(sort_by='price_low'), 'miss')
+        self.assertEqual(self.get(sort_by='price_low'), 'hit')
+        # Empty and unknown parameters don't make a new entry
+        self.assertEqual(self.get(sort_by='price_low', search='', utm_source='mail'), 'hit')
+        self.assertEqual(self.get(sort_by='price_high'), 'miss')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Cherry tomatoes'
+            self.product.save()
+        self.assertEqual(self.get(sort_by='price_low'), 'miss')
+
+    def test_background_writes_invalidate(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_price_suggestions([self.product])
+        self.assertEqual(self.get(), 'miss')
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.get()
+        self.client.force_login(self.farmer)
+        response = self.client.get('/marketplace/')
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_evicted_version_never_revives_old_pages(self):
+        first = page_cache.catalog_version()
+        self.get()
+        page_cache.bump_catalog_version()
+        self.get()
+        second = page_cache.catalog_version()
+
+        # e.g. culled from the file cache by a burst of lockout keys
+        caches['default'].delete(page_cache.VERSION_KEY)
+        third = page_cache.catalog_version()
+        self.assertEqual(len({first, second, third}), 3)
+        self.assertEqual(page_cache.catalog_version(), third)
+        self.assertEqual(self.get(), 'miss')
+
+    def test_shared_context_is_built_once_per_version(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return {'n': len(calls)}
+
+        request = self.client.get('/').wsgi_request
+        self.assertEqual(page_cache.shared_context(request, 'test', build), {'n': 1})
+        self.assertEqual(page_cache.shared_context(request, 'test', build), {'n': 1})
+        page_cache.bump_catalog_version()
+        request = self.client.get('/').wsgi_request
+        self.assertEqual(page_cache.shared_context(request, 'test', build), {'n': 2})
@@ -0,0 +1,89 @@
+import base64
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.models import Product, ProductCategory
+from base.pagination import InvalidCursor, encode_cursor, keyset_paginate
+
+from .utils import TEST_CACHES, make_product
+
+
+def raw_cursor(values, direction='next'):
+    payload = json.dumps({'d': direction, 'v': values})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x')
+        cls.category = ProductCategory.objects.create(name='Vegetables')
+        # Repeated prices, so pages have to break ties on id
+        for i in range(25):
+            make_product(cls.farmer, cls.category, name=f'Product {i}', price=Decimal(10 + i % 4))
+
+    def test_pages_follow_the_ordering_both_ways(self):
+        ordering = ('price', 'id')
+        queryset = Product.objects.all()
+        expected = list(queryset.order_by(*ordering).values_list('id', flat=True))
+
+        pages = []
+        cursor = None
+        while True:
+            page = keyset_paginate(queryset, ordering, cursor, per_page=7)
+            pages.append([p.id for p in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual([pk for ids in pages for pk in ids], expected)
+        self.assertEqual([len(ids) for ids in pages], [7, 7, 7, 4])
+
+        # Walk back from the last page
+        for ids in reversed(pages[:-1]):
+            page = keyset_paginate(queryset, ordering, page.previous_cursor, per_page=7)
+            self.assertEqual([p.id for p in page], ids)
+        self.assertFalse(page.has_previous())
+
+    def test_descending_ordering(self):
+        ordering = ('-price', '-id')
+        first = keyset_paginate(Product.objects.all(), ordering, None, per_page=10)
+        second = keyset_paginate(Product.objects.all(), ordering, first.next_cursor, per_page=10)
+        expected = list(Product.objects.order_by(*ordering).values_list('id', flat=True)[:20])
+        self.assertEqual([p.id for p in first] + [p.id for p in second], expected)
+
+    def test_tampered_cursors_are_rejected(self):
+        cursors = [
+            'not base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            raw_cursor([10]),
+            raw_cursor([10, 1, 2]),
+            raw_cursor(['abc', 1]),
+            raw_cursor([{'x': 1}, 1]),
+            raw_cursor([[1], 1]),
+            raw_cursor([None, 1]),
+            raw_cursor([True, 1]),
+            raw_cursor(['NaN', 1]),
+            raw_cursor(['1e999', 1]),
+            raw_cursor([10, 10 ** 30]),
+            raw_cursor([10, 'abc']),
+            raw_cursor([10, 1], direction='sideways'),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                list(keyset_paginate(Product.objects.all(), ('price', 'id'), cursor))
+
+    def test_cursor_values_round_trip(self):
+        product = Product.objects.order_by('created_at', 'id')[3]
+        cursor = encode_cursor([product.created_at, product.id], 'next')
+        page = keyset_paginate(Product.objects.all(), ('created_at', 'id'), cursor, per_page=100)
+        self.assertEqual(len(page), 25 - 4)
+
+    def test_marketplace_falls_back_to_the_first_page(self):
+        for cursor in (raw_cursor(['abc', 1]), raw_cursor([None, 1]), raw_cursor([{'x': 1}, 1])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/marketplace/', {'sort_by': 'price_low', 'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
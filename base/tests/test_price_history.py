@@ -0,0 +1,135 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from base import price_history
+from base.models import PriceHistory, PriceRollup, ProductCategory
+from base.price_history import rollup_prices
+
+from .utils import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES, PRICE_HISTORY={'raw_days': 35, 'daily_days': 400})
+class PriceRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ProductCategory.objects.create(name='Vegetables')
+
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2026, 6, 17, 12, 0))  # a Wednesday
+        self.today = timezone.localdate(self.now)
+
+    def add_point(self, day, price, county='nairobi', quantity=Decimal('5')):
+        return PriceHistory.objects.create(
+            category=self.category, county=county, price=Decimal(price), quantity=quantity,
+            recorded_at=timezone.make_aware(datetime.combine(day, time(9, 0))),
+        )
+
+    def rollup(self, period, start, county=''):
+        return PriceRollup.objects.get(period=period, period_start=start, county=county, category=self.category)
+
+    def test_daily_and_weekly_summaries(self):
+        monday = self.today - timedelta(days=2)
+        self.add_point(monday, '10')
+        self.add_point(monday, '20')
+        self.add_point(monday, '60', county='mombasa')
+        self.add_point(self.today, '40')
+
+        rollup_prices(now=self.now)
+
+        day = self.rollup('day', monday)
+        self.assertEqual(
+            (day.min_price, day.avg_price, day.median_price, day.max_price, day.samples, day.volume),
+            (Decimal('10'), Decimal('30.00'), Decimal('20.00'), Decimal('60'), 3, Decimal('15')),
+        )
+        nairobi = self.rollup('day', monday, county='nairobi')
+        self.assertEqual((nairobi.samples, nairobi.median_price), (2, Decimal('15.00')))
+        week = self.rollup('week', monday)
+        self.assertEqual((week.samples, week.avg_price, week.max_price), (4, Decimal('32.50'), Decimal('60')))
+
+    def test_rerun_is_idempotent(self):
+        self.add_point(self.today - timedelta(days=1), '10')
+        rollup_prices(now=self.now)
+        first = list(PriceRollup.objects.order_by('id').values_list(
+            'period', 'period_start', 'county', 'samples', 'avg_price'
+        ))
+        rollup_prices(now=self.now)
+        second = list(PriceRollup.objects.order_by('id').values_list(
+            'period', 'period_start', 'county', 'samples', 'avg_price'
+        ))
+        self.assertEqual(sorted(first), sorted(second))
+
+    def test_compaction(self):
+        old_day = self.today - timedelta(days=60)
+        recent_day = self.today - timedelta(days=3)
+        self.add_point(old_day, '10')
+        self.add_point(recent_day, '20')
+        PriceRollup.objects.create(
+            period='day', period_start=self.today - timedelta(days=500), county='', category=self.category,
+            min_price=1, avg_price=1, median_price=1, max_price=1, samples=1, volume=1,
+        )
+
+        rollup_prices(now=self.now)
+        # The next scheduled run starts from the last rolled-up day
+        rollup_prices(now=self.now)
+
+        # Raw points past raw_days are gone, but still counted in their rollups
+        self.assertEqual(list(PriceHistory.objects.values_list('price', flat=True)), [Decimal('20.00')])
+        self.assertEqual(self.rollup('week', old_day - timedelta(days=old_day.weekday())).samples, 1)
+        self.assertEqual(self.rollup('day', old_day).samples, 1)
+        # Daily rollups past daily_days are gone
+        self.assertFalse(PriceRollup.objects.filter(period_start__lt=self.today - timedelta(days=400)).exists())
+
+    def test_early_since_keeps_compacted_history(self):
+        weeks_ago = [self.today - timedelta(weeks=n) for n in range(1, 9)]
+        for day in weeks_ago:
+            self.add_point(day, '10')
+            self.add_point(day, '30')
+        rollup_prices(now=self.now)
+        rollup_prices(now=self.now)
+        before = sorted(PriceRollup.objects.values_list('period', 'period_start', 'county', 'samples', 'avg_price'))
+        self.assertFalse(PriceHistory.objects.filter(recorded_at__lt=self.now - timedelta(days=35)).exists())
+
+        # e.g. seed_data run a second time: new raw points only in recent weeks
+        self.add_point(weeks_ago[0], '50')
+        rollup_prices(since=self.today - timedelta(weeks=8), now=self.now)
+
+        after = {
+            row[:3]: row[3:]
+            for row in PriceRollup.objects.values_list('period', 'period_start', 'county', 'samples', 'avg_price')
+        }
+        for period, start, county, samples, avg_price in before:
+            if start == weeks_ago[0] or start == weeks_ago[0] - timedelta(days=weeks_ago[0].weekday()):
+                continue
+            self.assertEqual(after[(period, start, county)], (samples, avg_price))
+        self.assertEqual(after[('day', weeks_ago[0], '')], (3, Decimal('30.00')))
+
+    def test_price_trends_revalidate_against_the_rollup_version(self):
+        caches['default'].clear()
+        self.add_point(self.today - timedelta(days=1), '10')
+        rollup_prices(now=self.now)
+        with self.captureOnCommitCallbacks(execute=True):
+            rollup_prices(now=self.now)
+
+        response = self.client.get('/api/price-trends/', {'period': 'day', 'periods': 400})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get('/api/price-trends/', {'period': 'day', 'periods': 400},
+                            HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+
+        # A new rollup, or losing the cached version, changes the ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            rollup_prices(now=self.now)
+        self.assertNotEqual(self.client.get('/api/price-trends/', {'period': 'day'})['ETag'], etag)
+        caches['default'].delete(price_history.VERSION_KEY)
+        self.assertEqual(
+            self.client.get('/api/price-trends/', {'period': 'day', 'periods': 400},
+                            HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.ai_service import PRICING_MODEL_VERSION
+from base.jobs import claim, run_job
+from base.models import Job, PriceSuggestion, ProductCategory
+from base.pricing import (
+    get_current_suggestions, prune_price_suggestions, refresh_price_suggestions, refresh_stale_suggestions,
+)
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PriceSuggestionTests(TestCase):
+    def setUp(self):
+        self.farmer = User.objects.create_user('farmer', password='x')
+        self.category = ProductCategory.objects.create(name='Vegetables')
+
+    def make_product(self, **fields):
+        return make_product(self.farmer, self.category, **fields)
+
+    def run_jobs(self):
+        while jobs := claim('tests', limit=10):
+            for job in jobs:
+                self.assertTrue(run_job(job))
+
+    def current(self, product):
+        return PriceSuggestion.objects.get(product=product, is_current=True)
+
+    def test_pricing_changes_queue_a_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.make_product()
+        self.run_jobs()
+        first = self.current(product)
+        self.assertEqual(first.model_version, PRICING_MODEL_VERSION)
+
+        # Not a pricing input
+        with self.captureOnCommitCallbacks(execute=True):
+            product.description = 'Sweeter'
+            product.save()
+        self.assertFalse(Job.objects.filter(task='price_products', status='pending').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.price = Decimal('150.00')
+            product.save()
+        self.run_jobs()
+        second = self.current(product)
+        self.assertNotEqual(second.id, first.id)
+        self.assertEqual(second.factors_considered['original_price'], 150.0)
+        # The previous snapshot is kept as history
+        self.assertEqual(PriceSuggestion.objects.filter(product=product).count(), 2)
+
+    def test_reads_are_one_query_and_never_write(self):
+        products = [self.make_product(name=f'Product {i}') for i in range(3)]
+        refresh_price_suggestions(products[:2])
+        PriceSuggestion.objects.filter(product=products[1]).update(model_version='agriai-0')
+        Job.objects.all().delete()
+
+        with self.assertNumQueries(1):
+            suggestions = get_current_suggestions(products)
+        # Outdated snapshots are still shown until the sweep replaces them
+        self.assertEqual(set(suggestions), {products[0].id, products[1].id})
+        self.assertFalse(Job.objects.exists())
+
+        response = self.client.get('/marketplace/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Job.objects.exists())
+
+    def test_sweep_refreshes_missing_and_outdated_snapshots(self):
+        fresh, outdated, missing = [self.make_product(name=f'Product {i}') for i in range(3)]
+        self.make_product(name='Unavailable', is_available=False)
+        refresh_price_suggestions([fresh, outdated])
+        PriceSuggestion.objects.filter(product=outdated).update(model_version='agriai-0')
+        untouched = self.current(fresh).id
+
+        self.assertEqual(refresh_stale_suggestions(batch_size=1), 2)
+        self.assertEqual(self.current(fresh).id, untouched)
+        self.assertEqual(self.current(outdated).model_version, PRICING_MODEL_VERSION)
+        self.assertEqual(self.current(missing).model_version, PRICING_MODEL_VERSION)
+        self.assertEqual(refresh_stale_suggestions(), 0)
+        self.assertEqual(refresh_stale_suggestions(refresh_all=True), 3)
+
+    def test_prune_keeps_current_and_recent_history(self):
+        product = self.make_product()
+        for _ in range(5):
+            refresh_price_suggestions([product])
+        current = self.current(product).id
+
+        self.assertEqual(prune_price_suggestions(keep=2, max_age_days=30), 2)
+        remaining = PriceSuggestion.objects.filter(product=product)
+        self.assertEqual(remaining.count(), 3)
+        self.assertTrue(remaining.filter(id=current, is_current=True).exists())
@@ -0,0 +1,82 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from base.middleware import QueryInstrumentationMiddleware
+from base.models import Product, ProductCategory
+from base.query_stats import QueryRecorder, fingerprint
+
+from .utils import TEST_CACHES, make_product
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_parameter_lists_share_a_shape(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s)'),
+            fingerprint('SELECT *  FROM t\nWHERE id IN (%s,%s,%s)'),
+        )
+        self.assertNotEqual(fingerprint('SELECT a FROM t'), fingerprint('SELECT b FROM t'))
+
+
+def n_plus_one(request):
+    names = [product.category.name for product in Product.objects.all()]
+    return HttpResponse(', '.join(names))
+
+
+def one_query(request):
+    return HttpResponse(', '.join(Product.objects.values_list('category__name', flat=True)))
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    SQL_INSTRUMENTATION={'sample_rate': 1.0, 'n_plus_one_threshold': 2, 'slow_query_ms': 10_000},
+)
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        farmer = User.objects.create_user('farmer', password='x')
+        for i in range(3):
+            make_product(farmer, ProductCategory.objects.create(name=f'Category {i}'))
+        self.request = RequestFactory().get('/marketplace/')
+
+    def test_recorder_counts_shapes(self):
+        recorder = QueryRecorder()
+        with recorder.record():
+            n_plus_one(self.request)
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(len(recorder.repeated(2)), 1)
+        self.assertEqual(recorder.repeated(3), [])
+
+    def test_n_plus_one_is_reported(self):
+        with self.assertLogs('base.sql', 'INFO') as logs:
+            response = QueryInstrumentationMiddleware(n_plus_one)(self.request)
+        self.assertEqual((response['X-DB-Queries'], response['X-DB-Repeated']), ('4', '1'))
+        self.assertIn('GET /marketplace/: 4 queries', logs.output[0])
+        self.assertIn('Possible N+1 on GET /marketplace/: 3 x SELECT', logs.output[1])
+
+    def test_clean_requests_are_summarized_at_debug(self):
+        with self.assertNoLogs('base.sql', 'INFO'):
+            response = QueryInstrumentationMiddleware(one_query)(self.request)
+        self.assertEqual((response['X-DB-Queries'], response['X-DB-Repeated']), ('1', '0'))
+        with self.assertLogs('base.sql', 'DEBUG'):
+            QueryInstrumentationMiddleware(one_query)(self.request)
+
+    def test_slow_queries_are_explained(self):
+        config = {'sample_rate': 1.0, 'slow_query_ms': 0, 'explain': True}
+        with self.settings(SQL_INSTRUMENTATION=config), self.assertLogs('base.sql', 'WARNING') as logs:
+            QueryInstrumentationMiddleware(one_query)(self.request)
+        self.assertIn('Slow query on GET /marketplace/', logs.output[0])
+        self.assertIn('Plan:', logs.output[0])
+
+    def test_async_views_are_covered(self):
+        async def view(request):
+            return await sync_to_async(n_plus_one)(request)
+
+        with self.assertLogs('base.sql', 'WARNING'):
+            response = async_to_sync(QueryInstrumentationMiddleware(view))(self.request)
+        self.assertEqual(response['X-DB-Queries'], '4')
+
+    def test_unsampled_requests_are_untouched(self):
+        with self.settings(SQL_INSTRUMENTATION={'sample_rate': 0}):
+            response = QueryInstrumentationMiddleware(n_plus_one)(self.request)
+        self.assertNotIn('X-DB-Queries', response)
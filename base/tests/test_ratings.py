@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.models import ProductCategory, ProductReview
+from base.ratings import rebuild_rating_aggregates
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.farmer = User.objects.create_user('farmer', password='x')
+        self.buyers = [User.objects.create_user(f'buyer{i}', password='x') for i in range(3)]
+        self.product = make_product(self.farmer, ProductCategory.objects.create(name='Vegetables'))
+
+    def test_aggregates_follow_review_changes(self):
+        reviews = [
+            ProductReview.objects.create(product=self.product, user=buyer, rating=rating)
+            for buyer, rating in zip(self.buyers, (5, 4, 2))
+        ]
+        reviews[1].rating = 1
+        reviews[1].save()
+        reviews[0].delete()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, 2)
+        self.assertEqual(
+            [getattr(self.product, f'rating_{stars}_count') for stars in range(1, 6)], [1, 1, 0, 0, 0]
+        )
+        self.assertAlmostEqual(self.product.avg_rating, 1.5)
+
+    def test_stale_product_save_keeps_aggregates(self):
+        stale = type(self.product).objects.get(pk=self.product.pk)
+        ProductReview.objects.create(product=self.product, user=self.buyers[0], rating=4)
+        stale.name = 'Cherry tomatoes'
+        stale.save()
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_4_count), (1, 1))
+        self.assertEqual(rebuild_rating_aggregates(), 0)
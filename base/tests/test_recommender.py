@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base import recommender
+from base.models import Order, Product, ProductCategory, SearchHistory, Wishlist
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecommenderTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(RECOMMENDER_MODEL_PATH=str(Path(directory) / 'model.npz'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.dict(recommender._loaded, {'model': None, 'mtime': None, 'checked': 0.0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        farmer = User.objects.create_user('farmer')
+        category = ProductCategory.objects.create(name='Produce')
+        self.tomatoes, self.onions, self.kale, self.mangoes, self.avocados = (
+            make_product(farmer, category, name=name)
+            for name in ('Tomatoes', 'Onions', 'Kale', 'Mangoes', 'Avocados')
+        )
+        # Reviews only order the popularity fallback
+        Product.objects.filter(id=self.mangoes.id).update(review_count=10)
+
+        self.user = User.objects.create_user('buyer')
+        for name in ('a', 'b'):
+            self.order(User.objects.create_user(name), self.tomatoes, self.onions)
+        other = User.objects.create_user('c')
+        self.order(other, self.tomatoes)
+        Wishlist.objects.create(user=other, product=self.kale)
+        searcher = User.objects.create_user('d')
+        SearchHistory.objects.create(user=searcher, query='Mangoes', results_count=1)
+        self.order(searcher, self.avocados)
+
+    def order(self, buyer, *products):
+        for product in products:
+            Order.objects.create(buyer=buyer, product=product, quantity=1, total_price=product.price)
+
+    def recommend(self, limit=6):
+        return recommender.recommend_for_user(self.user, limit)
+
+    def test_neighbours_of_the_users_history_come_first(self):
+        recommender.rebuild_model()
+        Wishlist.objects.create(user=self.user, product=self.tomatoes)
+        self.assertEqual(self.recommend(2), [self.onions, self.kale])
+
+        recommended = self.recommend()
+        self.assertEqual(recommended[:2], [self.onions, self.kale])
+        # Popular products fill up the rest
+        self.assertEqual(set(recommended[2:]), {self.avocados, self.mangoes, self.tomatoes})
+
+    def test_searches_count_as_interactions(self):
+        recommender.rebuild_model()
+        SearchHistory.objects.create(user=self.user, query='  mangoes ', results_count=1)
+        self.assertEqual(self.recommend(1), [self.avocados])
+
+    def test_unavailable_products_are_skipped(self):
+        recommender.rebuild_model()
+        Wishlist.objects.create(user=self.user, product=self.tomatoes)
+        self.onions.is_available = False
+        self.onions.save()
+        self.assertEqual(self.recommend(1), [self.kale])
+        self.assertNotIn(self.onions, self.recommend())
+
+    def test_without_a_model_popular_products_are_served(self):
+        Wishlist.objects.create(user=self.user, product=self.tomatoes)
+        self.assertIsNone(recommender.get_model())
+        self.assertEqual(self.recommend(1), [self.mangoes])
+
+    def test_saved_model_round_trips(self):
+        built = recommender.rebuild_model()
+        loaded = recommender.get_model()
+        self.assertEqual(list(loaded.item_ids), list(built.item_ids))
+        self.assertEqual((loaded.similarity != built.similarity).nnz, 0)
+        self.assertEqual(loaded.query_index, built.query_index)
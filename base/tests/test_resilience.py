@@ -0,0 +1,109 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from base.resilience import (
+    CircuitBreaker, CircuitOpen, DeadlineExceeded, call_timeout, latency_budget, remaining_budget,
+)
+
+
+class FakeClock(SimpleTestCase):
+    def setUp(self):
+        self.now = 100.0
+        clock = mock.patch('base.resilience.time.monotonic', lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+
+class CircuitBreakerTests(FakeClock):
+    def setUp(self):
+        super().setUp()
+        self.breaker = CircuitBreaker('test', failure_threshold=2, slow_call_seconds=5, reset_timeout=30)
+
+    def fail(self):
+        with self.assertRaises(ConnectionError), self.breaker.guard():
+            raise ConnectionError
+
+    def succeed(self, seconds=0):
+        with self.breaker.guard():
+            self.now += seconds
+
+    def open(self):
+        self.fail()
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail()
+        self.succeed()
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.fail()
+        with self.assertRaises(CircuitOpen):
+            self.succeed()
+
+    def test_slow_calls_count_as_failures(self):
+        self.succeed(seconds=6)
+        self.succeed(seconds=6)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.open()
+        self.now += 30
+        with self.breaker.guard():
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        self.open()
+        self.now += 30
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpen):
+            self.succeed()
+
+    def test_cancelled_probe_is_released(self):
+        self.open()
+        self.now += 30
+
+        async def probe():
+            with self.breaker.guard():
+                await asyncio.sleep(10)
+
+        async def cancel_probe():
+            task = asyncio.create_task(probe())
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_probe())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.succeed()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class LatencyBudgetTests(FakeClock):
+    def test_no_budget(self):
+        self.assertIsNone(remaining_budget())
+        self.assertEqual(call_timeout(8), 8)
+
+    def test_timeouts_are_capped_by_the_budget(self):
+        with latency_budget(10):
+            self.assertEqual(call_timeout(8), 8)
+            self.now += 7
+            self.assertEqual(call_timeout(8), 3)
+            self.now += 2.7
+            with self.assertRaises(DeadlineExceeded):
+                call_timeout(8)
+        self.assertIsNone(remaining_budget())
+
+    def test_nested_budgets_only_shrink(self):
+        with latency_budget(10):
+            with latency_budget(60):
+                self.assertEqual(remaining_budget(), 10)
+            with latency_budget(2):
+                self.assertEqual(remaining_budget(), 2)
+            self.assertEqual(remaining_budget(), 10)
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base import search
+from base.models import Product, ProductCategory
+from base.search import rebuild_index, search_products
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.farmer = User.objects.create_user('farmer', password='x')
+        self.vegetables = ProductCategory.objects.create(name='Vegetables')
+        self.fruits = ProductCategory.objects.create(name='Fruits')
+        self.tomatoes = make_product(self.farmer, self.vegetables, name='Tomatoes', description='Red and ripe')
+        self.salad = make_product(self.farmer, self.vegetables, name='Salad mix', description='With tomatoes')
+        self.mangoes = make_product(self.farmer, self.fruits, name='Mangoes', description='Sweet')
+
+    def search(self, query, products=None):
+        return list(search_products(products or Product.objects.all(), query))
+
+    def test_prefix_terms_ranked_by_field_weight(self):
+        # A name match outranks a description match
+        self.assertEqual(self.search('tom'), [self.tomatoes, self.salad])
+        self.assertEqual(self.search('tomatoes ripe'), [self.tomatoes])
+        self.assertEqual(self.search('fruit'), [self.mangoes])
+        self.assertEqual(self.search('!!'), [])
+
+    def test_single_query_with_rank(self):
+        with self.assertNumQueries(1):
+            results = self.search('tomatoes')
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_composes_with_filters(self):
+        available = Product.objects.filter(is_available=True, category=self.vegetables)
+        self.salad.is_available = False
+        self.salad.save()
+        self.assertEqual(self.search('tomatoes', available), [self.tomatoes])
+        self.assertEqual(search_products(available, 'tomatoes').count(), 1)
+
+    def test_index_follows_edits(self):
+        self.mangoes.name = 'Avocados'
+        self.mangoes.save()
+        self.assertEqual(self.search('mango'), [])
+        self.assertEqual(self.search('avocado'), [self.mangoes])
+
+        self.fruits.name = 'Tropical'
+        self.fruits.save()
+        self.assertEqual(self.search('tropical'), [self.mangoes])
+
+        self.tomatoes.delete()
+        self.assertEqual(self.search('ripe'), [])
+
+    def test_rebuild(self):
+        search.remove_products([self.tomatoes.id, self.salad.id, self.mangoes.id])
+        self.assertEqual(self.search('tomatoes'), [])
+        self.assertEqual(rebuild_index(batch_size=2), 3)
+        self.assertEqual(self.search('tomatoes'), [self.tomatoes, self.salad])
+
+    def test_failed_rebuild_keeps_the_old_index(self):
+        calls = []
+
+        def fail_second_batch(products):
+            calls.append(products)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            index(products)
+
+        index = search.index_products
+        with mock.patch.object(search, 'index_products', fail_second_batch), self.assertRaises(RuntimeError):
+            rebuild_index(batch_size=2)
+        self.assertEqual(self.search('tomatoes'), [self.tomatoes, self.salad])
+        self.assertEqual(self.search('mangoes'), [self.mangoes])
+
+    def test_marketplace_search(self):
+        response = self.client.get('/marketplace/', {'search': 'tomat'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['products']), [self.tomatoes, self.salad])
@@ -0,0 +1,140 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from base.db_maintenance import enable_incremental_vacuum, run_maintenance
+from base.management.commands.benchmark_sqlite import Command as BenchmarkCommand
+from base.models import ProductCategory
+
+from .utils import TEST_CACHES, make_product
+
+
+class SQLiteFileTestCase(SimpleTestCase):
+    """Runs against SQLite files configured like the primary (the test database lives in memory)"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+
+    def file_connection(self, alias):
+        settings_dict = {**connection.settings_dict, 'NAME': self.path, 'OPTIONS': settings.SQLITE_OPTIONS}
+        wrapper = type(connections['default'])(settings_dict, alias)
+        connections[alias] = wrapper
+        self.addCleanup(connections.__delitem__, alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+
+class SQLiteSettingsTests(SQLiteFileTestCase):
+    def test_pragmas_are_set_on_every_connection(self):
+        wrapper = self.file_connection('tuned')
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -64 * 1024)
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        wrapper = self.file_connection('tuned')
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE stock (quantity INTEGER)')
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+
+        with transaction.atomic(using='tuned'):
+            # Only a read so far, but BEGIN IMMEDIATE already holds the write lock,
+            # so a read-then-write can't fail half way with "database is locked"
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM stock')
+            with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+                other.execute('BEGIN IMMEDIATE')
+        other.execute('BEGIN IMMEDIATE')
+        other.rollback()
+
+
+class MaintenanceTests(SQLiteFileTestCase):
+    def fill_and_empty(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE notes (body TEXT)')
+            cursor.executemany('INSERT INTO notes VALUES (?)', [('x' * 1000,)] * 500)
+            cursor.execute('DELETE FROM notes')
+
+    def test_optimize_and_checkpoint(self):
+        wrapper = self.file_connection('maintenance')
+        self.fill_and_empty(wrapper)
+        self.assertGreater(os.path.getsize(self.path + '-wal'), 0)
+
+        report = run_maintenance('maintenance', analyze=True)
+        self.assertTrue(report['analyzed'])
+        self.assertGreater(report['free_pages'], 100)
+        self.assertNotIn('free_pages_after', report)  # auto_vacuum is off
+        self.assertEqual(report['checkpoint']['busy'], False)
+        self.assertEqual(os.path.getsize(self.path + '-wal'), 0)
+
+    def test_incremental_vacuum(self):
+        wrapper = self.file_connection('maintenance')
+        self.assertTrue(enable_incremental_vacuum('maintenance'))
+        self.fill_and_empty(wrapper)
+        report = run_maintenance('maintenance', vacuum_pages=50)
+        self.assertEqual(report['free_pages_after'], report['free_pages'] - 50)
+        self.assertEqual(run_maintenance('maintenance', vacuum_pages=0).get('free_pages_after'), None)
+
+    def test_command(self):
+        self.file_connection('maintenance')
+        out = StringIO()
+        with mock.patch('base.db_maintenance.DEFAULT_DB_ALIAS', 'maintenance'), \
+                mock.patch('base.management.commands.sqlite_maintenance.run_maintenance',
+                           lambda **options: run_maintenance('maintenance', **options)):
+            call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('free_pages: 0', out.getvalue())
+        self.assertIn('checkpoint:', out.getvalue())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BenchmarkSQLiteTests(TransactionTestCase):
+    def test_profiles(self):
+        farmer = User.objects.create_user('farmer')
+        category = ProductCategory.objects.create(name='Vegetables')
+        for i in range(5):
+            make_product(farmer, category, name=f'Product {i}')
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        # The test database is in memory; benchmark a file copy of it (committed
+        # rows only, hence TransactionTestCase)
+        source = os.path.join(directory, 'source.sqlite3')
+        target = sqlite3.connect(source)
+        connection.connection.backup(target)
+        target.close()
+        copy_database = BenchmarkCommand.copy_database
+        copies = []
+
+        def copy_from_file(command, source_path, path, wal):
+            copy_database(command, source, path, wal)
+            with sqlite3.connect(path) as copy:
+                copies.append(copy.execute('PRAGMA journal_mode').fetchone()[0])
+
+        out = StringIO()
+        with mock.patch.object(BenchmarkCommand, 'copy_database', copy_from_file):
+            call_command('benchmark_sqlite', readers=1, writers=1, duration=0.5, stdout=out)
+        self.assertEqual(copies, ['delete', 'wal'])
+        rows = {line.split()[0]: line.split()[1:] for line in out.getvalue().splitlines()[-2:]}
+        self.assertEqual(set(rows), {'default', 'tuned'})
+        for reads, writes, locked, *_ in rows.values():
+            self.assertGreater(float(reads), 0)
+            self.assertGreater(float(writes), 0)
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.models import Product, ProductCategory
+from base.stats import category_scope, get_stats, reconcile_stats
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MarketplaceStatsTests(TestCase):
+    def setUp(self):
+        self.farmers = [User.objects.create_user(f'farmer{i}', password='x') for i in range(2)]
+        self.categories = [ProductCategory.objects.create(name=name) for name in ('Vegetables', 'Fruits')]
+
+    def snapshot(self):
+        scopes = ['all'] + [category_scope(c.id) for c in self.categories]
+        return {
+            scope: (stats.total_products, stats.active_farmers, stats.counties_covered)
+            for scope, stats in ((scope, get_stats(scope)) for scope in scopes)
+        }
+
+    def assert_counters_match_reconcile(self):
+        stored = self.snapshot()
+        reconcile_stats()
+        self.assertEqual(stored, self.snapshot())
+
+    def test_counters_follow_product_changes(self):
+        vegetables, fruits = self.categories
+        a = make_product(self.farmers[0], vegetables, location='Nairobi')
+        b = make_product(self.farmers[0], vegetables, location=' nairobi ')
+        c = make_product(self.farmers[1], fruits, location='Kisumu')
+        make_product(self.farmers[1], fruits, location='Mombasa', is_available=False)
+        overall = get_stats()
+        self.assertEqual((overall.total_products, overall.active_farmers, overall.counties_covered), (3, 2, 2))
+        self.assert_counters_match_reconcile()
+
+        a.location = 'Nakuru'
+        a.save()
+        b.is_available = False
+        b.save()
+        c.category = vegetables
+        c.save()
+        a.refresh_from_db()
+        a.delete()
+        self.assert_counters_match_reconcile()
+        self.assertEqual(get_stats().total_products, 1)
+
+    def test_deferred_instances_move_the_stored_contribution(self):
+        vegetables, fruits = self.categories
+        product = make_product(self.farmers[0], vegetables, location='Nairobi')
+        make_product(self.farmers[1], vegetables, location='Kisumu')
+
+        deferred = Product.objects.only('id', 'price').get(pk=product.pk)
+        deferred.price = 120
+        deferred.save()
+        self.assertEqual(get_stats().total_products, 2)
+        self.assert_counters_match_reconcile()
+
+        deferred = Product.objects.only('id').get(pk=product.pk)
+        deferred.is_available = False
+        deferred.save()
+        self.assertEqual((get_stats().total_products, get_stats().active_farmers), (1, 1))
+        self.assert_counters_match_reconcile()
+
+        Product.objects.filter(pk=product.pk).update(is_available=True)
+        reconcile_stats()
+        Product.objects.only('id').get(pk=product.pk).delete()
+        self.assertEqual(get_stats().total_products, 1)
+        self.assert_counters_match_reconcile()
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from base.models import LoginHistory, ProductCategory, SearchHistory
+from base.write_buffer import WriteBuffer
+
+from .utils import TEST_CACHES, make_product
+
+
+@override_settings(CACHES=TEST_CACHES, WRITE_BUFFER={'enabled': True})
+class WriteBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer')
+        self.buffer = WriteBuffer(max_size=3, max_delay=60, max_pending=4)
+        # Flushed by hand: the background thread would write on its own connection
+        patcher = mock.patch.object(WriteBuffer, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def search(self, query='tomatoes'):
+        return SearchHistory(user=self.user, query=query, results_count=1)
+
+    def login(self):
+        return LoginHistory(user=self.user, ip_address='127.0.0.1', user_agent='tests')
+
+    def test_rows_are_written_in_one_insert_per_model(self):
+        for instance in (self.search(), self.search('kale'), self.login()):
+            self.buffer.add(instance)
+        self.assertFalse(SearchHistory.objects.exists())
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(
+            sorted(SearchHistory.objects.values_list('query', flat=True)), ['kale', 'tomatoes']
+        )
+        self.assertEqual(LoginHistory.objects.count(), 1)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_a_full_buffer_wakes_the_writer(self):
+        self.buffer.add(self.search())
+        self.buffer.add(self.search())
+        self.assertFalse(self.buffer._wake.is_set())
+        self.buffer.add(self.search())
+        self.assertTrue(self.buffer._wake.is_set())
+
+    def test_rows_beyond_max_pending_are_dropped(self):
+        for _ in range(4):
+            self.buffer.add(self.search())
+        with self.assertLogs('base.write_buffer', 'WARNING'):
+            self.buffer.add(self.search())
+        self.assertEqual(self.buffer.dropped, 1)
+        self.assertEqual(self.buffer.flush(), 4)
+
+    def test_a_failing_model_does_not_lose_the_others(self):
+        self.buffer.add(self.search())
+        self.buffer.add(self.login())
+        with mock.patch.object(LoginHistory.objects, 'bulk_create', side_effect=RuntimeError('locked')), \
+                self.assertLogs('base.write_buffer', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(SearchHistory.objects.count(), 1)
+
+    def test_disabled_buffer_saves_at_once(self):
+        with self.settings(WRITE_BUFFER={'enabled': False}):
+            self.buffer.add(self.search())
+        self.assertEqual(SearchHistory.objects.count(), 1)
+
+    def test_marketplace_searches_are_buffered(self):
+        make_product(User.objects.create_user('farmer'), ProductCategory.objects.create(name='Vegetables'))
+        self.client.force_login(self.user)
+        with mock.patch('base.views.write_buffer', self.buffer):
+            self.client.get('/marketplace/', {'search': 'tomatoes'})
+        self.assertFalse(SearchHistory.objects.exists())
+        self.buffer.flush()
+        self.assertEqual(SearchHistory.objects.get().results_count, 1)
@@ -0,0 +1,50 @@
+import json
+import re
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from base.models import Product
+
+# The shared default cache is file-based outside tests; keep test runs in memory
+TEST_CACHES = {
+    **settings.CACHES,
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+}
+
+
+def make_product(farmer, category, **fields):
+    values = {
+        'name': 'Tomatoes',
+        'description': 'Fresh tomatoes',
+        'price': Decimal('100.00'),
+        'quantity': Decimal('10.00'),
+        'unit': 'kg',
+        'location': 'Nairobi',
+        'harvest_date': date(2026, 1, 1),
+    }
+    values.update(fields)
+    return Product.objects.create(farmer=farmer, category=category, **values)
+
+
+def jpeg_upload(name='farm.jpg', size=(640, 480), exif=None):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, 'JPEG', exif=exif or Image.Exif())
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def completion(content):
+    """A Groq chat completion response holding ``content``"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def batch_answer(prompt, skip=(), **fields):
+    """A batch pricing answer for every product id in ``prompt`` except ``skip``"""
+    entry = {'suggested_price': 120, 'confidence_score': 0.9, 'price_label': 'good_price', **fields}
+    ids = [int(product_id) for product_id in re.findall(r'"id": (\d+)', prompt)]
+    return json.dumps({'recommendations': [{'id': i, **entry} for i in ids if i not in skip]})
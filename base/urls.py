@@ -59,6 +59,7 @@ urlpatterns = [
     path('marketplace/wishlist/add/<int:product_id>/', views.add_to_wishlist, name='add_to_wishlist'),
     path('marketplace/buy/<int:product_id>/', views.buy_product, name='buy_product'),
     path('api/ai-recommendations/', views.ai_recommendations_api, name='ai_recommendations_api'),
+    path('metrics', views.metrics_view, name='metrics'),
     path('admin/update-market-trends/', views.update_market_trends, name='update_market_trends'),
 
     path('farmer/add-product/', views.add_product, name='add_product'),
@@ -69,6 +70,6 @@ urlpatterns = [
 
      # Groq AI URLs
     # path('negotiate/<int:product_id>/', views.start_negotiation, name='start_negotiation'),
-    # path('api/market-insights/', views.get_market_insights, name='market_insights'),
+    path('api/market-insights/', views.market_insights_api, name='market_insights'),
     # path('api/personalized-recommendations/', views.get_personalized_recommendations_api, name='personalized_recommendations'),
 ]
\ No newline at end of file
@@ -11,15 +11,27 @@ from django.db.models import Q, Count, Avg
 from django.http import JsonResponse
 from datetime import timedelta  # Add this import
 from .ai_service import AgriAI
-
+from .page_cache import cache_public_page, shared_context
+from .groq_service import async_groq_ai
+from .jobs import enqueue
+from . import metrics
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
+from urllib.parse import urlencode
+import hashlib
+from . import price_history
+
+@cache_public_page()
 def home(request):
-    featured_products = Product.objects.filter(is_available=True).order_by('-created_at')[:6]
-    testimonials = Testimonial.objects.filter(is_approved=True)
+    def build_context():
+        return {
+            'featured_products': list(Product.objects.filter(is_available=True).order_by('-created_at')[:6]),
+            'testimonials': list(Testimonial.objects.filter(is_approved=True).select_related('user')),
+        }
     
-    context = {
-        'featured_products': featured_products,
-        'testimonials': testimonials,
-    }
+    context = shared_context(request, 'home', build_context)
     return render(request, 'home.html', context)
 
 def how_it_works(request):
@@ -118,14 +130,6 @@ def custom_login(request):
             
             messages.success(request, f'Welcome back, {user.username}!')
             
-            # Log login history
-            LoginHistory.objects.create(
-                user=user,
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                success=True
-            )
-            
             # Redirect to next page if specified
             next_page = request.GET.get('next')
             if next_page:
@@ -140,15 +144,6 @@ def custom_login(request):
     
     return render(request, 'login.html')
 
-def get_client_ip(request):
-    """Get client IP address"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
 def custom_logout(request):
     logout(request)
     messages.info(request, 'You have been successfully logged out.')
@@ -384,20 +379,18 @@ def demo_login(request, demo_type):
     """
     View for demo account logins (for testing purposes)
     """
-    # First, ensure demo users exist
-    create_demo_users()
-    
     demo_accounts = {
         'farmer': {'username': 'demo_farmer', 'password': 'demo1234'},
         'buyer': {'username': 'demo_buyer', 'password': 'demo1234'},
     }
     
     if demo_type in demo_accounts:
-        user = authenticate(
-            request,
-            username=demo_accounts[demo_type]['username'],
-            password=demo_accounts[demo_type]['password']
-        )
+        credentials = demo_accounts[demo_type]
+        user = authenticate(request, **credentials)
+        if user is None and not User.objects.filter(username=credentials['username']).exists():
+            # First demo login on this database: create the demo users
+            create_demo_users()
+            user = authenticate(request, **credentials)
         
         if user is not None:
             login(request, user)
@@ -457,15 +450,49 @@ def product_detail(request, product_id):
     }
     return render(request, 'product_detail.html', context)
 
+# Columns of each /api/price-trends/ point, sent once per response
+PRICE_TREND_FIELDS = ['start', 'min', 'avg', 'median', 'max', 'samples', 'volume']
+# Default and maximum number of periods returned per series
+PRICE_TREND_PERIODS = {'day': (90, 400), 'week': (26, 520)}
+
+def _price_trends_etag(request):
+    # The rollups only change when rollup_prices runs, so revalidation never touches the database
+    query = urlencode(sorted(request.GET.items()))
+    return f'{price_history.rollup_version()}-{hashlib.md5(query.encode()).hexdigest()[:12]}'
+
+@cache_control(no_cache=True)
+@etag(_price_trends_etag)
 def get_price_trends(request):
-    # This would typically connect to your AI service
-    # For now, returning mock data
-    trends_data = {
-        'maize': [45, 52, 48, 55, 60, 58],
-        'tomatoes': [80, 75, 85, 90, 95, 92],
-        'potatoes': [35, 40, 38, 42, 45, 43],
-    }
-    return JsonResponse(trends_data)
+    """
+    Price series from the rollups: ?period=day|week, ?periods=N, ?category=<id>
+    and ?county=<name>. Points are arrays in PRICE_TREND_FIELDS order.
+    """
+    period = request.GET.get('period', 'week')
+    if period not in PRICE_TREND_PERIODS:
+        return JsonResponse({'error': 'period must be day or week'}, status=400)
+    default_periods, max_periods = PRICE_TREND_PERIODS[period]
+    try:
+        periods = min(int(request.GET.get('periods', default_periods)), max_periods)
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+    except ValueError:
+        return JsonResponse({'error': 'periods and category must be integers'}, status=400)
+    county = price_history.normalize_county(request.GET.get('county'))
+
+    today = timezone.localdate()
+    if period == 'week':
+        since = price_history.week_start(today) - timedelta(weeks=periods - 1)
+    else:
+        since = today - timedelta(days=periods - 1)
+    series = price_history.price_series(period, county, category_id, since)
+    return JsonResponse({
+        'period': period,
+        'county': county,
+        'fields': PRICE_TREND_FIELDS,
+        'series': [
+            {'category': category_id, 'name': name, 'points': points}
+            for category_id, name, points in series
+        ],
+    }, json_dumps_params={'separators': (',', ':')})
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Q, Count, Avg
@@ -476,8 +503,58 @@ from django.contrib import messages
 import json
 from .models import Product, ProductCategory, Wishlist, PriceSuggestion, MarketTrend, SearchHistory
 from .ai_service import AgriAI
-
+from .search import search_products
+from .pricing import get_current_suggestions
+from .pagination import keyset_paginate, windowed_count, detach_page, InvalidCursor
+from .stats import get_stats
+from .write_buffer import write_buffer
+from urllib.parse import urlencode
+
+# Keyset orderings for every marketplace sort; each ends with the primary key
+# as a tie-breaker so cursor pagination has a stable, unique position
+MARKETPLACE_ORDERINGS = {
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+    'recent': ('-created_at', '-id'),
+    'harvest': ('harvest_date', 'id'),
+    'recommended': ('-avg_rating', '-review_count', '-id'),
+}
+MARKETPLACE_PAGE_SIZE = 12
+# Result counts are only computed exactly up to this many rows
+MARKETPLACE_COUNT_WINDOW = 1000
+
+# GET parameters that select what the marketplace shows; anything else
+# (tracking parameters etc.) is ignored by the page cache
+MARKETPLACE_PARAMS = ('category', 'search', 'min_price', 'max_price', 'location', 'sort_by', 'page', 'cursor')
+
+@cache_public_page(MARKETPLACE_PARAMS)
 def marketplace(request):
+    # Shared, catalog-versioned part of the page
+    context = shared_context(
+        request, 'marketplace', lambda: _marketplace_context(request), MARKETPLACE_PARAMS
+    )
+    
+    # Personal bits, computed for every request
+    search_query = context['current_filters']['search']
+    if search_query and request.user.is_authenticated:
+        # Save search history for logged-in users (written in the background)
+        write_buffer.add(SearchHistory(
+            user=request.user,
+            query=search_query,
+            results_count=context['result_count']
+        ))
+    
+    # Get user's wishlist if logged in
+    wishlist_product_ids = []
+    if request.user.is_authenticated:
+        wishlist_product_ids = Wishlist.objects.filter(
+            user=request.user
+        ).values_list('product_id', flat=True)
+    
+    return render(request, 'marketplace.html', {**context, 'wishlist_product_ids': wishlist_product_ids})
+
+def _marketplace_context(request):
+    """Build the user-independent marketplace context"""
     # Get filter parameters
     category_filter = request.GET.get('category', '')
     search_query = request.GET.get('search', '')
@@ -485,27 +562,19 @@ def marketplace(request):
     max_price = request.GET.get('max_price', '')
     location_filter = request.GET.get('location', '')
     sort_by = request.GET.get('sort_by', 'recommended')
+    if sort_by not in MARKETPLACE_ORDERINGS:
+        sort_by = 'recommended'
     
     # Start with all available products
-    products = Product.objects.filter(is_available=True)
+    products = Product.objects.filter(is_available=True).select_related('farmer', 'category')
     
     # Apply filters
     if category_filter:
         products = products.filter(category__name__icontains=category_filter)
     
     if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(category__name__icontains=search_query)
-        )
-        # Save search history for logged-in users
-        if request.user.is_authenticated:
-            SearchHistory.objects.create(
-                user=request.user,
-                query=search_query,
-                results_count=products.count()
-            )
+        # Full-text index lookup, ranked by relevance (see base/search.py)
+        products = search_products(products, search_query)
     
     if min_price:
         products = products.filter(price__gte=min_price)
@@ -516,69 +585,56 @@ def marketplace(request):
     if location_filter and location_filter != 'all':
         products = products.filter(location__icontains=location_filter)
     
-    # Apply sorting
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'recent':
-        products = products.order_by('-created_at')
-    elif sort_by == 'harvest':
-        products = products.order_by('harvest_date')
-    else:  # recommended (default)
-        # Sort by AI confidence score if available
-        products = products.annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
-        ).order_by('-avg_rating', '-review_count')
-    
-    # Generate AI price suggestions for products
-    for product in products:
-        if not hasattr(product, 'ai_suggestion'):
-            price_data = AgriAI.calculate_optimal_price(product)
-            product.ai_suggestion = price_data
-    
-    # Pagination
-    paginator = Paginator(products, 12)  # 12 products per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
-    
-    # Get categories for filter
-    categories = ProductCategory.objects.all()
-    
-    # Get market trends and recommendations
-    market_trends = MarketTrend.objects.all().order_by('-created_at')[:3]
-    ai_recommendations = AgriAI.generate_market_recommendations()
+    # Apply sorting. Searches keep their relevance ordering for the default
+    # sort; relevance scores can't be seeked on, so they use numbered pages.
+    relevance_sort = bool(search_query) and sort_by == 'recommended'
+    ordering = MARKETPLACE_ORDERINGS[sort_by]
+    use_cursor = not request.GET.get('page') and not relevance_sort
     
-    # Get user's wishlist if logged in
-    wishlist_product_ids = []
-    if request.user.is_authenticated:
-        wishlist_product_ids = Wishlist.objects.filter(
-            user=request.user
-        ).values_list('product_id', flat=True)
+    if use_cursor:
+        try:
+            page_obj = keyset_paginate(products, ordering, request.GET.get('cursor'), MARKETPLACE_PAGE_SIZE)
+        except InvalidCursor:
+            page_obj = keyset_paginate(products, ordering, None, MARKETPLACE_PAGE_SIZE)
+        # Count once, up to a window, and reuse it below
+        result_count, result_count_capped = windowed_count(products, MARKETPLACE_COUNT_WINDOW)
+        page_range = []
+    else:
+        if not relevance_sort:
+            products = products.order_by(*ordering)
+        paginator = Paginator(products, MARKETPLACE_PAGE_SIZE)
+        page_obj = detach_page(paginator.get_page(request.GET.get('page', 1)))
+        result_count, result_count_capped = paginator.count, False
+        page_range = list(paginator.get_elided_page_range(page_obj.number, on_each_side=2, on_ends=1))
+    
+    # Attach the stored AI price suggestions for the current page
+    page_obj.object_list = list(page_obj.object_list)
+    suggestions = get_current_suggestions(page_obj.object_list)
+    for product in page_obj.object_list:
+        product.ai_suggestion = suggestions.get(product.id)
+    
+    current_filters = {
+        'category': category_filter,
+        'search': search_query,
+        'min_price': min_price,
+        'max_price': max_price,
+        'location': location_filter,
+        'sort_by': sort_by,
+    }
     
-    context = {
+    return {
         'products': page_obj,
-        'categories': categories,
-        'market_trends': market_trends,
-        'ai_recommendations': ai_recommendations,
-        'wishlist_product_ids': wishlist_product_ids,
-        'current_filters': {
-            'category': category_filter,
-            'search': search_query,
-            'min_price': min_price,
-            'max_price': max_price,
-            'location': location_filter,
-            'sort_by': sort_by,
-        },
-        'stats': {
-            'total_products': products.count(),
-            'active_farmers': User.objects.filter(products__is_available=True).distinct().count(),
-            'counties_covered': products.values('location').distinct().count(),
-        }
+        'categories': list(ProductCategory.objects.all()),
+        'market_trends': list(MarketTrend.objects.select_related('category').order_by('-created_at')[:3]),
+        'ai_recommendations': AgriAI.generate_market_recommendations(),
+        'current_filters': current_filters,
+        'filter_querystring': urlencode({key: value for key, value in current_filters.items() if value}),
+        'use_cursor': use_cursor,
+        'page_range': page_range,
+        'result_count': result_count,
+        'result_count_capped': result_count_capped,
+        'stats': get_stats(),
     }
-    
-    return render(request, 'marketplace.html', context)
 
 @login_required
 def add_to_wishlist(request, product_id):
@@ -611,28 +667,31 @@ def buy_product(request, product_id):
     
     return redirect('marketplace')
 
+@cache_public_page()
 def product_detail(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    
-    # Generate AI price suggestion
-    ai_suggestion = AgriAI.calculate_optimal_price(product)
-    
-    # Get similar products
-    similar_products = Product.objects.filter(
-        category=product.category,
-        is_available=True
-    ).exclude(id=product_id)[:4]
-    
-    # Get reviews
-    reviews = product.reviews.all().order_by('-created_at')
-    
-    context = {
-        'product': product,
-        'ai_suggestion': ai_suggestion,
-        'similar_products': similar_products,
-        'reviews': reviews,
-    }
+    def build_context():
+        product = get_object_or_404(Product.objects.select_related('farmer', 'category'), id=product_id)
+        
+        # Stored AI price suggestion
+        ai_suggestion = get_current_suggestions([product]).get(product.id)
+        
+        # Get similar products
+        similar_products = Product.objects.filter(
+            category=product.category,
+            is_available=True
+        ).exclude(id=product_id)[:4]
+        
+        # Get reviews
+        reviews = product.reviews.select_related('user').order_by('-created_at')
+        
+        return {
+            'product': product,
+            'ai_suggestion': ai_suggestion,
+            'similar_products': list(similar_products),
+            'reviews': list(reviews),
+        }
     
+    context = shared_context(request, 'product_detail', build_context, extra=(product_id,))
     return render(request, 'product_detail.html', context)
 
 def ai_recommendations_api(request):
@@ -643,9 +702,7 @@ def ai_recommendations_api(request):
         # For non-logged in users, show popular products
         recommendations = Product.objects.filter(
             is_available=True
-        ).annotate(
-            review_count=Count('reviews')
-        ).order_by('-review_count')[:6]
+        ).select_related('category').order_by('-review_count')[:6]
     
     data = {
         'recommendations': [
@@ -663,59 +720,35 @@ def ai_recommendations_api(request):
     
     return JsonResponse(data)
 
+async def market_insights_api(request):
+    """AI market insights for one category (?category=<id>) or all of them, fetched concurrently"""
+    categories = None
+    category_id = request.GET.get('category')
+    if category_id:
+        category = await ProductCategory.objects.filter(id=category_id).afirst() if category_id.isdigit() else None
+        if category is None:
+            return JsonResponse({'error': 'Unknown category'}, status=404)
+        categories = [category]
+
+    insights = await async_groq_ai.gather_market_insights(categories)
+    return JsonResponse({'insights': insights})
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires ``Authorization: Bearer <METRICS_TOKEN>`` when that setting is set"""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=403)
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
 def update_market_trends(request):
-    """Admin function to update market trends (would be called periodically)"""
+    """Admin function to queue a market trend update (would be called periodically)"""
     if not request.user.is_superuser:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     
-    categories = ProductCategory.objects.all()
+    enqueue('update_market_trends')
     
-    for category in categories:
-        # Calculate average price for category
-        products = Product.objects.filter(category=category, is_available=True)
-        if products.exists():
-            avg_price = sum(float(p.price) for p in products) / products.count()
-            
-            # Simple trend calculation (in real app, use historical data)
-            previous_trend = MarketTrend.objects.filter(
-                category=category
-            ).order_by('-created_at').first()
-            
-            if previous_trend:
-                if avg_price > float(previous_trend.average_price) * 1.05:
-                    trend = 'increasing'
-                elif avg_price < float(previous_trend.average_price) * 0.95:
-                    trend = 'decreasing'
-                else:
-                    trend = 'stable'
-            else:
-                trend = 'stable'
-            
-            # Demand level based on number of products
-            if products.count() > 20:
-                demand = 'high'
-            elif products.count() > 10:
-                demand = 'medium'
-            else:
-                demand = 'low'
-            
-            # Create recommendation
-            if trend == 'increasing' and demand == 'high':
-                recommendation = f"High demand for {category.name}. Prices rising. Good time to sell."
-            elif trend == 'decreasing' and demand == 'low':
-                recommendation = f"Low demand for {category.name}. Prices falling. Good time to buy."
-            else:
-                recommendation = f"Market for {category.name} is stable. Good time for trading."
-            
-            MarketTrend.objects.create(
-                category=category,
-                average_price=avg_price,
-                price_trend=trend,
-                demand_level=demand,
-                recommendation=recommendation
-            )
-    
-    return JsonResponse({'status': 'Market trends updated successfully'})
+    return JsonResponse({'status': 'Market trend update queued'}, status=202)
 
 # Add these views to your existing views.py
 
@@ -959,17 +992,9 @@ def add_product(request):
                     is_available=True
                 )
                 
-                # Generate AI price suggestion
-                ai_suggestion = AgriAI.calculate_optimal_price(product)
-                PriceSuggestion.objects.create(
-                    product=product,
-                    suggested_price=ai_suggestion['suggested_price'],
-                    confidence_score=ai_suggestion['confidence_score'],
-                    factors_considered=ai_suggestion['factors_considered'],
-                    price_label=ai_suggestion['price_label']
-                )
+                # The AI price suggestion is queued by the post_save signal
                 
-                messages.success(request, f'Product "{name}" added successfully! AI price analysis completed.')
+                messages.success(request, f'Product "{name}" added successfully! AI price analysis is under way.')
                 return redirect('farmer_dashboard')
                 
             except Exception as e:
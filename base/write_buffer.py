@@ -0,0 +1,104 @@
+"""
+Write-behind buffer for analytics rows (SearchHistory, LoginHistory).
+
+Requests only append unsaved instances to an in-process list; a background
+thread writes them with one bulk_create per model every ``max_delay``
+seconds, or sooner once ``max_size`` rows are waiting. Every gunicorn
+worker has its own buffer and thread (started lazily after the fork), and
+pending rows are flushed at interpreter exit. auto_now_add timestamps are
+set at flush time, so they may trail the event by up to ``max_delay``.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    def __init__(self, max_size=200, max_delay=2.0, max_pending=10000):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        # Beyond this many rows (e.g. while the database is down) new rows are dropped
+        self.max_pending = max_pending
+        self._pending = defaultdict(list)
+        self._count = 0
+        self._lock = threading.Lock()
+        # Held for a whole flush, so the exit flush waits for one in progress
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.dropped = 0
+
+    def add(self, instance):
+        """Queue an unsaved model instance for insertion"""
+        if not settings.WRITE_BUFFER['enabled']:
+            instance.save()
+            return
+        self._ensure_thread()
+        with self._lock:
+            if self._count >= self.max_pending:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning("Write buffer full: %d rows dropped so far", self.dropped)
+                return
+            self._pending[type(instance)].append(instance)
+            self._count += 1
+            full = self._count >= self.max_size
+        if full:
+            self._wake.set()
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Forked: rows queued by the parent are the parent's to write
+                self._pending = defaultdict(list)
+                self._count = 0
+                self._flush_lock = threading.Lock()
+                self._thread = None
+                self._pid = pid
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-buffer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.max_delay)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """Write everything pending; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending, self._count = self._pending, defaultdict(list), 0
+            written = 0
+            for model, instances in pending.items():
+                try:
+                    model.objects.bulk_create(instances, batch_size=500)
+                    written += len(instances)
+                except Exception:
+                    logger.exception("Write buffer: dropped %d %s rows", len(instances), model.__name__)
+            return written
+
+
+write_buffer = WriteBuffer(
+    max_size=settings.WRITE_BUFFER['max_size'],
+    max_delay=settings.WRITE_BUFFER['max_delay'],
+    max_pending=settings.WRITE_BUFFER['max_pending'],
+)
+
+
+@atexit.register
+def _flush_at_exit():
+    if write_buffer._pid == os.getpid():
+        write_buffer.flush()
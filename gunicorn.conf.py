@@ -0,0 +1,31 @@
+"""
+gunicorn settings (picked up automatically from the working directory).
+
+Prepares a shared directory for the Prometheus multiprocess metrics so
+/metrics reports the sum over all workers, not whichever one answered.
+"""
+import os
+import shutil
+import tempfile
+
+wsgi_app = 'agrilink.wsgi:application'
+
+
+def on_starting(server):
+    # Start every master with an empty metrics directory
+    path = os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'agrilink-metrics')
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    # Write queued SearchHistory/LoginHistory rows before the worker goes away
+    from base.write_buffer import write_buffer
+    write_buffer.flush()